@@ -15,20 +15,46 @@ class Settings(BaseSettings):
     port: int = 8000
     
     # CORS Settings
-    allowed_origins: list = [
-        "http://localhost:3000",
-        "chrome-extension://*",
-        "*"
-    ]
+    # Starlette does not expand globs in allowed_origins, so web pages and the
+    # browser extension are matched by one regex (compiled once, fullmatch per request)
+    allowed_origins: list = []
+    allowed_origin_regex: str = r"(chrome-extension://.*|https?://.*)"
     
     # ML Model Settings
-    model_path: str = "app/ml_models/xgboost_model.pkl"
-    feature_names_path: str = "app/ml_models/feature_names.pkl"
+    # Native XGBoost format; a legacy .pkl with the same stem is used if present instead
+    model_path: str = "app/ml_models/xgboost_model.ubj"
+    feature_names_path: str = "app/ml_models/feature_names.json"
+    model_nthread: int = 1  # per-worker XGBoost threads; scale with workers instead
     
     # Prediction Thresholds - ADJUSTED
     malicious_threshold: float = 0.70  # Raised from 0.50 to 0.70
     suspicious_threshold: float = 0.40  # Raised from 0.30 to 0.40
     
+    # Inference Batching (concurrent /api/check requests share one model call)
+    batch_max_size: int = 64
+    batch_max_wait_ms: float = 2.0
+    
+    # Bulk checking (/api/check/batch)
+    batch_check_max_urls: int = 100
+    reputation_lookup_timeout: float = 5.0  # seconds per batched lookup
+    
+    # Prediction Cache (repeat URLs skip feature extraction and inference)
+    prediction_cache_size: int = 10000
+    prediction_cache_ttl: float = 3600.0  # seconds
+    
+    # Reputation Cache (WHOIS/DNS/SSL results per root domain)
+    reputation_cache_size: int = 10000
+    reputation_cache_ttl: float = 3600.0  # seconds
+    reputation_workers: int = 40  # shared lookup threads (>= server request threads)
+    ssl_cert_cache_ttl: float = 86400.0  # seconds; certificates change rarely
+    
+    # Threat Intel Cache (Safe Browsing/VirusTotal/PhishTank verdicts per URL)
+    threat_intel_cache_size: int = 10000
+    threat_intel_cache_ttl: float = 600.0  # seconds; feeds update quickly
+    gsb_batch_max_size: int = 500  # Safe Browsing URLs per request (API limit 500)
+    gsb_batch_max_wait_ms: float = 20.0
+    threat_intel_pool_size: int = 20  # keep-alive connections per API host
+    
     # Anomaly Detection Settings
     anomaly_model_path: str = "app/ml_models/isolation_forest.pkl"
     anomaly_scaler_path: str = "app/ml_models/anomaly_scaler.pkl"
@@ -36,6 +62,14 @@ class Settings(BaseSettings):
     anomaly_high_threshold: float = 0.70       # ≥70 → HIGH_ANOMALY
     anomaly_suspicious_threshold: float = 0.50  # ≥50 → SUSPICIOUS
     
+    # User Feedback Storage (append-only JSONL)
+    feedback_path: str = "feedback_data.jsonl"
+    dynamic_whitelist_path: str = "dynamic_whitelist.jsonl"
+    feedback_fsync_interval: float = 30.0  # seconds
+    
+    # Logging
+    log_level: str = "INFO"  # DEBUG shows the per-request prediction trace
+    
     # Rate Limiting
     rate_limit: int = 100
     
@@ -3,25 +3,40 @@ FastAPI Main Application - ML-First with Reputation Validation
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.config import get_settings
-from app.routes import check, anomaly
+from app.routes import check, anomaly, feedback
 from app.models.schemas import HealthResponse
 from app.services.ml_service_final import get_ml_service
 from app.services.anomaly_detector import get_anomaly_detector
+from app.services.feedback_store import close_feedback_store
+from app.utils import clock
+from app.utils.logging_setup import setup_logging
+import logging
 
 settings = get_settings()
 
+setup_logging(settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Load models at import time so a preloading server (gunicorn preload_app)
+# loads them once in the master and workers share the pages after fork
+get_ml_service()
+get_anomaly_detector()
+
 app = FastAPI(
     title=settings.app_name,
     version="3.0.0",
     description="Zero-Day Anomaly Detection + ML-Based Malicious URL Detection",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
+    allow_origin_regex=settings.allowed_origin_regex,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -29,35 +44,39 @@ app.add_middleware(
 
 app.include_router(check.router)
 app.include_router(anomaly.router)
+app.include_router(feedback.router)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    print("=" * 60)
-    print(f"{settings.app_name} v3.0.0")
-    print("  Zero-Day Anomaly Detection Engine")
-    print("  ML-First Classification")
-    print("  Reputation Validation Layer")
-    print("=" * 60)
+    logger.info(
+        "%s v3.0.0 (Zero-Day Anomaly Detection, ML-First Classification, "
+        "Reputation Validation)", settings.app_name
+    )
     
     # Load ML classifier
     ml_service = get_ml_service()
     if ml_service.is_loaded():
-        print("ML model + reputation service ready.")
+        ml_service.start_batcher()
+        logger.info("ML model + reputation service ready.")
     else:
-        print("[WARN] ML classifier not loaded (optional).")
+        logger.warning("ML classifier not loaded (optional).")
     
     # Load anomaly detector
     anomaly_detector = get_anomaly_detector()
     if anomaly_detector.is_loaded():
-        print("Anomaly detection engine ready.")
+        logger.info("Anomaly detection engine ready.")
     else:
-        print("[WARN] Anomaly model not loaded. Run train_anomaly_model.py.")
+        logger.warning("Anomaly model not loaded. Run train_anomaly_model.py.")
     
-    print("=" * 60)
-    print(f"Server: http://{settings.host}:{settings.port}")
-    print(f"Docs:   http://{settings.host}:{settings.port}/docs")
-    print("=" * 60)
+    logger.info("Server: http://%s:%s  Docs: http://%s:%s/docs",
+                settings.host, settings.port, settings.host, settings.port)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush in-flight batched predictions and pending feedback writes"""
+    get_ml_service().stop_batcher()
+    close_feedback_store()
 
 @app.get("/", response_model=HealthResponse)
 async def health_check():
@@ -70,7 +89,8 @@ async def health_check():
         status="healthy",
         version="3.0.0",
         model_loaded=ml_service.is_loaded(),
-        anomaly_model_loaded=anomaly_detector.is_loaded()
+        anomaly_model_loaded=anomaly_detector.is_loaded(),
+        timestamp=clock.now()
     )
 
 if __name__ == "__main__":
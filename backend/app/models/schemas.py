@@ -2,7 +2,7 @@
 Pydantic models for request/response validation
 """
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from datetime import datetime
 
 class URLCheckRequest(BaseModel):
@@ -19,12 +19,12 @@ class URLCheckRequest(BaseModel):
 class URLCheckResponse(BaseModel):
     """Response model for URL checking"""
     url: str
-    status: str  # "MALICIOUS", "SUSPICIOUS", "LEGITIMATE"
+    status: str  # "MALICIOUS", "SUSPICIOUS", "LEGITIMATE" ("ERROR" in batch results)
     confidence: float
     prediction_score: float
     reason: str
     features: Optional[Dict] = None
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime  # set by the handler from app.utils.clock
     
     class Config:
         json_schema_extra = {
@@ -38,13 +38,28 @@ class URLCheckResponse(BaseModel):
             }
         }
 
+class URLBatchCheckRequest(BaseModel):
+    """Request model for bulk URL checking"""
+    urls: List[str] = Field(..., description="URLs to check", min_length=1)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "urls": ["http://suspicious-site.tk", "https://github.com"]
+            }
+        }
+
+class URLBatchCheckResponse(BaseModel):
+    """Response model for bulk URL checking (results in request order)"""
+    results: List[URLCheckResponse]
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     version: str
     model_loaded: bool
     anomaly_model_loaded: bool = False
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime  # set by the handler from app.utils.clock
 
 class StatsResponse(BaseModel):
     """API statistics response"""
@@ -76,7 +91,7 @@ class AnomalyCheckResponse(BaseModel):
     feature_deviations: Dict = Field(default_factory=dict)
     allow_override: bool = True
     processing_time_ms: float = 0.0
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime  # set by the handler from app.utils.clock
 
     class Config:
         json_schema_extra = {
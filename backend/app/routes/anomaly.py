@@ -10,6 +10,7 @@ Privacy-first endpoint that:
 from fastapi import APIRouter, HTTPException
 from app.models.schemas import AnomalyCheckRequest, AnomalyCheckResponse
 from app.services.risk_scorer import RiskScorer
+from app.utils import clock
 import asyncio
 import time
 
@@ -86,6 +87,7 @@ async def check_anomaly(request: AnomalyCheckRequest):
             feature_deviations=risk.feature_deviations,
             allow_override=risk.allow_override,
             processing_time_ms=elapsed_ms,
+            timestamp=clock.now(),
         )
 
     except HTTPException:
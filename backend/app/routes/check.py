@@ -2,25 +2,80 @@
 URL checking routes - ML-First approach
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from app.models.schemas import URLCheckRequest, URLCheckResponse
+from fastapi.responses import ORJSONResponse
+from app.models.schemas import (
+    URLCheckRequest, URLCheckResponse, URLBatchCheckRequest, URLBatchCheckResponse
+)
+from app.config import get_settings
 from app.services.ml_service_final import get_ml_service
-import asyncio
+from app.utils import clock
+from enum import IntEnum
+import multiprocessing
 import time
 
 router = APIRouter(prefix="/api", tags=["URL Checking"])
 
-stats = {
-    "total_checks": 0,
-    "malicious": 0,
-    "suspicious": 0,
-    "legitimate": 0,
-    "ml_predictions": 0,
-    "reputation_adjustments": 0,
-    "start_time": time.time()
-}
+class Stat(IntEnum):
+    """Slots in the shared stats counter array"""
+    TOTAL_CHECKS = 0
+    ML_PREDICTIONS = 1
+    REPUTATION_ADJUSTMENTS = 2
+    MALICIOUS = 3
+    SUSPICIOUS = 4
+    LEGITIMATE = 5
 
-@router.post("/check", response_model=URLCheckResponse)
-async def check_url(
+# Shared-memory counters: created at import, so workers forked from a
+# preloaded parent all update (and report) the same totals
+stats = multiprocessing.Array('q', len(Stat))
+start_time = time.time()
+
+def _record(*slots: Stat):
+    """Increment several counters under a single lock acquisition"""
+    with stats.get_lock():
+        for slot in slots:
+            stats[slot] += 1
+
+def _record_result(result: dict):
+    """Count one finished check"""
+    if result['status'] == "MALICIOUS":
+        verdict = Stat.MALICIOUS
+    elif result['status'] == "SUSPICIOUS":
+        verdict = Stat.SUSPICIOUS
+    else:
+        verdict = Stat.LEGITIMATE
+    
+    if result.get('adjustment_applied'):
+        _record(Stat.TOTAL_CHECKS, Stat.ML_PREDICTIONS, Stat.REPUTATION_ADJUSTMENTS, verdict)
+    else:
+        _record(Stat.TOTAL_CHECKS, Stat.ML_PREDICTIONS, verdict)
+
+def _response_body(url: str, result: dict, timestamp) -> dict:
+    """URLCheckResponse-shaped dict — include full data for warning page"""
+    # Copied: results may be shared with the prediction cache
+    features_data = dict(result.get('transparency', {}))
+    # Add reputation + ML raw data for the warning page panels
+    features_data['ml_raw_score'] = result.get('ml_raw_score')
+    features_data['reputation_score'] = result.get('reputation_score')
+    features_data['reputation_data'] = result.get('reputation_data')
+    
+    return {
+        'url': url,
+        'status': result['status'],
+        'confidence': float(result['confidence']),
+        'prediction_score': float(result['prediction_score']),
+        'reason': result['reason'],
+        'features': features_data,
+        'timestamp': timestamp
+    }
+
+# URLCheckResponse documents the schema only; the handler returns a
+# pre-serialized ORJSONResponse so the body skips a Pydantic validation pass
+@router.post(
+    "/check",
+    response_class=ORJSONResponse,
+    responses={200: {"model": URLCheckResponse}}
+)
+def check_url(
     request: URLCheckRequest,
     use_reputation: bool = Query(True, description="Enable reputation validation"),
     ml_service = Depends(get_ml_service)
@@ -31,44 +86,58 @@ async def check_url(
     - ML model always runs (your trained model!)
     - Reputation provides validation/adjustment
     - Full transparency in response
+    
+    Declared sync so FastAPI runs it in its threadpool: feature extraction,
+    XGBoost (which releases the GIL) and reputation lookups never block
+    the event loop.
     """
     try:
-        # Run ML prediction + reputation in a thread pool (both are blocking I/O)
-        result = await asyncio.to_thread(
-            ml_service.predict, request.url, use_reputation
-        )
-        
-        # Update statistics
-        stats["total_checks"] += 1
-        stats["ml_predictions"] += 1
-        
-        if result.get('adjustment_applied'):
-            stats["reputation_adjustments"] += 1
-        
-        if result['status'] == "MALICIOUS":
-            stats["malicious"] += 1
-        elif result['status'] == "SUSPICIOUS":
-            stats["suspicious"] += 1
-        else:
-            stats["legitimate"] += 1
+        result = ml_service.predict(request.url, use_reputation)
+        _record_result(result)
         
-        # Build response — include full data for warning page
-        features_data = result.get('transparency', {})
-        # Add reputation + ML raw data for the warning page panels
-        features_data['ml_raw_score'] = result.get('ml_raw_score')
-        features_data['reputation_score'] = result.get('reputation_score')
-        features_data['reputation_data'] = result.get('reputation_data')
+        return ORJSONResponse(_response_body(request.url, result, clock.now()))
         
-        response = URLCheckResponse(
-            url=request.url,
-            status=result['status'],
-            confidence=result['confidence'],
-            prediction_score=result['prediction_score'],
-            reason=result['reason'],
-            features=features_data
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error: {str(e)}"
+        )
+
+@router.post(
+    "/check/batch",
+    response_class=ORJSONResponse,
+    responses={200: {"model": URLBatchCheckResponse}}
+)
+def check_urls_batch(
+    request: URLBatchCheckRequest,
+    use_reputation: bool = Query(True, description="Enable reputation validation"),
+    ml_service = Depends(get_ml_service)
+):
+    """
+    Check many URLs in one request
+    
+    All URLs are scored with a single model call; results are returned in
+    request order with the same shape as /api/check. A URL that cannot be
+    checked gets status "ERROR" instead of failing the whole batch.
+    """
+    max_urls = get_settings().batch_check_max_urls
+    if len(request.urls) > max_urls:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many URLs: {len(request.urls)} (max {max_urls})"
         )
+    
+    try:
+        results = ml_service.predict_batch(request.urls, use_reputation)
+        
+        timestamp = clock.now()
+        body = []
+        for url, result in zip(request.urls, results):
+            if 'error' not in result:
+                _record_result(result)
+            body.append(_response_body(url, result, timestamp))
         
-        return response
+        return ORJSONResponse({'results': body})
         
     except Exception as e:
         raise HTTPException(
@@ -79,14 +148,17 @@ async def check_url(
 @router.get("/stats")
 async def get_stats():
     """Get API statistics"""
-    uptime = time.time() - stats["start_time"]
+    uptime = time.time() - start_time
+    
+    with stats.get_lock():
+        snapshot = stats[:]
     
     return {
-        "total_checks": stats["total_checks"],
-        "ml_predictions_made": stats["ml_predictions"],
-        "reputation_adjustments": stats["reputation_adjustments"],
-        "malicious_detected": stats["malicious"],
-        "suspicious_detected": stats["suspicious"],
-        "legitimate_detected": stats["legitimate"],
+        "total_checks": snapshot[Stat.TOTAL_CHECKS],
+        "ml_predictions_made": snapshot[Stat.ML_PREDICTIONS],
+        "reputation_adjustments": snapshot[Stat.REPUTATION_ADJUSTMENTS],
+        "malicious_detected": snapshot[Stat.MALICIOUS],
+        "suspicious_detected": snapshot[Stat.SUSPICIOUS],
+        "legitimate_detected": snapshot[Stat.LEGITIMATE],
         "uptime_hours": f"{uptime / 3600:.2f}"
     }
\ No newline at end of file
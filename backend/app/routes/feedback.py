@@ -5,8 +5,9 @@ Allow users to report false positives/negatives
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from datetime import datetime
-import json
-import os
+from typing import Optional
+import asyncio
+from app.services.feedback_store import get_feedback_log, get_whitelist_store
 
 router = APIRouter(prefix="/api/feedback", tags=["Feedback"])
 
@@ -16,21 +17,10 @@ class FeedbackRequest(BaseModel):
     actual_status: str  # What user says (legitimate/malicious)
     user_comment: Optional[str] = None
 
-# Simple file-based storage (use database in production)
-FEEDBACK_FILE = "feedback_data.json"
-
 @router.post("/report")
 async def submit_feedback(feedback: FeedbackRequest):
     """Submit user feedback for false positive/negative"""
     
-    # Load existing feedback
-    if os.path.exists(FEEDBACK_FILE):
-        with open(FEEDBACK_FILE, 'r') as f:
-            feedback_data = json.load(f)
-    else:
-        feedback_data = []
-    
-    # Add new feedback
     feedback_entry = {
         'url': feedback.url,
         'predicted_status': feedback.predicted_status,
@@ -39,15 +29,13 @@ async def submit_feedback(feedback: FeedbackRequest):
         'timestamp': datetime.now().isoformat()
     }
     
-    feedback_data.append(feedback_entry)
-    
-    # Save feedback
-    with open(FEEDBACK_FILE, 'w') as f:
-        json.dump(feedback_data, f, indent=2)
+    # Append one line; history is never re-read on the request path.
+    # File I/O runs in a worker thread so it never blocks the event loop.
+    await asyncio.to_thread(get_feedback_log().append, feedback_entry)
     
     # If false positive, add to temporary whitelist
     if feedback.predicted_status == 'MALICIOUS' and feedback.actual_status == 'legitimate':
-        add_to_whitelist(feedback.url)
+        await asyncio.to_thread(add_to_whitelist, feedback.url)
     
     return {
         'status': 'success',
@@ -61,16 +49,5 @@ def add_to_whitelist(url: str):
     parsed = urlparse(url)
     hostname = parsed.hostname
     
-    # Load whitelist
-    whitelist_file = "dynamic_whitelist.json"
-    if os.path.exists(whitelist_file):
-        with open(whitelist_file, 'r') as f:
-            whitelist = json.load(f)
-    else:
-        whitelist = []
-    
-    if hostname not in whitelist:
-        whitelist.append(hostname)
-        
-        with open(whitelist_file, 'w') as f:
-            json.dump(whitelist, f, indent=2)
\ No newline at end of file
+    if hostname:
+        get_whitelist_store().add(hostname)
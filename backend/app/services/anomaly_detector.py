@@ -6,6 +6,7 @@ Trained only on legitimate URLs; no malicious samples required.
 All processing is local.
 """
 import joblib
+import logging
 import numpy as np
 from typing import Dict, Optional, List
 import os
@@ -13,6 +14,8 @@ import os
 from app.config import get_settings
 from app.services.privacy_feature_extractor import PrivacyFeatureExtractor
 
+logger = logging.getLogger(__name__)
+
 
 class AnomalyDetector:
     """
@@ -38,24 +41,22 @@ class AnomalyDetector:
             scaler_path = self.settings.anomaly_scaler_path
             baseline_path = self.settings.anomaly_baseline_path
 
-            print(f"Loading anomaly model from: {model_path}")
+            logger.info("Loading anomaly model from: %s", model_path)
             self.model = joblib.load(model_path)
 
-            print(f"Loading scaler from: {scaler_path}")
+            logger.info("Loading scaler from: %s", scaler_path)
             self.scaler = joblib.load(scaler_path)
 
-            print(f"Loading baseline stats from: {baseline_path}")
+            logger.info("Loading baseline stats from: %s", baseline_path)
             self.baseline_stats = joblib.load(baseline_path)
 
-            print("Anomaly detection engine loaded.")
-            print(f"  Features: {len(self.extractor.FEATURE_NAMES)}")
+            logger.info("Anomaly detection engine loaded (%d features)", len(self.extractor.FEATURE_NAMES))
 
         except FileNotFoundError as e:
-            print(f"[WARN] Anomaly model not found: {e}")
-            print("   Run train_anomaly_model.py to generate the model files.")
+            logger.warning("Anomaly model not found: %s. Run train_anomaly_model.py to generate the model files.", e)
             self.model = None
         except Exception as e:
-            print(f"[ERROR] Loading anomaly model: {e}")
+            logger.exception("Error loading anomaly model")
             self.model = None
 
     def score_url(self, url: str) -> Dict:
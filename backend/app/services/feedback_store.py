@@ -0,0 +1,257 @@
+"""
+Feedback Store - Append-only JSONL storage for user feedback
+
+Feedback records and user-verified domains are appended one JSON line at a
+time instead of re-reading and rewriting a whole JSON document per request.
+Writes go to the OS page cache immediately; fsync is issued at most once
+per fsync_interval seconds (and on close) so disk syncs stay off the
+per-request cost.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class JSONLAppender:
+    """Appends JSON records as lines to a file with rate-limited fsync"""
+
+    def __init__(self, path: str, fsync_interval: float = 30.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_sync = time.monotonic()
+
+    def append(self, record: Dict) -> None:
+        line = (json.dumps(record) + "\n").encode()
+        with self._lock:
+            # Reopen if another process replaced the file (e.g. compaction),
+            # so records never land in the unlinked old copy
+            if self._file is not None and os.fstat(self._file.fileno()).st_nlink == 0:
+                self._file.close()
+                self._file = None
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            self._file.write(line)
+            self._file.flush()
+
+            now = time.monotonic()
+            if now - self._last_sync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_sync = now
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """Stream records from a JSONL file, skipping blank or torn lines"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+class WhitelistStore:
+    """
+    In-memory set of user-verified safe domains backed by a JSONL file
+
+    The file is compacted (de-duplicated and rewritten) once at load time;
+    afterwards each new domain is a single appended line. Lookups pick up
+    lines appended by other worker processes by tailing the file at most
+    once per refresh_interval seconds; a single stat decides whether there
+    is anything new, and a file replaced by another worker's compaction is
+    re-read from the start.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        legacy_path: Optional[str] = None,
+        fsync_interval: float = 30.0,
+        refresh_interval: float = 1.0
+    ):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.refresh_interval = refresh_interval
+        self._domains: Set[str] = set()
+        self._lock = threading.Lock()
+        self._appender = JSONLAppender(path, fsync_interval)
+        self._observers: List[Callable[[str], None]] = []
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._next_refresh = 0.0
+        self.load()
+
+    def load(self) -> None:
+        """Load and compact the whitelist file"""
+        domains: Set[str] = set()
+
+        # Pick up domains from the old JSON-list format
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, 'r') as f:
+                    domains.update(d for d in json.load(f) if d)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not read legacy whitelist %s: %s", self.legacy_path, e)
+
+        for record in read_jsonl(self.path):
+            domain = record.get('domain')
+            if domain:
+                domains.add(domain)
+
+        if domains:
+            self._compact(domains)
+
+        with self._lock:
+            self._domains = domains
+            try:
+                st = os.stat(self.path)
+                self._offset, self._inode = st.st_size, st.st_ino
+            except OSError:
+                self._offset, self._inode = 0, None
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def _compact(self, domains: Set[str]) -> None:
+        """Atomically replace the file with one line per domain"""
+        # A unique temp file per call, so workers loading at the same time
+        # never write into (or rename away) each other's copy
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.path)),
+            prefix=os.path.basename(self.path) + '.',
+            suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'w') as f:
+                for domain in sorted(domains):
+                    f.write(json.dumps({'domain': domain}) + "\n")
+            if os.path.exists(self.path):
+                # mkstemp creates the file owner-only; keep the original's mode
+                os.chmod(tmp_path, os.stat(self.path).st_mode & 0o777)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        """Call callback(domain) whenever a new domain is added"""
+        self._observers.append(callback)
+
+    def _notify(self, domain: str) -> None:
+        for callback in self._observers:
+            callback(domain)
+
+    def add(self, domain: str) -> bool:
+        """Add a domain; returns False if it was already present"""
+        if not domain:
+            return False
+        with self._lock:
+            if domain in self._domains:
+                return False
+            self._domains.add(domain)
+        self._appender.append({'domain': domain})
+        self._notify(domain)
+        return True
+
+    def refresh(self) -> None:
+        """Read lines appended since the last load/refresh (e.g. by other workers)"""
+        with self._lock:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            try:
+                st = os.stat(self.path)
+                if st.st_ino != self._inode or st.st_size < self._offset:
+                    # Replaced by another worker's compaction: the offset
+                    # means nothing in the new file, so read it all
+                    self._inode = st.st_ino
+                    self._offset = 0
+                if st.st_size <= self._offset:
+                    return
+                with open(self.path, 'rb') as f:
+                    f.seek(self._offset)
+                    chunk = f.read()
+            except OSError:
+                return
+
+            # Leave a partially written last line for the next refresh
+            end = chunk.rfind(b"\n") + 1
+            self._offset += end
+            added = []
+            for line in chunk[:end].splitlines():
+                try:
+                    domain = json.loads(line).get('domain')
+                except ValueError:
+                    continue
+                if domain and domain not in self._domains:
+                    self._domains.add(domain)
+                    added.append(domain)
+
+        for domain in added:
+            self._notify(domain)
+
+    def __contains__(self, domain: object) -> bool:
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        return domain in self._domains
+
+    def __len__(self) -> int:
+        return len(self._domains)
+
+    def close(self) -> None:
+        self._appender.close()
+
+
+# Singletons
+_feedback_log: Optional[JSONLAppender] = None
+_whitelist_store: Optional[WhitelistStore] = None
+
+
+def get_feedback_log() -> JSONLAppender:
+    """Get or create the feedback log singleton"""
+    global _feedback_log
+    if _feedback_log is None:
+        settings = get_settings()
+        _feedback_log = JSONLAppender(settings.feedback_path, settings.feedback_fsync_interval)
+    return _feedback_log
+
+
+def get_whitelist_store() -> WhitelistStore:
+    """Get or create the dynamic whitelist singleton"""
+    global _whitelist_store
+    if _whitelist_store is None:
+        settings = get_settings()
+        _whitelist_store = WhitelistStore(
+            settings.dynamic_whitelist_path,
+            legacy_path="dynamic_whitelist.json",
+            fsync_interval=settings.feedback_fsync_interval
+        )
+    return _whitelist_store
+
+
+def close_feedback_store() -> None:
+    """fsync and close any open feedback files"""
+    if _feedback_log is not None:
+        _feedback_log.close()
+    if _whitelist_store is not None:
+        _whitelist_store.close()
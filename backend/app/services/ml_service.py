@@ -1,14 +1,75 @@
 """
 ML Model Service - Handles predictions (Updated with Smart Whitelisting)
 """
-import joblib
+import logging
 import numpy as np
-import pandas as pd
+import threading
 from typing import Dict, Optional, Tuple
 import os
-from urllib.parse import urlparse
+from functools import lru_cache
 from app.config import get_settings
-from app.services.feature_extractor import URLFeatureExtractorV2
+from app.services.model_state import get_model_state
+from app.services.feedback_store import get_whitelist_store
+from app.utils.cache import LRUCache
+from app.utils.domains import parse_hostname
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=4096)
+def _matches_domain(hostname: str, domains: frozenset) -> bool:
+    """True if hostname equals, or is a subdomain of, an entry in domains"""
+    parts = hostname.lower().split('.')
+    for i in range(len(parts)):
+        if '.'.join(parts[i:]) in domains:
+            return True
+    return False
+
+# Boolean URL flags packed into one int: (feature, low, high, reason) per bit,
+# set when low <= value <= high. Bit order is the order reasons are reported.
+_FLAG_RULES = (
+    ('is_ip_address', 1, 1, "IP address instead of domain name"),
+    ('is_suspicious_tld', 1, 1, "Suspicious top-level domain"),
+    ('long_path', 1, 1, "Unusually long URL path"),
+    ('num_at', 1, float('inf'), "Contains @ symbol (redirect)"),
+    ('subdomain_count', 5, float('inf'), "Excessive subdomains"),
+    ('high_entropy', 1, 1, "High randomness in domain name"),
+    ('is_https', 0, 0, "No HTTPS encryption"),
+    ('has_https_in_hostname', 1, 1, "HTTPS in domain name (deceptive)"),
+    ('brand_without_official_tld', 1, 1, "Brand name in non-official domain (typosquatting)"),
+)
+_FLAG_REASONS = tuple(rule[3] for rule in _FLAG_RULES)
+
+FLAG_IP = 1 << 0
+FLAG_SUSPICIOUS_TLD = 1 << 1
+FLAG_LONG_PATH = 1 << 2
+FLAG_AT_SYMBOL = 1 << 3
+FLAG_HIGH_ENTROPY = 1 << 5
+FLAG_NO_HTTPS = 1 << 6
+
+# Flags not reported for whitelisted domains
+_WHITELIST_EXEMPT = FLAG_HIGH_ENTROPY | FLAG_NO_HTTPS
+
+# Hard-block overrides, checked in order: (flag, status, score, reason)
+_OVERRIDE_RULES = (
+    (FLAG_IP, 'MALICIOUS', 0.95, 'IP address instead of domain name'),
+    (FLAG_SUSPICIOUS_TLD, 'MALICIOUS', 0.85, 'Suspicious top-level domain (.tk, .ml, .ga, etc.)'),
+    (FLAG_AT_SYMBOL, 'MALICIOUS', 0.90, 'URL contains @ symbol (potential redirect)'),
+)
+
+def _pack_flags(features: Dict) -> int:
+    """Evaluate every flag rule once and pack the results into a bitmask"""
+    flags = 0
+    for bit, (name, low, high, _) in enumerate(_FLAG_RULES):
+        if low <= features.get(name, 0) <= high:
+            flags |= 1 << bit
+    return flags
+
+def _iter_set_bits(flags: int):
+    """Yield the positions of set bits, lowest first"""
+    while flags:
+        lowest = flags & -flags
+        yield lowest.bit_length() - 1
+        flags ^= lowest
 
 class MLService:
     """Service for ML model predictions"""
@@ -16,11 +77,17 @@ class MLService:
     def __init__(self):
         self.settings = get_settings()
         self.model: Optional[object] = None
-        self.feature_names: Optional[list] = None
-        self.extractor = URLFeatureExtractorV2()
+        self._booster = None
+        self.feature_names: Optional[Tuple[str, ...]] = None
+        self._feat_index: Dict[str, int] = {}
+        self._row_local = threading.local()
+        self._pred_cache = LRUCache(
+            maxsize=self.settings.prediction_cache_size,
+            ttl=self.settings.prediction_cache_ttl
+        )
         
         # Whitelist of known safe domains (exact match or endswith)
-        self.safe_domains = {
+        self.safe_domains = frozenset({
             'google.com', 'google.co.in', 'google.co.uk', 'google.de',
             'google.co.jp', 'google.com.br', 'google.com.au',
             'youtube.com', 'facebook.com', 'twitter.com', 'x.com',
@@ -35,10 +102,10 @@ class MLService:
             'twitch.tv', 'discord.com', 'slack.com', 'zoom.us',
             'dropbox.com', 'docs.google.com',
             'leetcode.com', 'hackerrank.com',
-        }
+        })
         
         # Domains that legitimately have long URLs (with query params)
-        self.long_url_ok_domains = {
+        self.long_url_ok_domains = frozenset({
             'google.com', 'google.co.in', 'google.co.uk', 'google.de',
             'youtube.com',
             'amazon.com', 'amazon.in', 'amazon.co.uk', 'amazon.de',
@@ -48,80 +115,135 @@ class MLService:
             'facebook.com', 'linkedin.com', 'pinterest.com',
             'aliexpress.com', 'alibaba.com', 'walmart.com',
             'flipkart.com', 'myntra.com', 'snapdeal.com',
-        }
+        })
+        
+        # User-verified domains from feedback (shared store, updated live)
+        self.dynamic_whitelist = get_whitelist_store()
+        self.dynamic_whitelist.subscribe(self._on_whitelist_add)
         
         self.load_model()
     
     def load_model(self):
-        """Load the trained model"""
+        """Attach the shared model and feature extractor"""
         try:
-            model_path = self.settings.model_path
-            features_path = self.settings.feature_names_path
+            state = get_model_state()
+            self.model = state.model
+            self._booster = state.booster
+            self.feature_names = state.feature_names
+            self._feat_index = state.feature_index
+            self._feature_getter = state.feature_getter
+            self.extractor = state.extractor
+            self._pred_cache.clear()
             
-            print(f" Loading V2 model from: {model_path}")
-            self.model = joblib.load(model_path)
-            
-            print(f" Loading feature names from: {features_path}")
-            self.feature_names = joblib.load(features_path)
-            
-            print(f" Model V2 loaded successfully!")
-            feat_count = len(self.feature_names) if self.feature_names is not None else 0
-            print(f"   Features: {feat_count}")
-            print(f"   Safe domains: {len(self.safe_domains)}")
-            print(f"   Long URL OK domains: {len(self.long_url_ok_domains)}")
+            logger.info(
+                "Model V2 loaded: %d features, %d safe domains, %d user-verified domains, "
+                "%d long-URL domains",
+                len(self.feature_names), len(self.safe_domains),
+                len(self.dynamic_whitelist), len(self.long_url_ok_domains)
+            )
             
         except Exception as e:
-            print(f" Error loading model: {e}")
+            logger.exception("Error loading model")
             raise
     
+    def _get_row_buffer(self) -> np.ndarray:
+        """Return this thread's preallocated (1, n_features) input row"""
+        buf = getattr(self._row_local, 'buf', None)
+        if buf is None:
+            buf = np.empty((1, len(self._feat_index)), dtype=np.float32)
+            self._row_local.buf = buf
+        return buf
+    
+    def _build_row(self, features: Dict) -> np.ndarray:
+        """Fill the row buffer from a feature dict in model column order"""
+        row = self._get_row_buffer()
+        try:
+            row[0] = self._feature_getter(features)
+            return row
+        except KeyError:
+            pass
+        
+        row.fill(0)
+        for name, value in features.items():
+            idx = self._feat_index.get(name)
+            if idx is not None:
+                row[0, idx] = value
+        return row
+    
     def _is_whitelisted_domain(self, hostname: str) -> bool:
-        """Check if domain is in whitelist"""
-        hostname_lower = hostname.lower()
-        for safe_domain in self.safe_domains:
-            if hostname_lower == safe_domain or hostname_lower.endswith('.' + safe_domain):
-                return True
-        return False
+        """Check if domain is in the static or user-verified whitelist"""
+        return _matches_domain(hostname, self.safe_domains) or hostname in self.dynamic_whitelist
+    
+    def _on_whitelist_add(self, domain: str):
+        """Drop cached verdicts so the new whitelist entry takes effect"""
+        self._pred_cache.clear()
     
     def _allows_long_urls(self, hostname: str) -> bool:
         """Check if domain legitimately has long URLs"""
-        hostname_lower = hostname.lower()
-        for domain in self.long_url_ok_domains:
-            if hostname_lower == domain or hostname_lower.endswith('.' + domain):
-                return True
-        return False
+        return _matches_domain(hostname, self.long_url_ok_domains)
+    
+    @staticmethod
+    def _parse_hostname(url: str) -> str:
+        """Lowercased hostname of url ('' if it cannot be parsed)"""
+        try:
+            return parse_hostname(url)
+        except ValueError:
+            return ''
     
     def predict(self, url: str) -> Dict:
         """
         Predict if URL is malicious
         
+        Repeat URLs are served from an LRU cache. Cached results omit the
+        'features' dict to keep memory small; callers get a fresh copy.
+        
         Returns:
             dict: Prediction result with status, confidence, etc.
         """
+        cached = self._pred_cache.get(url)
+        if cached is not None:
+            return dict(cached)
+        
+        result = self._predict_uncached(url)
+        self._pred_cache.set(url, {k: v for k, v in result.items() if k != 'features'})
+        return result
+    
+    def _predict_uncached(self, url: str) -> Dict:
+        """Run heuristics and the model for a URL (no caching)"""
         try:
             # Extract features
             features = self.extractor.extract_features(url)
             
+            # Parse once; hostname and whitelist status are reused below
+            hostname = self._parse_hostname(url)
+            is_whitelisted = self._is_whitelisted_domain(hostname)
+            
+            # Evaluate the boolean flags once for overrides and explanations
+            flags = 0 if is_whitelisted else _pack_flags(features)
+            
             # Apply heuristic overrides BEFORE ML prediction
-            override_result = self._apply_heuristic_overrides(url, features)
+            override_result = self._apply_heuristic_overrides(features, flags, is_whitelisted)
             if override_result:
                 return override_result
             
             if not self.model or not self.feature_names:
                 raise RuntimeError("Model not loaded")
             
-            # Convert to DataFrame with correct column order
-            feature_df = pd.DataFrame([features])
-            feature_df = feature_df[self.feature_names]
+            # Fill the preallocated row in model column order
+            row = self._build_row(features)
             
-            # Get prediction
-            prediction_proba = self.model.predict_proba(feature_df)[0]  # type: ignore[union-attr]
-            prediction_score = float(prediction_proba[1])  # Probability of malicious
+            # Get prediction (binary:logistic returns P(malicious) directly)
+            if self._booster is not None:
+                prediction_score = float(self._booster.inplace_predict(row)[0])
+            else:
+                prediction_score = float(self.model.predict_proba(row)[0][1])  # type: ignore[union-attr]
             
             # Determine status
             status, confidence, reason = self._interpret_prediction(
                 prediction_score, 
-                features,
-                url
+                flags,
+                hostname,
+                is_whitelisted
             )
             
             return {
@@ -133,17 +255,14 @@ class MLService:
             }
             
         except Exception as e:
-            print(f" Prediction error for {url}: {e}")
+            logger.exception("Prediction error for %s", url)
             raise
     
-    def _apply_heuristic_overrides(self, url: str, features: Dict) -> Optional[Dict]:
+    def _apply_heuristic_overrides(self, features: Dict, flags: int, is_whitelisted: bool) -> Optional[Dict]:
         """Apply heuristic rules to override ML prediction"""
         try:
-            parsed = urlparse(url if url.startswith(('http://', 'https://')) else 'http://' + url)
-            hostname = parsed.hostname if parsed.hostname else ''
-            
             # Rule 1: Whitelist known safe domains (HIGHEST PRIORITY)
-            if self._is_whitelisted_domain(hostname):
+            if is_whitelisted:
                 return {
                     'status': 'LEGITIMATE',
                     'confidence': 0.99,
@@ -152,108 +271,52 @@ class MLService:
                     'features': features
                 }
             
-            # Rule 2: IP addresses (immediate block)
-            if features.get('is_ip_address', 0) == 1:
-                return {
-                    'status': 'MALICIOUS',
-                    'confidence': 0.95,
-                    'prediction_score': 0.95,
-                    'reason': 'IP address instead of domain name',
-                    'features': features
-                }
-            
-            # Rule 3: Suspicious TLD
-            if features.get('is_suspicious_tld', 0) == 1:
-                return {
-                    'status': 'MALICIOUS',
-                    'confidence': 0.85,
-                    'prediction_score': 0.85,
-                    'reason': 'Suspicious top-level domain (.tk, .ml, .ga, etc.)',
-                    'features': features
-                }
-            
-            # Rule 4: @ symbol (phishing redirect)
-            if features.get('num_at', 0) > 0:
-                return {
-                    'status': 'MALICIOUS',
-                    'confidence': 0.90,
-                    'prediction_score': 0.90,
-                    'reason': 'URL contains @ symbol (potential redirect)',
-                    'features': features
-                }
+            # Rules 2+: first matching hard-block rule wins
+            for flag, status, score, reason in _OVERRIDE_RULES:
+                if flags & flag:
+                    return {
+                        'status': status,
+                        'confidence': score,
+                        'prediction_score': score,
+                        'reason': reason,
+                        'features': features
+                    }
             
             return None
             
         except Exception as e:
-            print(f"Error in heuristic override: {e}")
+            logger.exception("Error in heuristic override")
             return None
     
     def _interpret_prediction(
         self, 
         score: float, 
-        features: Dict,
-        url: str
+        flags: int,
+        hostname: str,
+        is_whitelisted: bool
     ) -> Tuple[str, float, str]:
         """Interpret prediction score and generate explanation"""
-        reasons = []
+        # Legitimate verdicts use a fixed reason, so skip the rule scan
+        if score < self.settings.suspicious_threshold:
+            return "LEGITIMATE", 1 - score, "No suspicious patterns detected"
         
-        # Parse URL for additional checks
-        try:
-            parsed = urlparse(url if url.startswith(('http://', 'https://')) else 'http://' + url)
-            hostname = parsed.hostname if parsed.hostname else ''
-        except:
-            hostname = ''
-        
-        # Analyze features to build explanation
-        if features.get('is_ip_address', 0) == 1:
-            reasons.append("IP address instead of domain name")
-        
-        if features.get('is_suspicious_tld', 0) == 1:
-            reasons.append("Suspicious top-level domain")
-        
-        # IMPROVED: Only flag long paths, not long queries
-        if features.get('long_path', 0) == 1:
-            # Check if this domain is allowed to have long URLs
-            if not self._allows_long_urls(hostname):
-                reasons.append("Unusually long URL path")
-        
-        if features.get('num_at', 0) > 0:
-            reasons.append("Contains @ symbol (redirect)")
-        
-        if features.get('subdomain_count', 0) > 4:
-            reasons.append("Excessive subdomains")
-        
-        if features.get('high_entropy', 0) == 1:
-            # Don't flag high entropy for whitelisted domains
-            if not self._is_whitelisted_domain(hostname):
-                reasons.append("High randomness in domain name")
-        
-        if features.get('is_https', 0) == 0:
-            # Only mention for non-whitelisted domains
-            if not self._is_whitelisted_domain(hostname):
-                reasons.append("No HTTPS encryption")
-        
-        if features.get('has_https_in_hostname', 0) == 1:
-            reasons.append("HTTPS in domain name (deceptive)")
-        
-        if features.get('brand_without_official_tld', 0) == 1:
-            reasons.append("Brand name in non-official domain (typosquatting)")
+        # Analyze flags to build explanation
+        if is_whitelisted:
+            flags &= ~_WHITELIST_EXEMPT
+        if flags & FLAG_LONG_PATH and self._allows_long_urls(hostname):
+            flags &= ~FLAG_LONG_PATH
+        reasons = [_FLAG_REASONS[bit] for bit in _iter_set_bits(flags)]
         
         # Determine status based on score
         if score >= self.settings.malicious_threshold:
             status = "MALICIOUS"
-            confidence = score
             if not reasons:
                 reasons.append("Multiple suspicious patterns detected")
-        elif score >= self.settings.suspicious_threshold:
+        else:
             status = "SUSPICIOUS"
-            confidence = score
             if not reasons:
                 reasons.append("Some suspicious characteristics found")
-        else:
-            status = "LEGITIMATE"
-            confidence = 1 - score
-            reasons = ["No suspicious patterns detected"]
+        confidence = score
         
         reason = "; ".join(reasons) if reasons else "Unknown"
         
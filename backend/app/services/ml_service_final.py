@@ -3,54 +3,140 @@ ML Service - ML-First Approach with Reputation Validation
 The ML model is the PRIMARY decision maker
 Reputation scoring is used for VALIDATION and CONFIDENCE ADJUSTMENT
 """
-import joblib
+import logging
 import numpy as np
-import pandas as pd
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import os
-from urllib.parse import urlparse
 from app.config import get_settings
-from app.services.feature_extractor import URLFeatureExtractorV2
-from app.services.reputation.domain_reputation import DomainReputationService
+from app.services.model_state import ModelState, get_model_state
+from app.utils.cache import LRUCache
+from app.utils.domains import parse_hostname, root_domain
+from app.services.prediction_batcher import PredictionBatcher
+
+logger = logging.getLogger(__name__)
+
+# Feature-based reasons, in report order: (feature, low, high, reason) fires
+# when low <= value <= high
+_REASON_RULES = (
+    ('is_ip_address', 1, 1, "IP address URL"),
+    ('is_suspicious_tld', 1, 1, "Suspicious TLD (.tk, .ml, etc.)"),
+    ('long_path', 1, 1, "Unusually long path"),
+    ('high_entropy', 1, 1, "Random-looking domain"),
+    ('num_at', 1, float('inf'), "Contains @ symbol"),
+    ('subdomain_count', 5, float('inf'), "Excessive subdomains"),
+    ('brand_without_official_tld', 1, 1, "Possible brand impersonation"),
+)
+_RULE_LOW = np.array([rule[1] for rule in _REASON_RULES], dtype=np.float32)
+_RULE_HIGH = np.array([rule[2] for rule in _REASON_RULES], dtype=np.float32)
+
+# Case 3 in _finalize: a low reputation scales a "legitimate" ML score by this
+_LOW_REPUTATION_BOOST = 1.3
+
+# Free hosting platforms (see the hosting platform check in _finalize)
+_HOSTING_PLATFORMS = frozenset({
+    'weeblysite.com', 'weebly.com', 'wixsite.com', 'wix.com',
+    'blogspot.com', 'wordpress.com', 'sites.google.com',
+    'github.io', 'netlify.app', 'vercel.app', 'herokuapp.com',
+    'firebaseapp.com', 'web.app', 'azurewebsites.net',
+    'squarespace.com', 'godaddysites.com', 'page.link',
+    'carrd.co', 'notion.site', 'glitch.me',
+    'myshopify.com', 'webflow.io', '000webhostapp.com',
+    'freenom.com', 'rf.gd', 'epizy.com',
+})
 
 class MLServiceFinal:
     """ML-First service with reputation validation"""
     
     def __init__(self):
         self.settings = get_settings()
+        self._state: Optional[ModelState] = None
         self.model = None
         self.feature_names = None
-        self.extractor = URLFeatureExtractorV2()
-        self.reputation_service = DomainReputationService()
+        self._feat_index: Dict[str, int] = {}
+        self._batcher: Optional[PredictionBatcher] = None
+        self._booster = None
+        self._pred_cache = LRUCache(
+            maxsize=self.settings.prediction_cache_size,
+            ttl=self.settings.prediction_cache_ttl
+        )
         
         # MINIMAL whitelist - only for critical infrastructure
         # These domains are so critical that bypassing ML is justified
-        self.critical_infrastructure = {
+        self.critical_infrastructure = frozenset({
             'localhost', '127.0.0.1', 'chrome-extension://'
-        }
+        })
         
         self.load_model()
     
     def load_model(self):
-        """Load the trained model"""
+        """Attach the shared model, extractor and reputation service"""
         try:
-            model_path = self.settings.model_path
-            features_path = self.settings.feature_names_path
-            
-            print(f" Loading ML model from: {model_path}")
-            self.model = joblib.load(model_path)
+            self._state = get_model_state()
+            self.model = self._state.model
+            self._booster = self._state.booster
+            self.feature_names = self._state.feature_names
+            self._feat_index = self._state.feature_index
+            self.extractor = self._state.extractor
+            self.reputation_service = self._state.reputation_service
             
-            print(f" Loading feature names from: {features_path}")
-            self.feature_names = joblib.load(features_path)
-            
-            print(f" ML-First Model Loaded!")
-            print(f"   Features: {len(self.feature_names)}")
-            print(f"   Strategy: ML predictions + Reputation validation")
+            logger.info(
+                "ML-First model loaded: %d features, ML predictions + reputation validation",
+                len(self.feature_names)
+            )
             
         except Exception as e:
-            print(f" Error loading model: {e}")
+            logger.exception("Error loading model")
             raise
     
+    def start_batcher(self):
+        """Route ML scoring through a shared micro-batcher (call once per worker)"""
+        if self._batcher is None:
+            self._batcher = PredictionBatcher(
+                self.score_batch,
+                max_batch_size=self.settings.batch_max_size,
+                max_wait_ms=self.settings.batch_max_wait_ms
+            )
+        self._batcher.start()
+    
+    def stop_batcher(self):
+        """Flush and stop the micro-batcher"""
+        if self._batcher is not None:
+            self._batcher.stop()
+            self._batcher = None
+    
+    def score_batch(self, features_list: List[Dict]) -> List[float]:
+        """Score many feature dicts with a single model call"""
+        return self._state.score_matrix(self._state.feature_matrix(features_list))
+    
+    def _feature_reasons(self, features: Dict) -> List[str]:
+        """Reasons fired by a single URL's features"""
+        return [
+            reason for name, low, high, reason in _REASON_RULES
+            if low <= features.get(name, 0) <= high
+        ]
+    
+    def _batch_feature_reasons(self, X: np.ndarray) -> Optional[List[List[str]]]:
+        """
+        Reasons for every row of a feature matrix, evaluated as one (N, rules)
+        mask; None if the model lacks a rule's column
+        """
+        try:
+            cols = [self._feat_index[rule[0]] for rule in _REASON_RULES]
+        except KeyError:
+            return None
+        values = X[:, cols]
+        mask = (values >= _RULE_LOW) & (values <= _RULE_HIGH)
+        return [
+            [_REASON_RULES[k][3] for k in np.flatnonzero(row)] if row.any() else []
+            for row in mask
+        ]
+    
+    def _score(self, features: Dict) -> float:
+        """Malicious probability for one URL, batched with concurrent callers"""
+        if self._batcher is not None and self._batcher.is_running():
+            return self._batcher.submit(features)
+        return self.score_batch([features])[0]
+    
     def predict(self, url: str, use_reputation: bool = True) -> Dict:
         """
         ML-FIRST PREDICTION FLOW:
@@ -60,221 +146,380 @@ class MLServiceFinal:
         3. Calculate reputation score (VALIDATION)
         4. Adjust confidence based on reputation (REFINEMENT)
         5. Return final decision with full transparency
+        
+        Repeat URLs are served from an LRU cache (see _cache_key). Cached
+        results omit the 'ml_features' dict to keep memory small; callers
+        get a fresh copy.
         """
+        key = self._cache_key(url, use_reputation)
+        cached = self._pred_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+        
+        result = self._predict_uncached(url, use_reputation)
+        self._cache_result(key, result)
+        return result
+    
+    def _predict_uncached(self, url: str, use_reputation: bool) -> Dict:
+        """Run the full prediction flow for a URL (no caching)"""
         try:
-            parsed = urlparse(url if url.startswith(('http://', 'https://')) else 'http://' + url)
-            hostname = parsed.hostname if parsed.hostname else ''
+            hostname, features, shortcut = self._prepare(url)
+            if shortcut is not None:
+                return shortcut
             
-            # Only skip for critical infrastructure
-            if hostname in self.critical_infrastructure:
-                return {
-                    'status': 'LEGITIMATE',
-                    'confidence': 1.0,
-                    'prediction_score': 0.0,
-                    'reason': 'Critical infrastructure (localhost, extensions)',
-                    'source': 'infrastructure_whitelist',
-                    'ml_used': False,
-                    'reputation_used': False
-                }
+            # Reputation needs only the hostname: start the lookup now so its
+            # network wait overlaps the model call
+            reputation_future = None
+            if use_reputation:
+                reputation_domain = self._get_root_domain(hostname)
+                reputation_future = self._state.reputation_async(reputation_domain)
             
             # ============================================================
-            # STEP 1: FEATURE EXTRACTION (YOUR ML PIPELINE)
+            # STEP 2: ML MODEL PREDICTION (CORE DECISION)
             # ============================================================
-            print(f"\n{'='*70}")
-            print(f" ML PREDICTION FOR: {url}")
-            print(f"{'='*70}")
+            # Get raw ML prediction (probability of malicious)
+            ml_score = float(self._score(features))
             
-            features = self.extractor.extract_features(url)
-            print(f"   Extracted {len(features)} features")
+            reputation_result = None
+            if reputation_future is not None:
+                if self._reputation_can_change(ml_score):
+                    reputation_result = self._state.reputation_result(
+                        reputation_domain, reputation_future
+                    )
+                else:
+                    # Confidently safe: don't wait (a lookup already running
+                    # still completes and warms the cache)
+                    reputation_future.cancel()
+                    use_reputation = False
             
-            # Show key features
-            print(f"   Key features:")
-            print(f"     - URL length: {features.get('url_length', 0)}")
-            print(f"     - Has path: {features.get('has_path', 0)}")
-            print(f"     - Is HTTPS: {features.get('is_https', 0)}")
-            print(f"     - Subdomain count: {features.get('subdomain_count', 0)}")
-            print(f"     - Is IP: {features.get('is_ip_address', 0)}")
-            print(f"     - Suspicious TLD: {features.get('is_suspicious_tld', 0)}")
+            return self._finalize(hostname, features, ml_score, use_reputation, reputation_result)
             
-            # ============================================================
-            # STEP 2: ML MODEL PREDICTION (CORE DECISION)
-            # ============================================================
-            feature_df = pd.DataFrame([features])
-            feature_df = feature_df[self.feature_names]
+        except Exception as e:
+            logger.exception("Prediction error for %s", url)
+            raise
+    
+    def predict_batch(self, urls: List[str], use_reputation: bool = True) -> List[Dict]:
+        """
+        Predict many URLs with one model call
+        
+        Features for every URL are stacked into a single (N, F) matrix and
+        scored together, and the reputation of each distinct root domain is
+        fetched concurrently before the per-URL decisions are made. Results
+        are returned in input order. URLs already in the prediction cache
+        skip all of it; a URL that cannot be parsed gets an error result
+        (status 'ERROR', with an 'error' key) without failing the others.
+        """
+        keys = [self._cache_key(url, use_reputation) for url in urls]
+        results = []
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self._pred_cache.get(key)
+            if cached is None:
+                misses.append(i)
+            results.append(None if cached is None else dict(cached))
+        
+        if misses:
+            fresh = self._predict_batch_uncached([urls[i] for i in misses], use_reputation)
+            for i, result in zip(misses, fresh):
+                if 'error' not in result:
+                    self._cache_result(keys[i], result)
+                results[i] = result
+        
+        return results
+    
+    def _predict_batch_uncached(self, urls: List[str], use_reputation: bool) -> List[Dict]:
+        """Batch prediction flow (no caching)"""
+        prepared = [self._prepare_or_error(url) for url in urls]
+        
+        to_score = [i for i, (_, _, shortcut) in enumerate(prepared) if shortcut is None]
+        ml_scores: Dict[int, float] = {}
+        feature_reasons: Dict[int, List[str]] = {}
+        if to_score:
+            X = self._state.feature_matrix([prepared[i][1] for i in to_score])
+            ml_scores = dict(zip(to_score, self._state.score_matrix(X)))
+            row_reasons = self._batch_feature_reasons(X)
+            if row_reasons is not None:
+                feature_reasons = dict(zip(to_score, row_reasons))
+        
+        # Only rows whose verdict reputation could still change need a lookup
+        needs_reputation = set()
+        if use_reputation:
+            needs_reputation = {i for i in to_score if self._reputation_can_change(ml_scores[i])}
+        reputations = {}
+        if needs_reputation:
+            reputations = self._state.lookup_reputations(
+                self._get_root_domain(prepared[i][0]) for i in needs_reputation
+            )
+        
+        results = []
+        for i, (hostname, features, shortcut) in enumerate(prepared):
+            if shortcut is not None:
+                results.append(shortcut)
+                continue
+            results.append(self._finalize(
+                hostname, features, float(ml_scores[i]), i in needs_reputation,
+                reputations.get(self._get_root_domain(hostname)),
+                feature_reasons.get(i)
+            ))
+        return results
+    
+    def _reputation_can_change(self, ml_score: float) -> bool:
+        """
+        Whether reputation could change the verdict for this ML score
+        
+        Reputation only ever lowers a score >= 0.5 (Cases 1-2) and raises a
+        score < 0.5 by at most _LOW_REPUTATION_BOOST (Case 3), so a score that
+        stays below the suspicious threshold even after the boost is
+        LEGITIMATE whatever the reputation.
+        """
+        return (
+            ml_score >= 0.5
+            or ml_score * _LOW_REPUTATION_BOOST >= self.settings.suspicious_threshold
+        )
+    
+    @staticmethod
+    def _cache_key(url: str, use_reputation: bool) -> Tuple[str, bool]:
+        """
+        Prediction cache key: the URL exactly as given. Case (e.g. the scheme
+        or an 'xn--' label), surrounding whitespace and a trailing slash all
+        change the features, so variants must not share a cached verdict.
+        """
+        return url, use_reputation
+    
+    def _cache_result(self, key: Tuple[str, bool], result: Dict) -> None:
+        self._pred_cache.set(key, {k: v for k, v in result.items() if k != 'ml_features'})
+    
+    def _prepare(self, url: str) -> Tuple[str, Optional[Dict], Optional[Dict]]:
+        """
+        Parse the URL and extract features
+        
+        Returns (hostname, features, shortcut); shortcut is a finished result
+        when the URL bypasses the model entirely.
+        """
+        hostname = parse_hostname(url)
+        
+        # Only skip for critical infrastructure
+        if hostname in self.critical_infrastructure:
+            return hostname, None, {
+                'status': 'LEGITIMATE',
+                'confidence': 1.0,
+                'prediction_score': 0.0,
+                'reason': 'Critical infrastructure (localhost, extensions)',
+                'source': 'infrastructure_whitelist',
+                'ml_used': False,
+                'reputation_used': False
+            }
+        
+        # ============================================================
+        # STEP 1: FEATURE EXTRACTION (YOUR ML PIPELINE)
+        # ============================================================
+        features = self.extractor.extract_features(url)
+        
+        # Show key features
+        logger.debug(
+            "ML prediction for %s: %d features (url_length=%s has_path=%s is_https=%s "
+            "subdomain_count=%s is_ip=%s suspicious_tld=%s)",
+            url, len(features),
+            features.get('url_length', 0), features.get('has_path', 0),
+            features.get('is_https', 0), features.get('subdomain_count', 0),
+            features.get('is_ip_address', 0), features.get('is_suspicious_tld', 0)
+        )
+        
+        return hostname, features, None
+    
+    def _prepare_or_error(self, url: str) -> Tuple[str, Optional[Dict], Optional[Dict]]:
+        """_prepare, with a URL that fails to parse or extract turned into an error shortcut"""
+        try:
+            return self._prepare(url)
+        except Exception as e:
+            logger.warning("Cannot check %s: %s", url, e)
+            return '', None, {
+                'status': 'ERROR',
+                'confidence': 0.0,
+                'prediction_score': 0.0,
+                'reason': f"Error: {str(e)}",
+                'source': 'error',
+                'ml_used': False,
+                'reputation_used': False,
+                'error': str(e)
+            }
+    
+    def _finalize(
+        self,
+        hostname: str,
+        features: Dict,
+        ml_score: float,
+        use_reputation: bool,
+        reputation_result: Optional[Dict] = None,
+        feature_reasons: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Reputation validation, confidence adjustment and final decision for a
+        scored URL (reputation_result and feature_reasons, if given, were
+        computed for the whole batch)
+        """
+        logger.debug("ML malicious probability for %s: %.4f", hostname, ml_score)
+        
+        # ============================================================
+        # STEP 3: REPUTATION SCORING (VALIDATION LAYER)
+        # ============================================================
+        reputation_score = None
+        reputation_data = None
+        
+        if use_reputation:
+            # Get root domain for reputation check
+            check_domain = self._get_root_domain(hostname)
             
-            # Get raw ML prediction
-            prediction_proba = self.model.predict_proba(feature_df)[0]
-            ml_score = float(prediction_proba[1])  # Probability of malicious
+            if reputation_result is None:
+                reputation_result = self._state.reputation(check_domain)
             
-            print(f"\n   ML Model Prediction:")
-            print(f"     - Malicious probability: {ml_score:.4f} ({ml_score*100:.2f}%)")
-            print(f"     - Legitimate probability: {1-ml_score:.4f} ({(1-ml_score)*100:.2f}%)")
+            reputation_score = reputation_result['total_score']
+            reputation_data = reputation_result
             
-            # ============================================================
-            # STEP 3: REPUTATION SCORING (VALIDATION LAYER)
-            # ============================================================
-            reputation_score = None
-            reputation_data = None
+            logger.debug(
+                "Reputation for %s: %s/100 (%s)",
+                check_domain, reputation_score, reputation_result['trust_level']
+            )
+        
+        # ============================================================
+        # STEP 4: INTELLIGENT CONFIDENCE ADJUSTMENT
+        # ============================================================
+        final_score = ml_score
+        adjustment_reason = None
+        
+        if reputation_score is not None:
+            # Compute structural innocence score: features that suggest legitimacy
+            is_https = features.get('is_https', 0) == 1
+            is_ip = features.get('is_ip_address', 0) == 1
+            sus_tld = features.get('is_suspicious_tld', 0) == 1
+            has_at = features.get('num_at', 0) > 0
             
-            if use_reputation:
-                print(f"\n   Reputation Validation:")
-                
-                # Get root domain for reputation check
-                check_domain = self._get_root_domain(hostname)
-                
-                reputation_result = self.reputation_service.calculate_reputation_score(
-                    f"https://{check_domain}"
-                )
-                
-                reputation_score = reputation_result['total_score']
-                reputation_data = reputation_result
-                
-                print(f"     - Reputation score: {reputation_score}/100")
-                print(f"     - Trust level: {reputation_result['trust_level']}")
+            # A URL with HTTPS, no IP, no suspicious TLD, no @ is structurally benign
+            structural_innocence = sum([is_https, not is_ip, not sus_tld, not has_at])
             
-            # ============================================================
-            # STEP 4: INTELLIGENT CONFIDENCE ADJUSTMENT
-            # ============================================================
-            final_score = ml_score
-            adjustment_reason = None
+            # ---- HOSTING PLATFORM CHECK ----
+            # When a URL is on a free hosting platform, the reputation belongs
+            # to the HOSTING PROVIDER, not the content. Phishers exploit this.
+            # Trust the ML model's judgment in these cases.
+            root_domain = self._get_root_domain(hostname)
+            is_hosting_platform = self._is_hosting_platform(hostname, root_domain)
             
-            if reputation_score is not None:
-                print(f"\n    Confidence Adjustment:")
-                
-                # Compute structural innocence score: features that suggest legitimacy
-                is_https = features.get('is_https', 0) == 1
-                is_ip = features.get('is_ip_address', 0) == 1
-                sus_tld = features.get('is_suspicious_tld', 0) == 1
-                has_at = features.get('num_at', 0) > 0
-                
-                # A URL with HTTPS, no IP, no suspicious TLD, no @ is structurally benign
-                structural_innocence = sum([is_https, not is_ip, not sus_tld, not has_at])
-                
-                # ---- HOSTING PLATFORM CHECK ----
-                # When a URL is on a free hosting platform, the reputation belongs
-                # to the HOSTING PROVIDER, not the content. Phishers exploit this.
-                # Trust the ML model's judgment in these cases.
-                HOSTING_PLATFORMS = [
-                    'weeblysite.com', 'weebly.com', 'wixsite.com', 'wix.com',
-                    'blogspot.com', 'wordpress.com', 'sites.google.com',
-                    'github.io', 'netlify.app', 'vercel.app', 'herokuapp.com',
-                    'firebaseapp.com', 'web.app', 'azurewebsites.net',
-                    'squarespace.com', 'godaddysites.com', 'page.link',
-                    'carrd.co', 'notion.site', 'glitch.me',
-                    'myshopify.com', 'webflow.io', '000webhostapp.com',
-                    'freenom.com', 'rf.gd', 'epizy.com',
-                ]
-                
-                root_domain = self._get_root_domain(hostname)
-                is_hosting_platform = any(
-                    hostname.endswith('.' + hp) or root_domain == hp 
-                    for hp in HOSTING_PLATFORMS
+            if is_hosting_platform and ml_score >= 0.5:
+                # Don't let the hosting platform's reputation override ML
+                logger.debug(
+                    "Hosting platform %s: ML score %.3f trusted as-is (no reputation override)",
+                    root_domain, ml_score
                 )
+                adjustment_reason = f"Hosting platform ({root_domain}): ML score trusted, reputation ({reputation_score}/100) ignored"
+            
+            # Case 1: ML says MALICIOUS but reputation is HIGH
+            elif ml_score >= 0.5 and reputation_score >= 70:
+                # Graduate factor based on how high the reputation is
+                # Rep 70 → factor 0.30, Rep 80 → 0.20, Rep 90+ → 0.10
+                base_factor = max(0.10, 0.50 - (reputation_score / 200))
                 
-                if is_hosting_platform and ml_score >= 0.5:
-                    # Don't let the hosting platform's reputation override ML
-                    print(f"      HOSTING PLATFORM: {root_domain} — reputation reflects the platform, not content")
-                    print(f"      ML score {ml_score:.3f} trusted as-is (no reputation override)")
-                    adjustment_reason = f"Hosting platform ({root_domain}): ML score trusted, reputation ({reputation_score}/100) ignored"
-                
-                # Case 1: ML says MALICIOUS but reputation is HIGH
-                elif ml_score >= 0.5 and reputation_score >= 70:
-                    # Graduate factor based on how high the reputation is
-                    # Rep 70 → factor 0.30, Rep 80 → 0.20, Rep 90+ → 0.10
-                    base_factor = max(0.10, 0.50 - (reputation_score / 200))
-                    
-                    # Extra reduction if the URL is structurally clean
-                    if structural_innocence >= 3:
-                        base_factor *= 0.5  # Halve it — probably a false positive
-                    
-                    final_score = ml_score * base_factor
-                    adjustment_reason = (
-                        f"High reputation ({reputation_score}/100) overrides ML "
-                        f"(struct_clean={structural_innocence}/4, factor={base_factor:.2f})"
-                    )
-                    print(f"       CONFLICT: ML={ml_score:.3f} but Reputation={reputation_score}/100")
-                    print(f"       Structural innocence: {structural_innocence}/4")
-                    print(f"     → Adjusted: {ml_score:.3f} → {final_score:.3f} (factor: {base_factor:.2f})")
-                
-                # Case 2: ML says MALICIOUS and reputation is MEDIUM
-                elif ml_score >= 0.5 and 40 <= reputation_score < 70:
-                    adjustment_factor = 0.6
-                    if structural_innocence >= 3:
-                        adjustment_factor = 0.45
-                    final_score = ml_score * adjustment_factor
-                    adjustment_reason = f"Moderate reputation ({reputation_score}/100) suggests reconsideration"
-                    print(f"      MODERATE: ML={ml_score:.3f}, Reputation={reputation_score}/100")
-                    print(f"     → Adjusted: {ml_score:.3f} → {final_score:.3f} (factor: {adjustment_factor})")
-                
-                # Case 3: ML says LEGITIMATE but reputation is LOW
-                elif ml_score < 0.5 and reputation_score < 30:
-                    adjustment_factor = 1.3
-                    final_score = min(ml_score * adjustment_factor, 0.45)
-                    adjustment_reason = f"Low reputation ({reputation_score}/100) raises concern"
-                    print(f"       CONCERN: ML={ml_score:.3f} (safe) but Reputation={reputation_score}/100 (low)")
-                    print(f"     → Adjusted: {ml_score:.3f} → {final_score:.3f} (factor: {adjustment_factor})")
+                # Extra reduction if the URL is structurally clean
+                if structural_innocence >= 3:
+                    base_factor *= 0.5  # Halve it — probably a false positive
                 
-                # Case 4: ML and Reputation agree
-                else:
-                    adjustment_reason = f"ML and reputation align (rep: {reputation_score}/100)"
-                    print(f"      ALIGNED: ML={ml_score:.3f}, Reputation={reputation_score}/100")
-                    print(f"     → No adjustment needed")
+                final_score = ml_score * base_factor
+                adjustment_reason = (
+                    f"High reputation ({reputation_score}/100) overrides ML "
+                    f"(struct_clean={structural_innocence}/4, factor={base_factor:.2f})"
+                )
+                logger.debug(
+                    "Conflict: ML=%.3f but reputation=%s/100, structural innocence %d/4, "
+                    "adjusted %.3f -> %.3f (factor %.2f)",
+                    ml_score, reputation_score, structural_innocence,
+                    ml_score, final_score, base_factor
+                )
             
-            # ============================================================
-            # STEP 5: FINAL DECISION
-            # ============================================================
-            status, confidence, reason = self._interpret_prediction(
-                final_score,
-                ml_score,
-                features,
-                hostname,
-                reputation_score,
-                adjustment_reason
-            )
+            # Case 2: ML says MALICIOUS and reputation is MEDIUM
+            elif ml_score >= 0.5 and 40 <= reputation_score < 70:
+                adjustment_factor = 0.6
+                if structural_innocence >= 3:
+                    adjustment_factor = 0.45
+                final_score = ml_score * adjustment_factor
+                adjustment_reason = f"Moderate reputation ({reputation_score}/100) suggests reconsideration"
+                logger.debug(
+                    "Moderate: ML=%.3f, reputation=%s/100, adjusted %.3f -> %.3f (factor %s)",
+                    ml_score, reputation_score, ml_score, final_score, adjustment_factor
+                )
             
-            print(f"\n   FINAL DECISION:")
-            print(f"     Status: {status}")
-            print(f"     Confidence: {confidence:.4f} ({confidence*100:.2f}%)")
-            print(f"     Reason: {reason}")
-            print(f"{'='*70}\n")
+            # Case 3: ML says LEGITIMATE but reputation is LOW
+            elif ml_score < 0.5 and reputation_score < 30:
+                adjustment_factor = _LOW_REPUTATION_BOOST
+                final_score = min(ml_score * adjustment_factor, 0.45)
+                adjustment_reason = f"Low reputation ({reputation_score}/100) raises concern"
+                logger.debug(
+                    "Concern: ML=%.3f (safe) but reputation=%s/100 (low), adjusted %.3f -> %.3f (factor %s)",
+                    ml_score, reputation_score, ml_score, final_score, adjustment_factor
+                )
             
-            # ============================================================
-            # RETURN FULL TRANSPARENCY
-            # ============================================================
-            result = {
-                'status': status,
-                'confidence': confidence,
-                'prediction_score': final_score,
-                'ml_raw_score': ml_score,
-                'ml_features': features,
-                'reputation_score': reputation_score,
-                'reputation_data': reputation_data,
-                'adjustment_applied': adjustment_reason,
-                'reason': reason,
-                'source': 'ml_with_reputation_validation' if use_reputation else 'ml_only',
-                'ml_used': True,
-                'reputation_used': use_reputation,
-                'hostname': hostname,
-                'transparency': {
-                    'ml_predicted': 'malicious' if ml_score >= 0.5 else 'legitimate',
-                    'ml_confidence': ml_score if ml_score >= 0.5 else 1 - ml_score,
-                    'reputation_influenced': adjustment_reason is not None,
-                    'final_override': final_score != ml_score
-                }
+            # Case 4: ML and Reputation agree
+            else:
+                adjustment_reason = f"ML and reputation align (rep: {reputation_score}/100)"
+                logger.debug(
+                    "Aligned: ML=%.3f, reputation=%s/100, no adjustment needed",
+                    ml_score, reputation_score
+                )
+        
+        # ============================================================
+        # STEP 5: FINAL DECISION
+        # ============================================================
+        status, confidence, reason = self._interpret_prediction(
+            final_score,
+            ml_score,
+            features,
+            hostname,
+            reputation_score,
+            adjustment_reason,
+            feature_reasons
+        )
+        
+        logger.debug(
+            "Final decision for %s: %s (confidence %.4f) - %s",
+            hostname, status, confidence, reason
+        )
+        
+        # ============================================================
+        # RETURN FULL TRANSPARENCY
+        # ============================================================
+        result = {
+            'status': status,
+            'confidence': confidence,
+            'prediction_score': final_score,
+            'ml_raw_score': ml_score,
+            'ml_features': features,
+            'reputation_score': reputation_score,
+            'reputation_data': reputation_data,
+            'adjustment_applied': adjustment_reason,
+            'reason': reason,
+            'source': 'ml_with_reputation_validation' if use_reputation else 'ml_only',
+            'ml_used': True,
+            'reputation_used': use_reputation,
+            'hostname': hostname,
+            'transparency': {
+                'ml_predicted': 'malicious' if ml_score >= 0.5 else 'legitimate',
+                'ml_confidence': ml_score if ml_score >= 0.5 else 1 - ml_score,
+                'reputation_influenced': adjustment_reason is not None,
+                'final_override': final_score != ml_score
             }
-            
-            return result
-            
-        except Exception as e:
-            print(f" Prediction error for {url}: {e}")
-            raise
+        }
+        
+        return result
+    
+    @staticmethod
+    def _is_hosting_platform(hostname: str, root_domain: str) -> bool:
+        """Whether hostname is a site on (a subdomain of) a free hosting platform"""
+        if root_domain in _HOSTING_PLATFORMS:
+            return True
+        parts = hostname.split('.')
+        return any('.'.join(parts[i:]) in _HOSTING_PLATFORMS for i in range(1, len(parts)))
     
     def _get_root_domain(self, hostname: str) -> str:
         """Extract root domain from hostname"""
-        parts = hostname.split('.')
-        if len(parts) >= 2:
-            return '.'.join(parts[-2:])
-        return hostname
+        return root_domain(hostname)
     
     def _interpret_prediction(
         self, 
@@ -283,32 +528,12 @@ class MLServiceFinal:
         features: Dict,
         hostname: str,
         reputation_score: Optional[int],
-        adjustment_reason: Optional[str]
+        adjustment_reason: Optional[str],
+        feature_reasons: Optional[List[str]] = None
     ) -> Tuple[str, float, str]:
         """Interpret final prediction score"""
-        reasons = []
-        
         # Add ML-based reasons (from features)
-        if features.get('is_ip_address', 0) == 1:
-            reasons.append("IP address URL")
-        
-        if features.get('is_suspicious_tld', 0) == 1:
-            reasons.append("Suspicious TLD (.tk, .ml, etc.)")
-        
-        if features.get('long_path', 0) == 1:
-            reasons.append("Unusually long path")
-        
-        if features.get('high_entropy', 0) == 1:
-            reasons.append("Random-looking domain")
-        
-        if features.get('num_at', 0) > 0:
-            reasons.append("Contains @ symbol")
-        
-        if features.get('subdomain_count', 0) > 4:
-            reasons.append("Excessive subdomains")
-        
-        if features.get('brand_without_official_tld', 0) == 1:
-            reasons.append("Possible brand impersonation")
+        reasons = feature_reasons if feature_reasons is not None else self._feature_reasons(features)
         
         # Add adjustment reason if applied
         if adjustment_reason:
@@ -1,28 +1,28 @@
 """
 ML Model Service V3 - Fixed for Subdomains
 """
-import joblib
-import numpy as np
-import pandas as pd
-from typing import Dict, Tuple, Optional
+import logging
+from typing import Dict, List, Tuple, Optional
 import os
-from urllib.parse import urlparse
 from app.config import get_settings
-from app.services.feature_extractor import URLFeatureExtractorV2
-from app.services.reputation.domain_reputation import DomainReputationService
+from app.services.model_state import ModelState, get_model_state
+from app.utils.domains import parse_hostname, root_domain
+
+logger = logging.getLogger(__name__)
 
 class MLServiceV3:
     """Enhanced ML service with reputation scoring"""
     
     def __init__(self):
         self.settings = get_settings()
+        self._state: Optional[ModelState] = None
         self.model = None
         self.feature_names = None
-        self.extractor = URLFeatureExtractorV2()
-        self.reputation_service = DomainReputationService()
+        self._feat_index: Dict[str, int] = {}
+        self._booster = None
         
         # EXPANDED: Include all major brand domains and their subdomains
-        self.core_safe_domains = {
+        self.core_safe_domains = frozenset({
             # Google ecosystem
             'google.com', 'youtube.com', 'gmail.com', 'google.co.in',
             'google.co.uk', 'googleblog.com', 'gstatic.com', 'googleapis.com',
@@ -41,52 +41,46 @@ class MLServiceV3:
             'apple.com', 'icloud.com', 'amazon.com', 'netflix.com',
             'linkedin.com', 'reddit.com', 'pinterest.com', 'tumblr.com',
             'cloudflare.com', 'mozilla.org', 'wikipedia.org'
-        }
+        })
         
         # Trusted parent domains (for subdomain checking)
-        self.trusted_parent_domains = {
+        self.trusted_parent_domains = frozenset({
             'google', 'microsoft', 'apple', 'amazon', 'facebook',
             'meta', 'twitter', 'github', 'cloudflare', 'netflix'
-        }
+        })
         
         self.load_model()
     
     def load_model(self):
-        """Load the trained model"""
+        """Attach the shared model, extractor and reputation service"""
         try:
-            model_path = self.settings.model_path
-            features_path = self.settings.feature_names_path
-            
-            print(f" Loading V2 model from: {model_path}")
-            self.model = joblib.load(model_path)
+            self._state = get_model_state()
+            self.model = self._state.model
+            self._booster = self._state.booster
+            self.feature_names = self._state.feature_names
+            self._feat_index = self._state.feature_index
+            self.extractor = self._state.extractor
+            self.reputation_service = self._state.reputation_service
             
-            print(f" Loading feature names from: {features_path}")
-            self.feature_names = joblib.load(features_path)
-            
-            print(f" Model V3 loaded with reputation scoring!")
-            print(f"   ML Features: {len(self.feature_names)}")
+            logger.info("Model V3 loaded with reputation scoring (%d features)", len(self.feature_names))
             
         except Exception as e:
-            print(f" Error loading model: {e}")
+            logger.exception("Error loading model")
             raise
     
     def _get_root_domain(self, hostname: str) -> str:
         """Extract root domain from hostname"""
-        parts = hostname.split('.')
-        if len(parts) >= 2:
-            # Get last two parts (e.g., google.com from mail.google.com)
-            return '.'.join(parts[-2:])
-        return hostname
+        return root_domain(hostname)
     
     def _is_trusted_subdomain(self, hostname: str) -> bool:
         """Check if this is a subdomain of a trusted parent"""
-        hostname_lower = hostname.lower()
-        
-        # Check if any trusted parent domain is in the hostname
-        for parent in self.trusted_parent_domains:
-            if f'.{parent}.' in hostname_lower or hostname_lower.startswith(f'{parent}.'):
-                print(f"   Trusted subdomain of {parent}")
-                return True
+        # A trusted parent may appear as any label except the TLD
+        # (e.g. accounts.google.co.in, google.example.com)
+        labels = hostname.lower().split('.')[:-1]
+        parent = self.trusted_parent_domains.intersection(labels)
+        if parent:
+            logger.debug("%s is a trusted subdomain of %s", hostname, next(iter(parent)))
+            return True
         
         return False
     
@@ -98,9 +92,11 @@ class MLServiceV3:
         if hostname_lower in self.core_safe_domains:
             return True
         
-        # Subdomain match
-        for safe_domain in self.core_safe_domains:
-            if hostname_lower.endswith('.' + safe_domain):
+        # Subdomain match: look up each parent suffix of the hostname
+        # (one set lookup per dot instead of an endswith per safe domain)
+        parts = hostname_lower.split('.')
+        for i in range(1, len(parts)):
+            if '.'.join(parts[i:]) in self.core_safe_domains:
                 return True
         
         # Check trusted subdomains
@@ -114,122 +110,188 @@ class MLServiceV3:
         Predict if URL is malicious using ML + Reputation
         """
         try:
-            parsed = urlparse(url if url.startswith(('http://', 'https://')) else 'http://' + url)
-            hostname = parsed.hostname if parsed.hostname else ''
-            
-            # Step 1: Check core safe domains (including subdomains)
-            if self._is_core_safe_domain(hostname):
-                return {
-                    'status': 'LEGITIMATE',
-                    'confidence': 0.99,
-                    'prediction_score': 0.01,
-                    'reason': 'Core trusted domain or subdomain',
-                    'source': 'whitelist',
-                    'reputation_used': False,
-                    'hostname': hostname
-                }
-            
-            # Step 2: Extract ML features
-            features = self.extractor.extract_features(url)
+            hostname, features, shortcut = self._prepare(url)
+            if shortcut is not None:
+                return shortcut
             
-            # Critical threat patterns (always block)
-            if features.get('is_ip_address', 0) == 1:
-                return {
-                    'status': 'MALICIOUS',
-                    'confidence': 0.95,
-                    'prediction_score': 0.95,
-                    'reason': 'IP address instead of domain name',
-                    'source': 'heuristic',
-                    'reputation_used': False
-                }
-            
-            if features.get('is_suspicious_tld', 0) == 1:
-                return {
-                    'status': 'MALICIOUS',
-                    'confidence': 0.85,
-                    'prediction_score': 0.85,
-                    'reason': 'Suspicious top-level domain',
-                    'source': 'heuristic',
-                    'reputation_used': False
-                }
-            
-            # Step 3: Reputation scoring (if enabled)
-            reputation_score = None
+            # Step 3: Reputation scoring (if enabled), started first so its
+            # network wait overlaps the model call
+            reputation_future = None
             if use_reputation:
-                print(f"\n{'='*60}")
-                
-                # For subdomains, check the root domain
-                check_domain = hostname
-                if hostname.count('.') > 1:
-                    root_domain = self._get_root_domain(hostname)
-                    print(f"   Subdomain detected, checking root: {root_domain}")
-                    check_domain = root_domain
-                
-                reputation_result = self.reputation_service.calculate_reputation_score(f"https://{check_domain}")
-                print(f"{'='*60}\n")
-                
-                reputation_score = reputation_result['total_score']
-                
-                # High reputation = likely safe
-                if reputation_score >= 70:
-                    return {
-                        'status': 'LEGITIMATE',
-                        'confidence': reputation_score / 100,
-                        'prediction_score': 1 - (reputation_score / 100),
-                        'reason': reputation_result['recommendation'],
-                        'source': 'reputation',
-                        'reputation_score': reputation_score,
-                        'reputation_breakdown': reputation_result['breakdown'],
-                        'reputation_used': True
-                    }
+                reputation_domain = self._reputation_domain(hostname)
+                reputation_future = self._state.reputation_async(reputation_domain)
             
             # Step 4: ML Prediction
-            feature_df = pd.DataFrame([features])
-            feature_df = feature_df[self.feature_names]
+            ml_score = self.score_batch([features])[0]
             
-            prediction_proba = self.model.predict_proba(feature_df)[0]
-            ml_score = float(prediction_proba[1])
-            
-            # Step 5: Adjust ML prediction based on reputation
-            final_score = ml_score
-            confidence_adjustment = 1.0
+            # High reputation decides the URL outright
+            reputation_score = None
+            if reputation_future is not None:
+                reputation_score, shortcut = self._check_reputation(
+                    self._state.reputation_result(reputation_domain, reputation_future)
+                )
+                if shortcut is not None:
+                    return shortcut
             
-            if reputation_score is not None:
-                # If reputation is moderate-high, reduce ML confidence in malicious prediction
-                if reputation_score >= 50 and ml_score >= 0.5:
-                    confidence_adjustment = 0.6  # Stronger adjustment
-                    final_score = ml_score * confidence_adjustment
-                    print(f"   ML confidence adjusted by reputation: {ml_score:.3f} → {final_score:.3f}")
-                elif reputation_score >= 40 and ml_score >= 0.5:
-                    confidence_adjustment = 0.75
-                    final_score = ml_score * confidence_adjustment
-                    print(f"   ML confidence adjusted by reputation: {ml_score:.3f} → {final_score:.3f}")
+            return self._finalize(hostname, features, ml_score, reputation_score, use_reputation)
             
-            # Step 6: Determine final status
-            status, confidence, reason = self._interpret_prediction(
-                final_score,
-                features,
-                hostname,
-                reputation_score
+        except Exception as e:
+            logger.exception("Prediction error for %s", url)
+            raise
+    
+    def predict_batch(self, urls: List[str], use_reputation: bool = True) -> List[Dict]:
+        """
+        Predict many URLs with one model call
+        
+        Whitelist and heuristic checks run per URL as in predict(), the
+        reputation of each distinct domain is fetched concurrently, and the
+        URLs that still need the model are stacked into a single (N, F)
+        matrix and scored together. Results are returned in input order.
+        """
+        prepared = [self._prepare(url) for url in urls]
+        results: List[Optional[Dict]] = [shortcut for _, _, shortcut in prepared]
+        reputation_scores: Dict[int, Optional[int]] = {}
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        if use_reputation and pending:
+            reputations = self._state.lookup_reputations(
+                self._reputation_domain(prepared[i][0]) for i in pending
             )
-            
-            result = {
-                'status': status,
-                'confidence': confidence,
-                'prediction_score': final_score,
-                'ml_raw_score': ml_score,
-                'reason': reason,
-                'source': 'ml_with_reputation' if reputation_score else 'ml_only',
-                'reputation_score': reputation_score,
-                'reputation_used': use_reputation,
+            for i in pending:
+                reputation_result = reputations[self._reputation_domain(prepared[i][0])]
+                reputation_scores[i], results[i] = self._check_reputation(reputation_result)
+        
+        to_score = [i for i in pending if results[i] is None]
+        scores = self.score_batch([prepared[i][1] for i in to_score]) if to_score else []
+        for i, ml_score in zip(to_score, scores):
+            hostname, features, _ = prepared[i]
+            results[i] = self._finalize(
+                hostname, features, ml_score, reputation_scores.get(i), use_reputation
+            )
+        return results
+    
+    def score_batch(self, features_list: List[Dict]) -> List[float]:
+        """Score many feature dicts with a single model call"""
+        return self._state.score_matrix(self._state.feature_matrix(features_list))
+    
+    def _prepare(self, url: str) -> Tuple[str, Optional[Dict], Optional[Dict]]:
+        """
+        Parse the URL, check the whitelist and extract features
+        
+        Returns (hostname, features, shortcut); shortcut is a finished result
+        when the URL is decided without reputation or the model.
+        """
+        hostname = parse_hostname(url)
+        
+        # Step 1: Check core safe domains (including subdomains)
+        if self._is_core_safe_domain(hostname):
+            return hostname, None, {
+                'status': 'LEGITIMATE',
+                'confidence': 0.99,
+                'prediction_score': 0.01,
+                'reason': 'Core trusted domain or subdomain',
+                'source': 'whitelist',
+                'reputation_used': False,
                 'hostname': hostname
             }
-            
-            return result
-            
-        except Exception as e:
-            print(f" Prediction error for {url}: {e}")
-            raise
+        
+        # Step 2: Extract ML features
+        features = self.extractor.extract_features(url)
+        
+        # Critical threat patterns (always block)
+        if features.get('is_ip_address', 0) == 1:
+            return hostname, features, {
+                'status': 'MALICIOUS',
+                'confidence': 0.95,
+                'prediction_score': 0.95,
+                'reason': 'IP address instead of domain name',
+                'source': 'heuristic',
+                'reputation_used': False
+            }
+        
+        if features.get('is_suspicious_tld', 0) == 1:
+            return hostname, features, {
+                'status': 'MALICIOUS',
+                'confidence': 0.85,
+                'prediction_score': 0.85,
+                'reason': 'Suspicious top-level domain',
+                'source': 'heuristic',
+                'reputation_used': False
+            }
+        
+        return hostname, features, None
+    
+    def _reputation_domain(self, hostname: str) -> str:
+        """Domain whose reputation is checked (the root domain for subdomains)"""
+        if hostname.count('.') > 1:
+            root_domain = self._get_root_domain(hostname)
+            logger.debug("Subdomain detected, checking root: %s", root_domain)
+            return root_domain
+        return hostname
+    
+    def _check_reputation(self, reputation_result: Dict) -> Tuple[int, Optional[Dict]]:
+        """Returns (reputation_score, shortcut); high reputation decides the URL outright"""
+        reputation_score = reputation_result['total_score']
+        
+        # High reputation = likely safe
+        if reputation_score >= 70:
+            return reputation_score, {
+                'status': 'LEGITIMATE',
+                'confidence': reputation_score / 100,
+                'prediction_score': 1 - (reputation_score / 100),
+                'reason': reputation_result['recommendation'],
+                'source': 'reputation',
+                'reputation_score': reputation_score,
+                'reputation_breakdown': reputation_result['breakdown'],
+                'reputation_used': True
+            }
+        return reputation_score, None
+    
+    def _finalize(
+        self,
+        hostname: str,
+        features: Dict,
+        ml_score: float,
+        reputation_score: Optional[int],
+        use_reputation: bool
+    ) -> Dict:
+        """Reputation adjustment and final decision for a scored URL"""
+        # Step 5: Adjust ML prediction based on reputation
+        final_score = ml_score
+        confidence_adjustment = 1.0
+        
+        if reputation_score is not None:
+            # If reputation is moderate-high, reduce ML confidence in malicious prediction
+            if reputation_score >= 50 and ml_score >= 0.5:
+                confidence_adjustment = 0.6  # Stronger adjustment
+                final_score = ml_score * confidence_adjustment
+                logger.debug("ML confidence adjusted by reputation: %.3f -> %.3f", ml_score, final_score)
+            elif reputation_score >= 40 and ml_score >= 0.5:
+                confidence_adjustment = 0.75
+                final_score = ml_score * confidence_adjustment
+                logger.debug("ML confidence adjusted by reputation: %.3f -> %.3f", ml_score, final_score)
+        
+        # Step 6: Determine final status
+        status, confidence, reason = self._interpret_prediction(
+            final_score,
+            features,
+            hostname,
+            reputation_score
+        )
+        
+        result = {
+            'status': status,
+            'confidence': confidence,
+            'prediction_score': final_score,
+            'ml_raw_score': ml_score,
+            'reason': reason,
+            'source': 'ml_with_reputation' if reputation_score else 'ml_only',
+            'reputation_score': reputation_score,
+            'reputation_used': use_reputation,
+            'hostname': hostname
+        }
+        
+        return result
     
     def _interpret_prediction(
         self, 
@@ -0,0 +1,70 @@
+"""
+Model Loader - Loads the XGBoost classifier and its feature names
+
+Prefers XGBoost's native UBJSON/JSON model format, which is parsed straight
+into the C++ Booster (faster, smaller, and stable across XGBoost versions).
+Legacy joblib pickles are still accepted, and if a configured native file
+is missing the loader falls back to the .pkl sibling trained by older
+scripts.
+"""
+import json
+import logging
+import os
+from typing import Dict, Tuple
+
+import joblib
+from xgboost import XGBClassifier
+
+logger = logging.getLogger(__name__)
+
+NATIVE_MODEL_EXTENSIONS = ('.ubj', '.json')
+
+
+def _resolve(path: str) -> str:
+    """Return path, or its legacy .pkl sibling if only that exists"""
+    if os.path.exists(path):
+        return path
+    legacy = os.path.splitext(path)[0] + '.pkl'
+    if os.path.exists(legacy):
+        logger.info("%s not found, falling back to %s", path, legacy)
+        return legacy
+    return path
+
+
+def load_xgb_model(path: str) -> XGBClassifier:
+    """Load an XGBClassifier from a .ubj/.json model file or a joblib pickle"""
+    path = _resolve(path)
+    if path.endswith(NATIVE_MODEL_EXTENSIONS):
+        model = XGBClassifier()
+        model.load_model(path)
+        return model
+    return joblib.load(path)
+
+
+# Canonical URL used to check that the extractor covers every model feature
+_PROBE_URL = "https://login.example.com/account/verify?id=1"
+
+
+def load_feature_names(path: str) -> Tuple[str, ...]:
+    """Load the model's feature column order (immutable) from JSON or a joblib pickle"""
+    path = _resolve(path)
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            return tuple(json.load(f))
+    return tuple(joblib.load(path))
+
+
+def feature_index(feature_names: Tuple[str, ...]) -> Dict[str, int]:
+    """Map each feature name to its model column"""
+    return {name: i for i, name in enumerate(feature_names)}
+
+
+def validate_feature_names(extractor, feature_names: Tuple[str, ...]) -> None:
+    """
+    Check once, at load time, that the extractor produces every feature the
+    model expects, so predictions never silently score a missing column as 0
+    """
+    produced = extractor.extract_features(_PROBE_URL)
+    missing = [name for name in feature_names if name not in produced]
+    if missing:
+        raise ValueError(f"Feature extractor does not produce model features: {missing}")
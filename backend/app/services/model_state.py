@@ -0,0 +1,172 @@
+"""
+Model State - Classifier and helpers shared by the ML services
+
+MLService, MLServiceFinal and MLServiceV3 all score with the same XGBoost
+model, feature extractor and reputation service. They are loaded once per
+process here and every service holds a reference, so running more than
+one service never duplicates the model, the reputation cache or its
+lookup threads.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from xgboost import Booster, XGBClassifier
+
+from app.config import get_settings
+from app.services.feature_extractor import URLFeatureExtractorV2
+from app.services.model_loader import (
+    load_xgb_model, load_feature_names, feature_index, validate_feature_names
+)
+from app.services.reputation.domain_reputation import DomainReputationService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelState:
+    """Loaded classifier, feature layout and reputation plumbing"""
+    model: XGBClassifier
+    booster: Booster
+    feature_names: Tuple[str, ...]
+    feature_index: Dict[str, int]
+    feature_getter: Callable[[Dict], Tuple]
+    extractor: URLFeatureExtractorV2
+    reputation_service: DomainReputationService
+    rep_pool: ThreadPoolExecutor
+    reputation_timeout: float
+
+    def feature_matrix(self, features_list: List[Dict]) -> np.ndarray:
+        """Stack feature dicts into an (N, F) float32 matrix in model column order"""
+        try:
+            rows = [self.feature_getter(features) for features in features_list]
+            return np.array(rows, dtype=np.float32).reshape(len(features_list), len(self.feature_names))
+        except KeyError:
+            pass
+
+        # Some dict lacks a model feature: fill what is present, rest stay 0
+        X = np.zeros((len(features_list), len(self.feature_index)), dtype=np.float32)
+        for i, features in enumerate(features_list):
+            for name, value in features.items():
+                j = self.feature_index.get(name)
+                if j is not None:
+                    X[i, j] = value
+        return X
+
+    def score_matrix(self, X: np.ndarray) -> List[float]:
+        """Malicious probability per row"""
+        # binary:logistic returns P(malicious) per row directly
+        return self.booster.inplace_predict(X).tolist()
+
+    def reputation(self, domain: str) -> Dict:
+        """Reputation for a domain (cached per hostname by the reputation service)"""
+        return self.reputation_service.hostname_score(domain)
+
+    def reputation_async(self, domain: str) -> Future:
+        """Start a reputation lookup on the shared pool (cache hits complete immediately)"""
+        cached = self.reputation_service.cached_score(domain)
+        if cached is not None:
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+        return self.rep_pool.submit(self.reputation, domain)
+
+    def reputation_result(self, domain: str, future: Future, timeout: Optional[float] = None) -> Dict:
+        """
+        Result of a reputation_async future, waiting at most timeout seconds
+        (default reputation_timeout); a late lookup is reported as an error
+        result (and so not cached)
+        """
+        try:
+            return future.result(timeout=self.reputation_timeout if timeout is None else timeout)
+        except FuturesTimeout:
+            logger.warning("Reputation lookup timed out for %s", domain)
+            return self.reputation_service._get_default_score("Reputation lookup timed out")
+
+    def lookup_reputations(self, domains: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Reputation for many domains at once
+
+        Lookups are network-bound (WHOIS, DNS, SSL), so each distinct domain
+        is fetched on the shared reputation pool and the waits overlap. A
+        lookup that exceeds the timeout is reported as an error result (and
+        so not cached). The timeout bounds the whole call, not each lookup.
+        """
+        futures = {domain: self.reputation_async(domain) for domain in set(domains)}
+        deadline = time.monotonic() + self.reputation_timeout
+        results = {}
+        for domain, future in futures.items():
+            results[domain] = self.reputation_result(
+                domain, future, max(0.0, deadline - time.monotonic())
+            )
+        return results
+
+
+def row_getter(feature_names: Tuple[str, ...]) -> Callable[[Dict], Tuple]:
+    """
+    Callable returning a feature dict's values as a tuple in model column
+    order, in one C-level call (raises KeyError if a feature is missing)
+    """
+    getter = itemgetter(*feature_names)
+    if len(feature_names) == 1:
+        return lambda features: (getter(features),)
+    return getter
+
+
+_WARMUP_URL = "https://www.example.com/index.html"
+
+
+def load_model_state() -> ModelState:
+    """Load the classifier and build the shared helpers"""
+    settings = get_settings()
+
+    logger.info("Loading ML model from: %s", settings.model_path)
+    model = load_xgb_model(settings.model_path)
+    # Score through the raw Booster: skips sklearn validation and DMatrix setup
+    booster = model.get_booster()
+    booster.set_param({'nthread': settings.model_nthread})
+
+    logger.info("Loading feature names from: %s", settings.feature_names_path)
+    feature_names = load_feature_names(settings.feature_names_path)
+    extractor = URLFeatureExtractorV2()
+    validate_feature_names(extractor, feature_names)
+
+    state = ModelState(
+        model=model,
+        booster=booster,
+        feature_names=feature_names,
+        feature_index=feature_index(feature_names),
+        feature_getter=row_getter(feature_names),
+        extractor=extractor,
+        reputation_service=DomainReputationService(),
+        rep_pool=ThreadPoolExecutor(
+            max_workers=settings.reputation_workers,
+            thread_name_prefix='reputation'
+        ),
+        reputation_timeout=settings.reputation_lookup_timeout
+    )
+
+    # Run one prediction now so XGBoost's lazy predictor setup and the
+    # extractor's first call happen at load time (in the preloading master),
+    # not on the first request
+    state.score_matrix(state.feature_matrix([extractor.extract_features(_WARMUP_URL)]))
+    return state
+
+
+_model_state: Optional[ModelState] = None
+_model_state_lock = threading.Lock()
+
+
+def get_model_state() -> ModelState:
+    """Get or load the shared model state"""
+    global _model_state
+    if _model_state is None:
+        with _model_state_lock:
+            if _model_state is None:
+                _model_state = load_model_state()
+    return _model_state
@@ -0,0 +1,120 @@
+"""
+Prediction Batcher - Micro-batches concurrent model scoring calls
+
+The /api/check route runs predictions on worker threads, so each request
+hands its feature dict to a shared queue and blocks on a future. A single
+background thread drains the queue (up to max_batch_size rows, waiting at
+most max_wait_ms for stragglers) and scores the whole batch with one model
+call, amortizing the fixed per-call cost of predict_proba. The same
+batcher coalesces other per-item calls with a batch form (e.g. threat intel
+lookups).
+
+When the thread is not running (never started, stopped, or dead), submit
+scores the row directly instead of queueing it, and a caller whose row is
+still unclaimed after result_timeout seconds withdraws it and scores it
+itself, so no request thread waits on a queue nobody reads.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class PredictionBatcher:
+    """Collects feature rows from concurrent callers into batched model calls"""
+
+    def __init__(
+        self,
+        score_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        name: str = "prediction-batcher",
+        result_timeout: float = 30.0
+    ):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self.result_timeout = result_timeout
+        self._queue: "queue.Queue[Optional[Tuple[Dict, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background batching thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name=self.name, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the batching thread after flushing queued rows"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, features: Dict) -> float:
+        """Queue one feature row and block until its score is available"""
+        if not self.is_running():
+            return self.score_fn([features])[0]
+        
+        future: Future = Future()
+        self._queue.put((features, future))
+        try:
+            return future.result(timeout=self.result_timeout)
+        except FutureTimeoutError:
+            # Still queued (e.g. behind stop()'s sentinel): withdraw the row
+            # and score it here. Once the thread has claimed it, cancel()
+            # fails and the result is on its way.
+            if future.cancel():
+                return self.score_fn([features])[0]
+            return future.result(timeout=self.result_timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch: List[Tuple[Dict, Future]]) -> None:
+        # Claim every row; callers that timed out have cancelled theirs
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            scores = self.score_fn([features for features, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), score in zip(batch, scores):
+            future.set_result(score)
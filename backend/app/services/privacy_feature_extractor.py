@@ -6,10 +6,11 @@ Only numerical feature vectors are returned — no browsing history is stored.
 """
 import re
 import math
-from urllib.parse import urlparse
 from collections import Counter
 from typing import Dict, List, Optional
 
+from app.services.feature_extractor import _split_url
+
 
 class PrivacyFeatureExtractor:
     """
@@ -66,10 +67,9 @@ class PrivacyFeatureExtractor:
             if not url.startswith(('http://', 'https://')):
                 url = 'http://' + url
 
-            parsed = urlparse(url)
-            hostname = (parsed.hostname or '').lower()
-            path = parsed.path or '/'
-            query = parsed.query or ''
+            scheme, hostname, port, path, query, _ = _split_url(url)
+            hostname = hostname.lower()
+            path = path or '/'
 
             features: Dict[str, float] = {}
 
@@ -110,9 +110,9 @@ class PrivacyFeatureExtractor:
             features['num_hyphens'] = float(hostname.count('-'))
 
             # Protocol & Port
-            features['is_https'] = 1.0 if parsed.scheme == 'https' else 0.0
+            features['is_https'] = 1.0 if scheme == 'https' else 0.0
             features['has_nonstandard_port'] = (
-                1.0 if parsed.port and parsed.port not in (80, 443, 8080) else 0.0
+                1.0 if port and port not in (80, 443, 8080) else 0.0
             )
 
             # Anomaly Signals
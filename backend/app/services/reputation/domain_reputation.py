@@ -2,68 +2,131 @@
 Domain Reputation Service
 Calculates trust score based on multiple signals
 """
-import whois
+import logging
+import re
 import socket
 import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
-import dns.resolver
+from app.config import get_settings
+from app.services.reputation import whois_client
+from app.utils.cache import LRUCache
+from app.utils.domains import root_domain
+
+logger = logging.getLogger(__name__)
+
+# Network signal lookups (WHOIS, SSL, DNS) for all requests share one pool;
+# threads mostly sit in socket waits, so it is sized for several concurrent
+# domains (five lookups each) rather than for CPU count
+_SIGNAL_POOL = ThreadPoolExecutor(max_workers=100, thread_name_prefix='reputation-signal')
+# Seconds to wait for all network signals of one domain; late ones score 0
+SIGNAL_TIMEOUT = 6.0
+
+DNS_RECORD_TYPES = ('A', 'MX', 'NS')
+DNS_CACHE_SIZE = 10000
+DNS_LIFETIME = 2.0  # seconds per query, including retries
+
+
+@lru_cache()
+def _ssl_context() -> ssl.SSLContext:
+    """Shared client context, so the CA store is loaded once rather than per check"""
+    return ssl.create_default_context()
+
+
+@lru_cache()
+def _dns_resolver():
+    """Shared resolver; its cache answers repeat queries until their TTL expires"""
+    # dnspython is only needed once a reputation lookup runs, so workers
+    # serving ML-only checks never import it
+    import dns.resolver
+    
+    resolver = dns.resolver.Resolver()
+    resolver.cache = dns.resolver.LRUCache(DNS_CACHE_SIZE)
+    resolver.lifetime = DNS_LIFETIME
+    return resolver
+
+# Certificate issuers that earn the SSL bonus (substring of the issuer org)
+TRUSTED_ISSUERS = (
+    "Let's Encrypt",
+    'DigiCert',
+    'GlobalSign',
+    'GeoTrust',
+    'Comodo',
+    'Sectigo',
+    'GoDaddy',
+    'Cloudflare'
+)
+_TRUSTED_ISSUER_RE = re.compile('|'.join(map(re.escape, TRUSTED_ISSUERS)))
+
+# Top sites that should always be trusted (shared, immutable, built once)
+TOP_DOMAINS = frozenset({
+    # Search & Tech
+    'google.com', 'youtube.com', 'facebook.com', 'twitter.com',
+    'instagram.com', 'linkedin.com', 'reddit.com', 'wikipedia.org',
+    'github.com', 'stackoverflow.com', 'medium.com', 'quora.com',
+    
+    # E-commerce
+    'amazon.com', 'ebay.com', 'walmart.com', 'target.com',
+    'bestbuy.com', 'etsy.com', 'shopify.com', 'aliexpress.com',
+    
+    # Tech/Cloud
+    'microsoft.com', 'apple.com', 'adobe.com', 'oracle.com',
+    'ibm.com', 'dell.com', 'hp.com', 'intel.com', 'nvidia.com',
+    'cloudflare.com', 'aws.amazon.com', 'azure.microsoft.com',
+    
+    # News/Media
+    'cnn.com', 'bbc.com', 'nytimes.com', 'washingtonpost.com',
+    'theguardian.com', 'reuters.com', 'bloomberg.com', 'forbes.com',
+    'techcrunch.com', 'wired.com', 'theverge.com',
+    
+    # Entertainment
+    'netflix.com', 'spotify.com', 'twitch.tv', 'discord.com',
+    'hulu.com', 'disneyplus.com', 'hbo.com', 'primevideo.com',
+    
+    # Productivity
+    'zoom.us', 'slack.com', 'notion.so', 'dropbox.com',
+    'box.com', 'trello.com', 'asana.com', 'monday.com',
+    
+    # Education
+    'coursera.org', 'udemy.com', 'edx.org', 'khanacademy.org',
+    'duolingo.com', 'codecademy.com',
+    
+    # Developer
+    'npmjs.com', 'pypi.org', 'docker.com', 'kubernetes.io',
+    'gitlab.com', 'bitbucket.org', 'vercel.com', 'netlify.com',
+    'heroku.com', 'digitalocean.com',
+    
+    # Gaming
+    'steampowered.com', 'epicgames.com', 'twitch.tv', 'ign.com',
+    
+    # Other
+    'paypal.com', 'stripe.com', 'pinterest.com', 'tumblr.com'
+})
 
 class DomainReputationService:
     """Calculate domain reputation from multiple sources"""
     
     def __init__(self):
-        # Top 10K domains cache (most popular sites)
-        self.top_domains = self._load_top_domains()
+        # Top domains cache (most popular sites)
+        self.top_domains = TOP_DOMAINS
+        
+        # WHOIS/SSL/DNS signals change over days, not requests: keep
+        # finished scores per hostname
+        settings = get_settings()
+        self._cache = LRUCache(
+            maxsize=settings.reputation_cache_size,
+            ttl=settings.reputation_cache_ttl
+        )
+        # Certificates outlive reputation scores: keep their fields longer
+        self._cert_cache = LRUCache(
+            maxsize=settings.reputation_cache_size,
+            ttl=settings.ssl_cert_cache_ttl
+        )
         
-    def _load_top_domains(self):
-        """Load commonly visited domains"""
-        # Top sites that should always be trusted
-        return {
-            # Search & Tech
-            'google.com', 'youtube.com', 'facebook.com', 'twitter.com',
-            'instagram.com', 'linkedin.com', 'reddit.com', 'wikipedia.org',
-            'github.com', 'stackoverflow.com', 'medium.com', 'quora.com',
-            
-            # E-commerce
-            'amazon.com', 'ebay.com', 'walmart.com', 'target.com',
-            'bestbuy.com', 'etsy.com', 'shopify.com', 'aliexpress.com',
-            
-            # Tech/Cloud
-            'microsoft.com', 'apple.com', 'adobe.com', 'oracle.com',
-            'ibm.com', 'dell.com', 'hp.com', 'intel.com', 'nvidia.com',
-            'cloudflare.com', 'aws.amazon.com', 'azure.microsoft.com',
-            
-            # News/Media
-            'cnn.com', 'bbc.com', 'nytimes.com', 'washingtonpost.com',
-            'theguardian.com', 'reuters.com', 'bloomberg.com', 'forbes.com',
-            'techcrunch.com', 'wired.com', 'theverge.com',
-            
-            # Entertainment
-            'netflix.com', 'spotify.com', 'twitch.tv', 'discord.com',
-            'hulu.com', 'disneyplus.com', 'hbo.com', 'primevideo.com',
-            
-            # Productivity
-            'zoom.us', 'slack.com', 'notion.so', 'dropbox.com',
-            'box.com', 'trello.com', 'asana.com', 'monday.com',
-            
-            # Education
-            'coursera.org', 'udemy.com', 'edx.org', 'khanacademy.org',
-            'duolingo.com', 'codecademy.com',
-            
-            # Developer
-            'npmjs.com', 'pypi.org', 'docker.com', 'kubernetes.io',
-            'gitlab.com', 'bitbucket.org', 'vercel.com', 'netlify.com',
-            'heroku.com', 'digitalocean.com',
-            
-            # Gaming
-            'steampowered.com', 'epicgames.com', 'twitch.tv', 'ign.com',
-            
-            # Other
-            'paypal.com', 'stripe.com', 'pinterest.com', 'tumblr.com'
-        }
-    
     def calculate_reputation_score(self, url: str) -> Dict:
         """
         Calculate overall reputation score (0-100)
@@ -75,21 +138,56 @@ class DomainReputationService:
         - DNS Health: 0-15 points
         - WHOIS Info: 0-10 points
         
+        Scores are cached per hostname for reputation_cache_ttl seconds.
+        
         Returns:
             dict with score and breakdown
         """
         try:
-            parsed = urlparse(url)
-            hostname = parsed.hostname
-            
-            if not hostname:
-                return self._get_default_score("Invalid hostname")
-            
-            print(f" Calculating reputation for: {hostname}")
+            hostname = urlparse(url).hostname
+        except ValueError as e:
+            return self._get_default_score(f"Error: {str(e)}")
+        
+        if not hostname:
+            return self._get_default_score("Invalid hostname")
+        
+        return self.hostname_score(hostname)
+    
+    def hostname_score(self, hostname: str) -> Dict:
+        """Reputation for an already parsed, lowercased hostname (cached)"""
+        result = self._cache.get(hostname)
+        if result is None:
+            result = self._score_hostname(hostname)
+            # Failed or partial (timed-out) lookups are not cached so the
+            # next request retries
+            if 'error' not in result and not result.get('timed_out'):
+                self._cache.set(hostname, result)
+        return result
+    
+    def cached_score(self, hostname: str) -> Optional[Dict]:
+        """Cached reputation for hostname, or None if it needs a lookup"""
+        return self._cache.get(hostname)
+    
+    def _score_hostname(self, hostname: str) -> Dict:
+        """Run every reputation check for a hostname (no caching)"""
+        try:
+            logger.debug("Calculating reputation for: %s", hostname)
             
             score_breakdown = {}
             total_score = 0
             
+            # The network checks are independent: run them concurrently so
+            # the wait is the slowest lookup rather than the sum. One WHOIS
+            # record feeds both the age and registration checks.
+            whois_future = _SIGNAL_POOL.submit(self._lookup_whois, hostname)
+            ssl_future = _SIGNAL_POOL.submit(self._check_ssl_certificate, hostname)
+            dns_futures = {
+                rdtype: _SIGNAL_POOL.submit(self._resolve_dns, hostname, rdtype)
+                for rdtype in DNS_RECORD_TYPES
+            }
+            deadline = time.monotonic() + SIGNAL_TIMEOUT
+            timed_out = []
+            
             # 1. Check popularity
             popularity_score = self._check_popularity(hostname)
             score_breakdown['popularity'] = {
@@ -100,7 +198,8 @@ class DomainReputationService:
             total_score += popularity_score
             
             # 2. Check domain age
-            age_score, age_days = self._check_domain_age(hostname)
+            w = self._signal_result(whois_future, deadline, None, "WHOIS lookup", timed_out)
+            age_score, age_days = self._check_domain_age(w)
             score_breakdown['domain_age'] = {
                 'score': age_score,
                 'max': 25,
@@ -110,7 +209,10 @@ class DomainReputationService:
             total_score += age_score
             
             # 3. Check SSL certificate
-            ssl_score, ssl_info = self._check_ssl_certificate(hostname)
+            ssl_score, ssl_info = self._signal_result(
+                ssl_future, deadline, (0, {'valid': False, 'reason': 'timed out'}), "SSL check",
+                timed_out
+            )
             score_breakdown['ssl_certificate'] = {
                 'score': ssl_score,
                 'max': 20,
@@ -120,7 +222,10 @@ class DomainReputationService:
             total_score += ssl_score
             
             # 4. Check DNS records
-            dns_score, dns_info = self._check_dns_health(hostname)
+            dns_score, dns_info = self._check_dns_health(*(
+                self._signal_result(future, deadline, None, f"DNS {rdtype} lookup", timed_out)
+                for rdtype, future in dns_futures.items()
+            ))
             score_breakdown['dns_health'] = {
                 'score': dns_score,
                 'max': 15,
@@ -130,7 +235,7 @@ class DomainReputationService:
             total_score += dns_score
             
             # 5. Check WHOIS information
-            whois_score, whois_info = self._check_whois_info(hostname)
+            whois_score, whois_info = self._check_whois_info(w)
             score_breakdown['whois'] = {
                 'score': whois_score,
                 'max': 10,
@@ -141,9 +246,9 @@ class DomainReputationService:
             
             trust_level = self._get_trust_level(total_score)
             
-            print(f"   Score: {total_score}/100 ({trust_level})")
+            logger.debug("%s reputation: %d/100 (%s)", hostname, total_score, trust_level)
             
-            return {
+            result = {
                 'total_score': total_score,
                 'max_score': 100,
                 'trust_level': trust_level,
@@ -151,34 +256,62 @@ class DomainReputationService:
                 'hostname': hostname,
                 'recommendation': self._get_recommendation(total_score)
             }
+            if timed_out:
+                # Missing signals scored 0: the total is only a lower bound
+                result['timed_out'] = timed_out
+            return result
             
         except Exception as e:
-            print(f"   Error calculating reputation: {e}")
+            logger.warning("Error calculating reputation for %s: %s", hostname, e)
             return self._get_default_score(f"Error: {str(e)}")
     
+    def is_top_domain(self, hostname: str) -> bool:
+        """Whether hostname or its registered domain is one of TOP_DOMAINS"""
+        hostname = hostname.lower()
+        return hostname in self.top_domains or root_domain(hostname) in self.top_domains
+    
     def _check_popularity(self, hostname: str) -> int:
         """
         Check if domain is in top sites list
         Returns: 0-30 points
         """
-        hostname_lower = hostname.lower()
-        
-        # Check exact match or subdomain
-        for top_domain in self.top_domains:
-            if hostname_lower == top_domain or hostname_lower.endswith('.' + top_domain):
-                print(f"   Popular domain detected")
-                return 30
+        # Same predicate as the SmartURLDetector top-domain shortcut
+        if self.is_top_domain(hostname):
+            logger.debug("Popular domain detected: %s", hostname)
+            return 30
         
         return 0
     
-    def _check_domain_age(self, hostname: str) -> tuple:
+    @staticmethod
+    def _signal_result(future, deadline: float, default, name: str, timed_out: List[str]):
+        """
+        Result of a signal lookup, or default if it misses the deadline
+        (name is then appended to timed_out)
         """
-        Check how old the domain is
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except Exception as e:
+            logger.debug("%s did not complete: %r", name, e)
+            timed_out.append(name)
+            return default
+    
+    def _lookup_whois(self, hostname: str):
+        """WHOIS record for hostname, or None if the lookup fails"""
+        try:
+            return whois_client.lookup(hostname)
+        except Exception as e:
+            logger.debug("WHOIS lookup failed for %s: %s", hostname, e)
+            return None
+    
+    def _check_domain_age(self, w) -> tuple:
+        """
+        Check how old the domain is (w: WHOIS record or None)
         Returns: (score 0-25, age_in_days)
         """
+        if w is None:
+            return (0, None)
+        
         try:
-            w = whois.whois(hostname)
-            
             if w.creation_date:
                 # Handle list or single date
                 creation_date = w.creation_date
@@ -189,7 +322,7 @@ class DomainReputationService:
                     age = datetime.now() - creation_date
                     days_old = age.days
                     
-                    print(f"   Domain age: {days_old} days ({days_old // 365} years)")
+                    logger.debug("Domain age: %d days (%d years)", days_old, days_old // 365)
                     
                     # Scoring
                     if days_old > 3650:  # 10+ years
@@ -205,11 +338,11 @@ class DomainReputationService:
                     elif days_old > 90:  # 3-6 months
                         return (2, days_old)
                     else:  # < 3 months (very suspicious)
-                        print(f"    Very new domain (< 3 months)")
+                        logger.debug("Very new domain (< 3 months)")
                         return (0, days_old)
                     
         except Exception as e:
-            print(f"    WHOIS lookup failed: {e}")
+            logger.debug("WHOIS date check failed: %s", e)
             return (0, None)
         
         return (0, None)
@@ -220,115 +353,105 @@ class DomainReputationService:
         Returns: (score 0-20, cert_info)
         """
         try:
-            context = ssl.create_default_context()
-            
-            with socket.create_connection((hostname, 443), timeout=5) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    cert = ssock.getpeercert()
-                    
-                    # Check certificate validity
-                    not_after = datetime.strptime(
-                        cert['notAfter'], 
-                        '%b %d %H:%M:%S %Y %Z'
-                    )
-                    
-                    if not_after > datetime.now():
-                        score = 12  # Valid cert
-                        
-                        # Get issuer
-                        issuer = dict(x[0] for x in cert['issuer'])
-                        issuer_org = issuer.get('organizationName', 'Unknown')
-                        
-                        # Bonus for trusted issuers
-                        trusted_issuers = [
-                            "Let's Encrypt",
-                            'DigiCert',
-                            'GlobalSign',
-                            'GeoTrust',
-                            'Comodo',
-                            'Sectigo',
-                            'GoDaddy',
-                            'Cloudflare'
-                        ]
-                        
-                        if any(trusted in issuer_org for trusted in trusted_issuers):
-                            score += 8
-                            print(f"   Valid SSL from {issuer_org}")
-                        else:
-                            print(f"   Valid SSL (issuer: {issuer_org})")
-                        
-                        cert_info = {
-                            'valid': True,
-                            'issuer': issuer_org,
-                            'expires': not_after.isoformat()
-                        }
-                        
-                        return (score, cert_info)
-                    else:
-                        print(f"    Expired SSL certificate")
-                        return (0, {'valid': False, 'reason': 'expired'})
-                    
+            not_after, issuer_org = self._fetch_certificate(hostname)
         except Exception as e:
-            print(f"    No SSL or connection failed: {e}")
+            logger.debug("No SSL or connection failed for %s: %s", hostname, e)
             return (0, {'valid': False, 'reason': str(e)})
         
-        return (0, {'valid': False})
+        # Check certificate validity
+        if not_after > datetime.now():
+            score = 12  # Valid cert
+            
+            # Bonus for trusted issuers
+            if _TRUSTED_ISSUER_RE.search(issuer_org):
+                score += 8
+                logger.debug("Valid SSL from %s", issuer_org)
+            else:
+                logger.debug("Valid SSL (issuer: %s)", issuer_org)
+            
+            cert_info = {
+                'valid': True,
+                'issuer': issuer_org,
+                'expires': not_after.isoformat()
+            }
+            
+            return (score, cert_info)
+        
+        logger.debug("Expired SSL certificate for %s", hostname)
+        return (0, {'valid': False, 'reason': 'expired'})
     
-    def _check_dns_health(self, hostname: str) -> tuple:
+    def _fetch_certificate(self, hostname: str) -> tuple:
         """
-        Check DNS records quality
+        (not_after, issuer_org) of hostname's verified certificate, cached
+        per SNI name for ssl_cert_cache_ttl seconds; raises if the TLS
+        connection or verification fails (failures are not cached)
+        """
+        cert_fields = self._cert_cache.get(hostname)
+        if cert_fields is not None:
+            return cert_fields
+        
+        with socket.create_connection((hostname, 443), timeout=5) as sock:
+            with _ssl_context().wrap_socket(sock, server_hostname=hostname) as ssock:
+                cert = ssock.getpeercert()
+        
+        not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+        issuer = dict(x[0] for x in cert['issuer'])
+        cert_fields = (not_after, issuer.get('organizationName', 'Unknown'))
+        self._cert_cache.set(hostname, cert_fields)
+        return cert_fields
+    
+    @staticmethod
+    def _resolve_dns(hostname: str, rdtype: str) -> Optional[List[str]]:
+        """Records of one type for hostname, or None if there are none"""
+        try:
+            return [str(rdata) for rdata in _dns_resolver().resolve(hostname, rdtype)]
+        except Exception:
+            return None
+    
+    def _check_dns_health(self, a_records, mx_records, ns_records) -> tuple:
+        """
+        Check DNS records quality (each argument: record list or None)
         Returns: (score 0-15, dns_info)
         """
         score = 0
         dns_info = {}
         
-        try:
-            # Check A record (IPv4)
-            try:
-                answers = dns.resolver.resolve(hostname, 'A')
-                dns_info['a_records'] = [str(rdata) for rdata in answers]
-                score += 5
-                print(f"   Has A record")
-            except:
-                print(f"    No A record")
+        # Check A record (IPv4)
+        if a_records:
+            dns_info['a_records'] = a_records
+            score += 5
+            logger.debug("Has A record")
+        else:
+            logger.debug("No A record")
+        
+        # Check MX record (email)
+        if mx_records:
+            dns_info['mx_records'] = mx_records
+            score += 5
+            logger.debug("Has MX record (email configured)")
+        
+        # Check NS record (nameservers)
+        if ns_records:
+            ns_count = len(ns_records)
+            dns_info['ns_count'] = ns_count
             
-            # Check MX record (email)
-            try:
-                answers = dns.resolver.resolve(hostname, 'MX')
-                dns_info['mx_records'] = [str(rdata) for rdata in answers]
+            if ns_count >= 2:
                 score += 5
-                print(f"   Has MX record (email configured)")
-            except:
-                pass
-            
-            # Check NS record (nameservers)
-            try:
-                answers = dns.resolver.resolve(hostname, 'NS')
-                ns_count = len(list(answers))
-                dns_info['ns_count'] = ns_count
-                
-                if ns_count >= 2:
-                    score += 5
-                    print(f"   Has {ns_count} nameservers")
-                elif ns_count >= 1:
-                    score += 3
-                
-            except:
-                pass
-            
-            return (score, dns_info)
-            
-        except Exception as e:
-            print(f"    DNS check failed: {e}")
-            return (0, {})
+                logger.debug("Has %d nameservers", ns_count)
+            else:
+                score += 3
+        
+        return (score, dns_info)
     
-    def _check_whois_info(self, hostname: str) -> tuple:
+    def _check_whois_info(self, w) -> tuple:
         """
-        Check WHOIS information quality
+        Check WHOIS information quality (w: WHOIS record or None)
         Returns: (score 0-10, whois_info)
         """
+        if w is None:
+            return (0, {})
+        
         try:
-            w = whois.whois(hostname)
             score = 0
             whois_info = {}
             
@@ -336,7 +459,7 @@ class DomainReputationService:
             if w.registrar:
                 score += 5
                 whois_info['registrar'] = w.registrar
-                print(f"   Registrar: {w.registrar}")
+                logger.debug("Registrar: %s", w.registrar)
             
             # Has name servers
             if w.name_servers and len(w.name_servers) >= 2:
@@ -351,7 +474,7 @@ class DomainReputationService:
             return (score, whois_info)
             
         except Exception as e:
-            print(f"    WHOIS failed: {e}")
+            logger.debug("WHOIS info check failed: %s", e)
             return (0, {})
     
     def _get_trust_level(self, score: int) -> str:
@@ -1,10 +1,31 @@
 """
 Threat Intelligence Integration
 Check domain against external databases
+
+Google Safe Browsing accepts up to 500 URLs per threatMatches:find call, so
+concurrent lookups are coalesced by a micro-batcher into one POST. All
+sources share one keep-alive session, so repeat checks reuse pooled
+TCP/TLS connections instead of handshaking per call. The sources are
+independent, so each check queries them concurrently.
 """
+import logging
 import requests
-from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 import os
+from app.config import get_settings
+from app.services.prediction_batcher import PredictionBatcher
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+GSB_MAX_ENTRIES = 500  # threatEntries per threatMatches:find request
+
+# Source queries for all checks share one pool; threads mostly wait on
+# HTTPS responses (three per check)
+_SOURCE_POOL = ThreadPoolExecutor(max_workers=48, thread_name_prefix='threat-intel')
 
 class ThreatIntelligenceService:
     """Integrate with multiple threat intelligence sources"""
@@ -14,32 +35,81 @@ class ThreatIntelligenceService:
         self.virustotal_api_key = os.getenv('VIRUSTOTAL_API_KEY')
         self.google_safe_browsing_key = os.getenv('GOOGLE_SAFE_BROWSING_KEY')
         
+        settings = get_settings()
+        self._cache = LRUCache(
+            maxsize=settings.threat_intel_cache_size,
+            ttl=settings.threat_intel_cache_ttl
+        )
+        
+        self._gsb_batcher = PredictionBatcher(
+            self._lookup_gsb_batch,
+            max_batch_size=min(settings.gsb_batch_max_size, GSB_MAX_ENTRIES),
+            max_wait_ms=settings.gsb_batch_max_wait_ms,
+            name="gsb-batcher"
+        )
+        self._gsb_batcher_lock = threading.Lock()
+        
+        # No cookies or auth state, so worker threads share one session
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=3,  # one pool per API host
+            pool_maxsize=settings.threat_intel_pool_size
+        )
+        self._session.mount("https://", adapter)
+        
+    def close(self):
+        """Stop the Safe Browsing batcher and close pooled connections"""
+        self._gsb_batcher.stop()
+        self._session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
     def check_all_sources(self, url: str) -> Dict:
         """
         Check URL against all available threat intel sources
         
-        Returns aggregated threat intelligence
+        Returns aggregated threat intelligence (cached per URL for
+        threat_intel_cache_ttl seconds)
         """
+        results = self._cache.get(url)
+        if results is None:
+            results = self._query_all_sources(url)
+            # Don't keep a verdict that a failing source left incomplete
+            if not any('error' in source for source in results['sources'].values()):
+                self._cache.set(url, results)
+        return results
+    
+    def _query_all_sources(self, url: str) -> Dict:
+        """Query every threat intel source for a URL (no caching)"""
         results = {
             'is_malicious': False,
             'threat_score': 0,  # 0-100, higher = more malicious
             'sources': {}
         }
         
+        # Fan the sources out so the wait is the slowest one, not the sum
+        gsb_future = _SOURCE_POOL.submit(self._check_google_safe_browsing, url)
+        vt_future = _SOURCE_POOL.submit(self._check_virustotal, url)
+        pt_future = _SOURCE_POOL.submit(self._check_phishtank, url)
+        
         # 1. Google Safe Browsing
-        gsb_result = self._check_google_safe_browsing(url)
+        gsb_result = gsb_future.result()
         results['sources']['google_safe_browsing'] = gsb_result
         if gsb_result.get('is_malicious'):
             results['threat_score'] += 40
         
         # 2. VirusTotal
-        vt_result = self._check_virustotal(url)
+        vt_result = vt_future.result()
         results['sources']['virustotal'] = vt_result
         if vt_result.get('malicious_count', 0) > 3:
             results['threat_score'] += 30
         
         # 3. PhishTank (free, no API key needed)
-        pt_result = self._check_phishtank(url)
+        pt_result = pt_future.result()
         results['sources']['phishtank'] = pt_result
         if pt_result.get('in_database'):
             results['threat_score'] += 30
@@ -51,43 +121,55 @@ class ThreatIntelligenceService:
         return results
     
     def _check_google_safe_browsing(self, url: str) -> Dict:
-        """Check against Google Safe Browsing API"""
+        """Check against Google Safe Browsing API (batched with concurrent lookups)"""
         if not self.google_safe_browsing_key:
             return {'available': False}
         
         try:
-            api_url = f"https://safebrowsing.googleapis.com/v4/threatMatches:find?key={self.google_safe_browsing_key}"
-            
-            payload = {
-                "client": {
-                    "clientId": "malicious-url-detector",
-                    "clientVersion": "1.0.0"
-                },
-                "threatInfo": {
-                    "threatTypes": ["MALWARE", "SOCIAL_ENGINEERING", "UNWANTED_SOFTWARE"],
-                    "platformTypes": ["ANY_PLATFORM"],
-                    "threatEntryTypes": ["URL"],
-                    "threatEntries": [{"url": url}]
-                }
-            }
-            
-            response = requests.post(api_url, json=payload, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                is_malicious = bool(data.get('matches'))
-                
-                return {
-                    'available': True,
-                    'is_malicious': is_malicious,
-                    'details': data.get('matches', [])
-                }
-                
+            # The batching thread does not survive fork, so (re)start it lazily
+            if not self._gsb_batcher.is_running():
+                with self._gsb_batcher_lock:
+                    self._gsb_batcher.start()
+            return self._gsb_batcher.submit(url)
         except Exception as e:
-            print(f"GSB API error: {e}")
+            logger.warning("GSB API error: %s", e)
             return {'available': False, 'error': str(e)}
+    
+    def _lookup_gsb_batch(self, urls: List[str]) -> List[Dict]:
+        """Look up many URLs in one Safe Browsing request (one result per URL)"""
+        api_url = f"https://safebrowsing.googleapis.com/v4/threatMatches:find?key={self.google_safe_browsing_key}"
         
-        return {'available': False}
+        payload = {
+            "client": {
+                "clientId": "malicious-url-detector",
+                "clientVersion": "1.0.0"
+            },
+            "threatInfo": {
+                "threatTypes": ["MALWARE", "SOCIAL_ENGINEERING", "UNWANTED_SOFTWARE"],
+                "platformTypes": ["ANY_PLATFORM"],
+                "threatEntryTypes": ["URL"],
+                "threatEntries": [{"url": url} for url in dict.fromkeys(urls)]
+            }
+        }
+        
+        response = self._session.post(api_url, json=payload, timeout=5)
+        
+        if response.status_code != 200:
+            return [{'available': False} for _ in urls]
+        
+        # Matches name the entry they hit; hand each caller its own
+        matches_by_url: Dict[str, List[Dict]] = {}
+        for match in response.json().get('matches', []):
+            matches_by_url.setdefault(match.get('threat', {}).get('url'), []).append(match)
+        
+        return [
+            {
+                'available': True,
+                'is_malicious': url in matches_by_url,
+                'details': matches_by_url.get(url, [])
+            }
+            for url in urls
+        ]
     
     def _check_virustotal(self, url: str) -> Dict:
         """Check against VirusTotal API"""
@@ -104,7 +186,7 @@ class ThreatIntelligenceService:
             }
             
             api_url = f"https://www.virustotal.com/api/v3/urls/{url_id}"
-            response = requests.get(api_url, headers=headers, timeout=5)
+            response = self._session.get(api_url, headers=headers, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -119,7 +201,7 @@ class ThreatIntelligenceService:
                 }
                 
         except Exception as e:
-            print(f"VirusTotal API error: {e}")
+            logger.warning("VirusTotal API error: %s", e)
             return {'available': False, 'error': str(e)}
         
         return {'available': False}
@@ -135,7 +217,7 @@ class ThreatIntelligenceService:
                 'format': 'json'
             }
             
-            response = requests.post(api_url, data=data, timeout=5)
+            response = self._session.post(api_url, data=data, timeout=5)
             
             if response.status_code == 200:
                 result = response.json()
@@ -147,7 +229,7 @@ class ThreatIntelligenceService:
                 }
                 
         except Exception as e:
-            print(f"PhishTank API error: {e}")
+            logger.warning("PhishTank API error: %s", e)
             return {'available': False, 'error': str(e)}
         
         return {'available': False}
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+WHOIS Client - Minimal port-43 WHOIS lookups
+
+Reputation scoring only needs a domain's creation date, registrar, name
+servers and status, so this speaks the WHOIS protocol directly (one query
+to the TLD's registry server, found once per TLD through IANA) and pulls
+those four fields out with precompiled line patterns instead of running a
+full WHOIS parser over every response.
+"""
+import re
+import socket
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional
+
+from app.utils.domains import root_domain
+
+IANA_WHOIS_SERVER = "whois.iana.org"
+WHOIS_PORT = 43
+WHOIS_TIMEOUT = 5.0  # seconds per connection (connect and each read)
+_MAX_RESPONSE_BYTES = 256 * 1024
+
+_REFER_RE = re.compile(r'^\s*(?:refer|whois):\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+_CREATION_RE = re.compile(
+    r'^\s*(?:Creation Date|Created On|Created|Registered On|Registration Time|'
+    r'Domain Registration Date|Registration Date)\s*:\s*(.+?)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+_REGISTRAR_RE = re.compile(
+    r'^\s*(?:Registrar|Sponsoring Registrar|Registrar Name)\s*:\s*(.+?)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+_NAME_SERVER_RE = re.compile(
+    r'^\s*(?:Name Server|Nameserver|nserver)\s*:\s*(\S+)',
+    re.IGNORECASE | re.MULTILINE
+)
+_STATUS_RE = re.compile(
+    r'^\s*(?:Domain Status|Status|state)\s*:\s*(.+?)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+_DATE_FORMATS = (
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y-%m-%d %H:%M:%S',
+    '%d-%b-%Y',
+    '%d-%b-%Y %H:%M:%S',
+    '%Y.%m.%d',
+    '%d.%m.%Y',
+    '%Y/%m/%d',
+    '%d/%m/%Y',
+)
+
+
+@dataclass
+class WhoisRecord:
+    """The registration fields reputation scoring reads"""
+    creation_date: Optional[datetime] = None
+    registrar: Optional[str] = None
+    name_servers: List[str] = field(default_factory=list)
+    status: List[str] = field(default_factory=list)
+
+
+def query(server: str, text: str, timeout: float = WHOIS_TIMEOUT) -> str:
+    """Send one WHOIS query and return the raw response"""
+    chunks = []
+    received = 0
+    with socket.create_connection((server, WHOIS_PORT), timeout=timeout) as sock:
+        sock.sendall(text.encode('idna') + b"\r\n")
+        while received < _MAX_RESPONSE_BYTES:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+    return b"".join(chunks).decode('utf-8', errors='replace')
+
+
+@lru_cache(maxsize=512)
+def whois_server(tld: str) -> Optional[str]:
+    """Registry WHOIS server for a TLD, as referred by IANA (None if it has none)"""
+    match = _REFER_RE.search(query(IANA_WHOIS_SERVER, tld))
+    return match.group(1).lower() if match else None
+
+
+def parse_date(value: str) -> Optional[datetime]:
+    """Parse a WHOIS date as a naive datetime (None if unrecognized)"""
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return parsed.replace(tzinfo=None)
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_response(text: str) -> WhoisRecord:
+    """Extract the scored fields from a WHOIS response"""
+    record = WhoisRecord()
+
+    for value in _CREATION_RE.findall(text):
+        record.creation_date = parse_date(value)
+        if record.creation_date is not None:
+            break
+
+    registrar = _REGISTRAR_RE.search(text)
+    if registrar:
+        record.registrar = registrar.group(1)
+
+    # Responses list servers in mixed case and sometimes more than once
+    record.name_servers = list(dict.fromkeys(ns.lower().rstrip('.') for ns in _NAME_SERVER_RE.findall(text)))
+    record.status = _STATUS_RE.findall(text)
+    return record
+
+
+def lookup(hostname: str) -> Optional[WhoisRecord]:
+    """
+    WHOIS record for the registered domain of hostname
+
+    Returns None when the TLD has no WHOIS server or the registry has no
+    registration data for the domain.
+    """
+    domain = root_domain(hostname.lower().rstrip('.'))
+    server = whois_server(domain.rsplit('.', 1)[-1])
+    if server is None:
+        return None
+
+    record = parse_response(query(server, domain))
+    if record.creation_date is None and record.registrar is None and not record.status:
+        return None
+    return record
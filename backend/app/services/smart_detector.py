@@ -2,18 +2,22 @@
 Smart URL Detector
 Combines ML, reputation, threat intel, and user feedback
 """
+import logging
 from typing import Dict
 from app.services.ml_service import get_ml_service
 from app.services.reputation.domain_reputation import DomainReputationService
 from app.services.reputation.threat_intel import ThreatIntelligenceService
-import json
-import os
+from app.services.feedback_store import get_whitelist_store
+from app.utils.domains import parse_hostname
+
+logger = logging.getLogger(__name__)
 
 class SmartURLDetector:
     """
     Multi-signal URL detection system
     
     Decision logic:
+    0. Check top domains (in memory, no network) → LEGITIMATE
     1. Check static whitelist → LEGITIMATE
     2. Check threat intelligence → MALICIOUS if found
     3. Calculate reputation score → LEGITIMATE if high (80+)
@@ -28,22 +32,25 @@ class SmartURLDetector:
         self.load_dynamic_whitelist()
     
     def load_dynamic_whitelist(self):
-        """Load user-reported safe domains"""
-        if os.path.exists('dynamic_whitelist.json'):
-            with open('dynamic_whitelist.json', 'r') as f:
-                self.dynamic_whitelist = set(json.load(f))
-        else:
-            self.dynamic_whitelist = set()
+        """Load user-reported safe domains (shared with the feedback route)"""
+        self.dynamic_whitelist = get_whitelist_store()
     
     def check_url(self, url: str) -> Dict:
         """
         Comprehensive URL check with multiple signals
         """
-        from urllib.parse import urlparse
-        
         try:
-            parsed = urlparse(url)
-            hostname = parsed.hostname
+            # Parse once; later signals reuse the hostname
+            hostname = parse_hostname(url)
+            
+            # Signal 0: Popular domains need no ML or network lookups
+            if hostname and self.reputation_service.is_top_domain(hostname):
+                return {
+                    'status': 'LEGITIMATE',
+                    'confidence': 0.99,
+                    'reason': 'Top domain',
+                    'source': 'popularity'
+                }
             
             # Signal 1: Static whitelist (handled by ML service)
             ml_result = self.ml_service.predict(url)
@@ -73,7 +80,10 @@ class SmartURLDetector:
                 }
             
             # Signal 4: Domain Reputation
-            reputation = self.reputation_service.calculate_reputation_score(url)
+            if hostname:
+                reputation = self.reputation_service.hostname_score(hostname)
+            else:
+                reputation = self.reputation_service._get_default_score("Invalid hostname")
             
             # High reputation = likely legitimate
             if reputation['total_score'] >= 80:
@@ -100,6 +110,6 @@ class SmartURLDetector:
             return ml_result
             
         except Exception as e:
-            print(f"Error in smart detection: {e}")
+            logger.warning("Error in smart detection: %s", e)
             # Fallback to ML only
             return self.ml_service.predict(url)
\ No newline at end of file
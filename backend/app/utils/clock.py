@@ -0,0 +1,24 @@
+"""
+Clock - Cheap wall-clock timestamps for response bodies
+
+Builds at most one datetime per millisecond and hands the same (immutable)
+object to every caller within that millisecond, instead of constructing a
+new datetime per request.
+"""
+import time
+from datetime import datetime
+
+_cached = (-1, datetime.fromtimestamp(0))
+
+
+def now() -> datetime:
+    """Local wall-clock time, millisecond resolution"""
+    global _cached
+    t = time.time()
+    ms = int(t * 1000)
+    cached_ms, cached_dt = _cached
+    if ms == cached_ms:
+        return cached_dt
+    dt = datetime.fromtimestamp(ms / 1000)
+    _cached = (ms, dt)
+    return dt
@@ -0,0 +1,106 @@
+"""
+Domains - Registered-domain extraction with a cached suffix table
+
+The root domain is the label just left of the public suffix, so
+mail.bbc.co.uk resolves to bbc.co.uk rather than co.uk. Only the common
+multi-label suffixes are listed here (the full Public Suffix List would
+need a network fetch or a vendored copy); anything else falls back to the
+last two labels. Results are memoized per hostname.
+
+parse_hostname pulls the hostname out of a URL without building a full
+urlparse result, falling back to urlparse for anything unusual.
+"""
+import re
+from functools import lru_cache
+from urllib.parse import urlparse
+
+# Public suffixes with more than one label that show up in practice
+MULTI_LABEL_SUFFIXES = frozenset({
+    # United Kingdom
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'ltd.uk', 'plc.uk', 'me.uk', 'net.uk', 'nhs.uk',
+    # India
+    'co.in', 'net.in', 'org.in', 'gov.in', 'ac.in', 'edu.in', 'firm.in', 'gen.in', 'ind.in',
+    # Australia / New Zealand
+    'com.au', 'net.au', 'org.au', 'edu.au', 'gov.au', 'asn.au', 'id.au',
+    'co.nz', 'net.nz', 'org.nz', 'govt.nz', 'ac.nz',
+    # Asia
+    'co.jp', 'ne.jp', 'or.jp', 'ac.jp', 'go.jp', 'gr.jp',
+    'co.kr', 'or.kr', 'ne.kr', 'go.kr', 'ac.kr',
+    'com.cn', 'net.cn', 'org.cn', 'gov.cn', 'edu.cn',
+    'com.hk', 'org.hk', 'net.hk', 'edu.hk', 'gov.hk',
+    'com.tw', 'org.tw', 'net.tw', 'edu.tw', 'gov.tw',
+    'com.sg', 'net.sg', 'org.sg', 'edu.sg', 'gov.sg',
+    'com.my', 'net.my', 'org.my', 'edu.my', 'gov.my',
+    'co.id', 'or.id', 'ac.id', 'go.id', 'web.id',
+    'co.th', 'in.th', 'ac.th', 'go.th', 'or.th',
+    'com.ph', 'net.ph', 'org.ph', 'edu.ph', 'gov.ph',
+    'com.vn', 'net.vn', 'org.vn', 'edu.vn', 'gov.vn',
+    'com.pk', 'net.pk', 'org.pk', 'edu.pk', 'gov.pk',
+    'com.bd', 'net.bd', 'org.bd', 'edu.bd', 'gov.bd',
+    'com.np', 'org.np', 'edu.np', 'gov.np',
+    'com.lk', 'org.lk', 'edu.lk', 'gov.lk',
+    # Middle East / Africa
+    'com.tr', 'net.tr', 'org.tr', 'edu.tr', 'gov.tr',
+    'com.sa', 'net.sa', 'org.sa', 'edu.sa', 'gov.sa',
+    'co.il', 'org.il', 'ac.il', 'gov.il',
+    'com.eg', 'org.eg', 'edu.eg', 'gov.eg',
+    'co.za', 'org.za', 'net.za', 'ac.za', 'gov.za', 'web.za',
+    'com.ng', 'org.ng', 'edu.ng', 'gov.ng',
+    'co.ke', 'or.ke', 'ac.ke', 'go.ke',
+    # Americas
+    'com.br', 'net.br', 'org.br', 'gov.br', 'edu.br',
+    'com.mx', 'net.mx', 'org.mx', 'gob.mx', 'edu.mx',
+    'com.ar', 'net.ar', 'org.ar', 'gob.ar', 'edu.ar',
+    'com.co', 'net.co', 'org.co', 'gov.co', 'edu.co',
+    'com.pe', 'net.pe', 'org.pe', 'gob.pe', 'edu.pe',
+    'com.ve', 'co.ve', 'org.ve', 'gob.ve',
+    'com.uy', 'org.uy', 'gub.uy', 'edu.uy',
+    'com.ec', 'org.ec', 'gob.ec', 'edu.ec',
+    'gob.cl',
+    # Europe
+    'com.pl', 'net.pl', 'org.pl', 'gov.pl', 'edu.pl',
+    'com.ua', 'net.ua', 'org.ua', 'gov.ua', 'edu.ua',
+    'com.ru', 'net.ru', 'org.ru', 'msk.ru', 'spb.ru',
+    'co.at', 'or.at', 'ac.at', 'gv.at',
+    'com.gr', 'net.gr', 'org.gr', 'edu.gr', 'gov.gr',
+    'com.pt', 'org.pt', 'edu.pt', 'gov.pt',
+    'com.es', 'org.es', 'nom.es', 'gob.es', 'edu.es',
+    'co.it',
+})
+
+
+@lru_cache(maxsize=65536)
+def root_domain(hostname: str) -> str:
+    """Registered domain of hostname (e.g. mail.bbc.co.uk -> bbc.co.uk)"""
+    parts = hostname.split('.')
+    if len(parts) < 2:
+        return hostname
+    if len(parts) >= 3 and '.'.join(parts[-2:]) in MULTI_LABEL_SUFFIXES:
+        return '.'.join(parts[-3:])
+    return '.'.join(parts[-2:])
+
+
+# Scheme and netloc of a URL (netloc runs to the first / ? or #)
+_NETLOC_RE = re.compile(r'https?://([^/?#]*)')
+# Characters urlparse strips, rejects or treats specially in a netloc
+_SLOW_PATH_RE = re.compile(r'[\x00-\x20\x7f\[\]]')
+
+
+def parse_hostname(url: str) -> str:
+    """
+    Lowercased hostname of url, exactly as urlparse(...).hostname reports it
+    ('' if there is none); URLs without an http(s) scheme are read as http
+    """
+    if not url.startswith(('http://', 'https://')):
+        url = 'http://' + url
+    
+    # Plain ASCII URLs: userinfo is everything up to the last @, the port
+    # everything after the first :
+    if url.isascii() and not _SLOW_PATH_RE.search(url):
+        netloc = _NETLOC_RE.match(url).group(1)
+        host = netloc.rpartition('@')[2].partition(':')[0]
+        # urlparse leaves a %zone suffix in its original case
+        host, percent, zone = host.partition('%')
+        return host.lower() + percent + zone
+    
+    return urlparse(url).hostname or ''
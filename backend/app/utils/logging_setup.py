@@ -0,0 +1,62 @@
+"""
+Logging Setup - Non-blocking log emission
+
+Request threads only enqueue log records (QueueHandler); a background
+QueueListener thread formats and writes them to stdout, so a slow stdout
+(e.g. a container log driver) never stalls a request. The listener is
+restarted in forked children, since threads do not survive fork under a
+preloading server.
+"""
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+
+
+def _start_listener() -> None:
+    global _listener
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = QueueListener(_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(level: str = "INFO") -> None:
+    """Route root-logger records through the queue (idempotent)"""
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    if _listener is not None:
+        return
+
+    root.addHandler(QueueHandler(_queue))
+    _start_listener()
+    atexit.register(stop_logging)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def _restart_in_child() -> None:
+    # The inherited queue may hold the parent's pending records (and its
+    # internal lock state), so the child starts over with a fresh queue
+    global _queue
+    _queue = queue.SimpleQueue()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, QueueHandler):
+            handler.queue = _queue
+    _start_listener()
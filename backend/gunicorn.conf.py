@@ -0,0 +1,28 @@
+"""
+Gunicorn config for multi-worker deployments
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+preload_app imports app.main in the master before forking, so the ML
+model and anomaly detector are loaded once and shared copy-on-write by
+every worker. Per-worker threads (the prediction batcher) are started in
+the FastAPI startup hook, which runs after the fork.
+
+The preloaded heap is frozen (gc.freeze) before each fork so the
+workers' garbage collector never writes to those objects' headers, which
+would otherwise copy the shared model pages into every worker.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("SENTINEL_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("SENTINEL_WORKERS", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 30
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far into the permanent generation
+    gc.freeze()
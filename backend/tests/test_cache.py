@@ -0,0 +1,46 @@
+"""Tests for the LRU Cache utility."""
+import time
+
+import pytest
+from app.utils.cache import LRUCache
+
+
+@pytest.fixture
+def cache():
+    return LRUCache(maxsize=3)
+
+
+class TestLRUCache:
+    """Test suite for LRUCache."""
+
+    def test_get_set(self, cache):
+        """Stored values are returned; missing keys give the default."""
+        cache.set('a', 1)
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('b', 0) == 0
+
+    def test_evicts_least_recently_used(self, cache):
+        """Touching a key protects it from eviction."""
+        for key in 'abc':
+            cache.set(key, key)
+        cache.get('a')
+        cache.set('d', 'd')
+        assert cache.get('b') is None
+        assert cache.get('a') == 'a'
+        assert len(cache) == 3
+
+    def test_ttl_expiry(self):
+        """Entries past their TTL are treated as misses."""
+        cache = LRUCache(maxsize=10, ttl=0.01)
+        cache.set('a', 1)
+        time.sleep(0.02)
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_hit_miss_counters(self, cache):
+        """Hits and misses are counted."""
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('z')
+        assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,28 @@
+"""Tests for the cached Clock."""
+import time
+from datetime import datetime, timedelta
+
+from app.utils import clock
+
+
+class TestClock:
+    """Test suite for clock.now()."""
+
+    def test_close_to_wall_clock(self):
+        """now() stays within a few milliseconds of datetime.now()."""
+        assert abs(clock.now() - datetime.now()) < timedelta(milliseconds=5)
+
+    def test_reused_within_millisecond(self):
+        """Back-to-back calls in the same millisecond share one object."""
+        for _ in range(100):
+            a, b = clock.now(), clock.now()
+            if a == b:
+                assert a is b
+                return
+        raise AssertionError("never observed two calls in one millisecond")
+
+    def test_advances(self):
+        """Timestamps move forward as time passes."""
+        first = clock.now()
+        time.sleep(0.002)
+        assert clock.now() > first
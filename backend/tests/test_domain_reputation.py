@@ -0,0 +1,107 @@
+"""Tests for the Domain Reputation Service cache."""
+import threading
+
+import pytest
+from app.services.reputation import domain_reputation
+from app.services.reputation.domain_reputation import DomainReputationService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    svc = DomainReputationService()
+    calls = []
+
+    def fake_score(hostname):
+        calls.append(hostname)
+        if hostname.startswith("broken."):
+            return svc._get_default_score("Error: lookup failed")
+        if hostname.startswith("slow."):
+            return {'total_score': 0, 'hostname': hostname, 'timed_out': ["SSL check"]}
+        return {'total_score': 50, 'hostname': hostname}
+
+    monkeypatch.setattr(svc, "_score_hostname", fake_score)
+    svc.calls = calls
+    return svc
+
+
+class TestReputationCache:
+    """Test suite for per-hostname reputation caching."""
+
+    def test_repeat_hostname_is_cached(self, service):
+        """Two URLs on the same host trigger one lookup."""
+        first = service.calculate_reputation_score("https://example.com/a")
+        second = service.calculate_reputation_score("https://EXAMPLE.com/b?x=1")
+        assert first is second
+        assert service.calls == ["example.com"]
+        assert service.cached_score("example.com") is first
+
+    def test_hostname_score_shares_cache(self, service):
+        """Pre-parsed hostnames hit the same cache entry as URLs."""
+        first = service.hostname_score("example.com")
+        second = service.calculate_reputation_score("https://example.com/login")
+        assert first is second
+        assert service.calls == ["example.com"]
+
+    def test_errors_are_not_cached(self, service):
+        """Failed lookups are retried on the next call."""
+        service.calculate_reputation_score("https://broken.example.com")
+        service.calculate_reputation_score("https://broken.example.com")
+        assert service.calls == ["broken.example.com", "broken.example.com"]
+
+    def test_timed_out_signals_are_not_cached(self, service):
+        """Partial scores from timed-out signals are retried on the next call."""
+        service.hostname_score("slow.example.com")
+        service.hostname_score("slow.example.com")
+        assert service.calls == ["slow.example.com", "slow.example.com"]
+        assert service.cached_score("slow.example.com") is None
+
+    def test_invalid_hostname(self, service):
+        """URLs without a hostname get the default score without a lookup."""
+        result = service.calculate_reputation_score("not a url")
+        assert result['total_score'] == 0
+        assert service.calls == []
+
+
+class TestTopDomains:
+    """Test suite for the top-domain membership check."""
+
+    def test_top_domain_and_subdomains(self):
+        """Top domains match directly and through their registered domain."""
+        svc = DomainReputationService()
+        assert svc.is_top_domain("github.com")
+        assert svc.is_top_domain("gist.GitHub.com")
+        assert svc.is_top_domain("aws.amazon.com")
+        assert not svc.is_top_domain("github.com.evil.tk")
+        assert not svc.is_top_domain("localhost")
+
+    def test_popularity_uses_same_predicate(self):
+        """The popularity score is awarded exactly when is_top_domain holds."""
+        svc = DomainReputationService()
+        for hostname in ("github.com", "gist.github.com", "github.com.evil.tk", "localhost"):
+            assert (svc._check_popularity(hostname) == 30) == svc.is_top_domain(hostname)
+
+
+class TestSignalTimeout:
+    """Test suite for network signals that miss the deadline."""
+
+    def test_late_signal_is_marked(self, monkeypatch):
+        """A signal that misses the deadline scores 0 and is listed in timed_out."""
+        svc = DomainReputationService()
+        release = threading.Event()
+
+        def slow_ssl(hostname):
+            release.wait(5)
+            return (20, {'valid': True})
+
+        monkeypatch.setattr(domain_reputation, "SIGNAL_TIMEOUT", 0.05)
+        monkeypatch.setattr(svc, "_lookup_whois", lambda hostname: None)
+        monkeypatch.setattr(svc, "_check_ssl_certificate", slow_ssl)
+        monkeypatch.setattr(svc, "_resolve_dns", lambda hostname, rdtype: None)
+        try:
+            result = svc.hostname_score("example.org")
+        finally:
+            release.set()
+
+        assert result['timed_out'] == ["SSL check"]
+        assert result['breakdown']['ssl_certificate']['score'] == 0
+        assert svc.cached_score("example.org") is None
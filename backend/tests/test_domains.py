@@ -0,0 +1,46 @@
+"""Tests for hostname parsing and registered-domain extraction."""
+from urllib.parse import urlparse
+
+from app.utils.domains import parse_hostname, root_domain
+
+
+class TestRootDomain:
+    """Test suite for root_domain()."""
+
+    def test_two_label_suffix(self):
+        """Country second-level suffixes keep the registrant's label."""
+        assert root_domain("www.bbc.co.uk") == "bbc.co.uk"
+        assert root_domain("mail.google.co.in") == "google.co.in"
+        assert root_domain("bbc.co.uk") == "bbc.co.uk"
+
+    def test_plain_suffix(self):
+        """Ordinary TLDs resolve to the last two labels."""
+        assert root_domain("mail.google.com") == "google.com"
+        assert root_domain("google.com") == "google.com"
+
+    def test_single_label(self):
+        """Hostnames without a dot are returned unchanged."""
+        assert root_domain("localhost") == "localhost"
+        assert root_domain("") == ""
+
+
+class TestParseHostname:
+    """Test suite for parse_hostname()."""
+
+    def test_matches_urlparse(self):
+        """Hostnames agree with urlparse, including userinfo and ports."""
+        for url in [
+            "https://user:pw@Mail.Google.com:443/x?y=1#z",
+            "http://google.com@evil.com/login",
+            "example.com/path",
+            "HTTP://Example.com",
+            "https://[::1]:8080/",
+            "http://bücher.de/",
+        ]:
+            normalized = url if url.startswith(('http://', 'https://')) else 'http://' + url
+            assert parse_hostname(url) == (urlparse(normalized).hostname or '')
+
+    def test_no_host(self):
+        """URLs without a host give an empty string."""
+        assert parse_hostname("http://") == ""
+        assert parse_hostname("") == ""
@@ -0,0 +1,85 @@
+"""Tests for the URL feature extractor."""
+from urllib.parse import urlparse
+
+import pandas as pd
+import pytest
+
+from app.services.feature_extractor import URLFeatureExtractorV2, _split_url
+
+
+URLS = [
+    "https://www.example.com",
+    "http://Example.COM/path/to/page.html?q=1&r=2#frag",
+    "https://user@example.com/a?b#c?d",
+    "https://a@b@example.com/",
+    "http://example.com?redirect=http://evil.com/x",
+    "http://example.com/a;params?x=1",
+    "http://example.com:8080/admin",
+    "https://user:pw@example.com/",
+    "http://[::1]/",
+    "http://host%ZONE/",
+    "http://",
+    " http://example.com/ ",
+    "http://exa\tmple.com/",
+    "http://bücher.de/",
+]
+
+
+class TestSplitURL:
+    """Test suite for _split_url()."""
+
+    @pytest.mark.parametrize("url", URLS)
+    def test_matches_urlparse(self, url):
+        """Every component agrees with urlparse, fast path or not."""
+        parsed = urlparse(url)
+        assert _split_url(url) == (
+            parsed.scheme, parsed.hostname or '', parsed.port,
+            parsed.path, parsed.query, parsed.fragment
+        )
+
+    def test_invalid_port_raises(self):
+        """Malformed ports raise like urlparse(...).port does."""
+        with pytest.raises(ValueError):
+            _split_url("http://example.com:99999/")
+
+
+class TestKeywordFeatures:
+    """Test suite for the brand, shortener and path keyword features."""
+
+    @pytest.fixture
+    def extractor(self):
+        return URLFeatureExtractorV2()
+
+    @pytest.mark.parametrize("url, contains_brand, typosquat", [
+        ("https://www.PayPal.com/signin", 1, 0),
+        ("https://paypal-login.example.net/", 1, 1),
+        ("https://accounts.google.co/", 1, 1),
+        ("https://www.example.com/", 0, 0),
+    ])
+    def test_brand_flags(self, extractor, url, contains_brand, typosquat):
+        features = extractor.extract_features(url)
+        assert features['contains_brand'] == contains_brand
+        assert features['brand_without_official_tld'] == typosquat
+
+    def test_url_shortener(self, extractor):
+        assert extractor.extract_features("https://BIT.LY/abc")['is_url_shortener'] == 1
+        assert extractor.extract_features("https://bitly.example.com/")['is_url_shortener'] == 0
+
+    def test_path_keywords_counted_once_each(self, extractor):
+        features = extractor.extract_features("https://example.com/Login/verify/login")
+        assert features['suspicious_path_keywords'] == 2
+
+
+class TestExtractFeaturesBatch:
+    """Test suite for extract_features_batch()."""
+
+    def test_matches_per_url_frame(self):
+        """The column-built frame equals pandas' frame of the per-URL dicts."""
+        extractor = URLFeatureExtractorV2()
+        features_list = [extractor.extract_features(url) for url in URLS]
+        pd.testing.assert_frame_equal(
+            extractor.extract_features_batch(URLS), pd.DataFrame(features_list)
+        )
+
+    def test_empty(self):
+        assert URLFeatureExtractorV2().extract_features_batch([]).empty
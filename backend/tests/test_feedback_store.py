@@ -0,0 +1,98 @@
+"""Tests for the append-only Feedback Store."""
+import json
+
+import pytest
+from app.services.feedback_store import JSONLAppender, WhitelistStore, read_jsonl
+
+
+@pytest.fixture
+def whitelist_path(tmp_path):
+    return str(tmp_path / "whitelist.jsonl")
+
+
+class TestFeedbackStore:
+    """Test suite for JSONL feedback and whitelist storage."""
+
+    def test_append_writes_one_line_per_record(self, tmp_path):
+        """Each record is appended as its own JSON line."""
+        path = str(tmp_path / "feedback.jsonl")
+        log = JSONLAppender(path)
+        log.append({'url': 'a'})
+        log.append({'url': 'b'})
+        log.close()
+        assert [r['url'] for r in read_jsonl(path)] == ['a', 'b']
+
+    def test_read_skips_torn_lines(self, tmp_path):
+        """A partially written trailing line is ignored."""
+        path = tmp_path / "feedback.jsonl"
+        path.write_text('{"url": "a"}\n{"url": "b\n')
+        assert list(read_jsonl(str(path))) == [{'url': 'a'}]
+
+    def test_whitelist_add_and_reload(self, whitelist_path):
+        """Added domains persist and duplicates are not re-appended."""
+        store = WhitelistStore(whitelist_path)
+        assert store.add('example.com') is True
+        assert store.add('example.com') is False
+        store.close()
+
+        reloaded = WhitelistStore(whitelist_path)
+        assert 'example.com' in reloaded
+        assert len(reloaded) == 1
+
+    def test_whitelist_compacts_on_load(self, whitelist_path, tmp_path):
+        """Duplicate lines and legacy JSON-list entries are merged at load."""
+        legacy = tmp_path / "whitelist.json"
+        legacy.write_text(json.dumps(['old.com']))
+        with open(whitelist_path, 'w') as f:
+            f.write('{"domain": "a.com"}\n{"domain": "a.com"}\n')
+
+        store = WhitelistStore(whitelist_path, legacy_path=str(legacy))
+        assert 'old.com' in store and 'a.com' in store
+        assert sum(1 for _ in read_jsonl(whitelist_path)) == 2
+        # The compaction's temp file was renamed into place, not left behind
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['whitelist.json', 'whitelist.jsonl']
+
+    def test_refresh_sees_other_writers(self, whitelist_path):
+        """Domains appended by another process become visible after refresh."""
+        store = WhitelistStore(whitelist_path, refresh_interval=0)
+        seen = []
+        store.subscribe(seen.append)
+
+        other = WhitelistStore(whitelist_path)
+        other.add('peer.com')
+        other.close()
+
+        assert 'peer.com' in store
+        assert seen == ['peer.com']
+
+    def test_refresh_skips_partial_line(self, whitelist_path):
+        """A line still being written is picked up once it is complete."""
+        store = WhitelistStore(whitelist_path, refresh_interval=0)
+        with open(whitelist_path, 'a') as f:
+            f.write('{"domain": "half')
+        assert 'half.com' not in store
+        with open(whitelist_path, 'a') as f:
+            f.write('.com"}\n')
+        assert 'half.com' in store
+
+    def test_refresh_follows_compacted_file(self, whitelist_path):
+        """A file replaced by another worker's compaction is re-read."""
+        with open(whitelist_path, 'w') as f:
+            f.write('{"domain": "a.com"}\n')
+        store = WhitelistStore(whitelist_path, refresh_interval=0)
+        store.add('first.com')
+        with open(whitelist_path, 'a') as f:
+            f.write('{"domain": "a.com"}\n' * 3)
+        assert 'a.com' in store
+
+        # Loading compacts the duplicates away, shrinking the file
+        other = WhitelistStore(whitelist_path)
+        other.add('peer.com')
+        other.close()
+        assert 'peer.com' in store
+
+        # Our appender writes to the new file, not the replaced one
+        store.add('mine.com')
+        store.close()
+        domains = {r['domain'] for r in read_jsonl(whitelist_path)}
+        assert domains == {'a.com', 'first.com', 'peer.com', 'mine.com'}
@@ -0,0 +1,49 @@
+"""Tests for the ML-First service prediction cache."""
+import pytest
+from app.services.feature_extractor import URLFeatureExtractorV2
+from app.services.ml_service_final import MLServiceFinal
+from app.utils.cache import LRUCache
+
+
+@pytest.fixture
+def service(monkeypatch):
+    # Skip model loading: only the cache layer around _predict_uncached runs
+    svc = MLServiceFinal.__new__(MLServiceFinal)
+    svc._pred_cache = LRUCache(maxsize=100, ttl=60)
+    extractor = URLFeatureExtractorV2()
+    calls = []
+
+    def fake_predict(url, use_reputation):
+        calls.append(url)
+        return {'status': 'LEGITIMATE', 'features': extractor.extract_features(url)}
+
+    monkeypatch.setattr(svc, "_predict_uncached", fake_predict)
+    svc.calls = calls
+    return svc
+
+
+class TestPredictionCache:
+    """Test suite for per-URL prediction caching."""
+
+    def test_repeat_url_is_cached(self, service):
+        """The same URL is predicted once."""
+        service.predict("https://example.com/a")
+        service.predict("https://example.com/a")
+        assert service.calls == ["https://example.com/a"]
+
+    def test_case_variants_are_separate(self, service):
+        """URLs differing only in case have different features and cache entries."""
+        upper = service.predict("HTTPS://Example.com/XN--abc")
+        lower = service.predict("https://example.com/xn--abc")
+        assert upper['features'] != lower['features']
+        assert service.calls == ["HTTPS://Example.com/XN--abc", "https://example.com/xn--abc"]
+
+    def test_batch_shares_cache(self, service):
+        """predict_batch uses the same exact-URL keys as predict."""
+        service.predict("https://example.com/xn--abc")
+        batched = []
+        service._predict_batch_uncached = lambda urls, use_reputation: (
+            batched.extend(urls) or [{'status': 'LEGITIMATE'} for _ in urls]
+        )
+        service.predict_batch(["https://example.com/xn--abc", "HTTPS://Example.com/XN--abc"])
+        assert batched == ["HTTPS://Example.com/XN--abc"]
@@ -0,0 +1,51 @@
+"""Tests for the Model Loader."""
+import json
+
+import joblib
+import numpy as np
+import pytest
+from xgboost import XGBClassifier
+from app.services.feature_extractor import URLFeatureExtractorV2
+from app.services.model_loader import load_feature_names, load_xgb_model, validate_feature_names
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(0)
+    X = rng.random((64, 3)).astype(np.float32)
+    y = (X[:, 0] > 0.5).astype(int)
+    return XGBClassifier(n_estimators=5, max_depth=2).fit(X, y)
+
+
+class TestModelLoader:
+    """Test suite for native and pickled model loading."""
+
+    def test_native_and_pickle_agree(self, model, tmp_path):
+        """A .ubj export scores identically to the pickled model."""
+        model.save_model(str(tmp_path / "m.ubj"))
+        joblib.dump(model, tmp_path / "m.pkl")
+        X = np.array([[0.9, 0.1, 0.2]], dtype=np.float32)
+
+        native = load_xgb_model(str(tmp_path / "m.ubj")).predict_proba(X)
+        pickled = load_xgb_model(str(tmp_path / "m.pkl")).predict_proba(X)
+        assert np.allclose(native, pickled)
+
+    def test_falls_back_to_legacy_pickle(self, model, tmp_path):
+        """A missing native file falls back to the .pkl with the same stem."""
+        joblib.dump(model, tmp_path / "m.pkl")
+        joblib.dump(['a', 'b', 'c'], tmp_path / "names.pkl")
+        assert isinstance(load_xgb_model(str(tmp_path / "m.ubj")), XGBClassifier)
+        assert load_feature_names(str(tmp_path / "names.json")) == ('a', 'b', 'c')
+
+    def test_feature_names_json(self, tmp_path):
+        """Feature names are read from a JSON list."""
+        path = tmp_path / "names.json"
+        path.write_text(json.dumps(['x', 'y']))
+        assert load_feature_names(str(path)) == ('x', 'y')
+
+    def test_validate_feature_names(self):
+        """Validation passes for extractor features and names any missing ones."""
+        extractor = URLFeatureExtractorV2()
+        validate_feature_names(extractor, ('url_length', 'is_https'))
+        with pytest.raises(ValueError, match="not_a_feature"):
+            validate_feature_names(extractor, ('url_length', 'not_a_feature'))
@@ -0,0 +1,47 @@
+"""Tests for the shared model state's reputation helpers."""
+import time
+from concurrent.futures import Future
+
+import pytest
+from app.services.model_state import ModelState
+from app.services.reputation.domain_reputation import DomainReputationService
+
+
+@pytest.fixture
+def state():
+    return ModelState(
+        model=None,
+        booster=None,
+        feature_names=(),
+        feature_index={},
+        feature_getter=None,
+        extractor=None,
+        reputation_service=DomainReputationService(),
+        rep_pool=None,
+        reputation_timeout=0.05
+    )
+
+
+class TestReputationWait:
+    """Test suite for bounded waits on reputation lookups."""
+
+    def test_finished_lookup(self, state):
+        """A completed lookup's result is returned as is."""
+        future = Future()
+        future.set_result({'total_score': 80})
+        assert state.reputation_result("example.com", future) == {'total_score': 80}
+
+    def test_hung_lookup_times_out(self, state):
+        """A lookup that never finishes becomes an error result."""
+        result = state.reputation_result("example.com", Future())
+        assert result['total_score'] == 0
+        assert 'error' in result
+
+    def test_batch_shares_one_deadline(self, state, monkeypatch):
+        """Several hung lookups together wait about one timeout, not one each."""
+        monkeypatch.setattr(state, "reputation_async", lambda domain: Future())
+        state.reputation_timeout = 0.2
+        start = time.monotonic()
+        results = state.lookup_reputations([f"d{i}.com" for i in range(5)])
+        assert time.monotonic() - start < 0.6
+        assert all('error' in result for result in results.values())
@@ -0,0 +1,88 @@
+"""Tests for the Prediction Batcher."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app.services.prediction_batcher import PredictionBatcher
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def batcher(calls):
+    lock = threading.Lock()
+
+    def score_fn(rows):
+        with lock:
+            calls.append(len(rows))
+        return [row['x'] * 2.0 for row in rows]
+
+    b = PredictionBatcher(score_fn, max_batch_size=8, max_wait_ms=20.0)
+    b.start()
+    yield b
+    b.stop()
+
+
+class TestPredictionBatcher:
+    """Test suite for micro-batched scoring."""
+
+    def test_single_submit(self, batcher):
+        """A lone request is scored once the wait window closes."""
+        assert batcher.submit({'x': 1.5}) == 3.0
+
+    def test_results_routed_to_callers(self, batcher):
+        """Each caller receives the score for its own row."""
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            results = list(ex.map(lambda i: batcher.submit({'x': i}), range(32)))
+        assert results == [i * 2.0 for i in range(32)]
+
+    def test_concurrent_calls_are_batched(self, batcher, calls):
+        """Concurrent submissions share model calls, capped at max_batch_size."""
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            list(ex.map(lambda i: batcher.submit({'x': i}), range(32)))
+        assert sum(calls) == 32
+        assert len(calls) < 32
+        assert max(calls) <= 8
+
+    def test_errors_propagate(self):
+        """A failing score function raises in every waiting caller."""
+        def broken(rows):
+            raise RuntimeError("model unavailable")
+
+        b = PredictionBatcher(broken, max_wait_ms=1.0)
+        b.start()
+        try:
+            with pytest.raises(RuntimeError):
+                b.submit({'x': 1})
+        finally:
+            b.stop()
+
+    def test_stop(self, batcher):
+        """Stopping the batcher terminates its thread."""
+        batcher.stop()
+        assert batcher.is_running() is False
+
+    def test_submit_after_stop_scores_directly(self, batcher, calls):
+        """A stopped batcher scores rows in the caller instead of queueing them."""
+        batcher.stop()
+        assert batcher.submit({'x': 2}) == 4.0
+        assert calls == [1]
+
+    def test_unclaimed_row_times_out(self, monkeypatch):
+        """A row nobody drains is withdrawn after result_timeout and scored directly."""
+        b = PredictionBatcher(lambda rows: [row['x'] * 2.0 for row in rows], result_timeout=0.05)
+        # Looks alive, but no thread ever reads the queue
+        monkeypatch.setattr(b, "is_running", lambda: True)
+        assert b.submit({'x': 3}) == 6.0
+
+        # The withdrawn row is skipped once a real thread drains the queue
+        flushed = []
+        b.score_fn = lambda rows: flushed.append(rows) or [0.0] * len(rows)
+        monkeypatch.undo()
+        b.start()
+        assert b.submit({'x': 1}) == 0.0
+        b.stop()
+        assert flushed == [[{'x': 1}]]
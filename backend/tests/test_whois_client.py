@@ -0,0 +1,113 @@
+"""Tests for the port-43 WHOIS client."""
+from datetime import datetime
+
+import pytest
+
+from app.services.reputation import whois_client
+from app.services.reputation.whois_client import parse_date, parse_response
+
+VERISIGN_RESPONSE = """\
+   Domain Name: GOOGLE.COM
+   Registry Domain ID: 2138514_DOMAIN_COM-VRSN
+   Registrar WHOIS Server: whois.markmonitor.com
+   Registrar URL: http://www.markmonitor.com
+   Updated Date: 2019-09-09T15:39:04Z
+   Creation Date: 1997-09-15T04:00:00Z
+   Registry Expiry Date: 2028-09-14T04:00:00Z
+   Registrar: MarkMonitor Inc.
+   Registrar IANA ID: 292
+   Domain Status: clientDeleteProhibited https://icann.org/epp#clientDeleteProhibited
+   Domain Status: serverUpdateProhibited https://icann.org/epp#serverUpdateProhibited
+   Name Server: NS1.GOOGLE.COM
+   Name Server: NS2.GOOGLE.COM
+   Name Server: ns1.google.com
+   DNSSEC: unsigned
+>>> Last update of whois database: 2024-01-01T00:00:00Z <<<
+"""
+
+RIPE_STYLE_RESPONSE = """\
+domain:      example.se
+state:       active
+created:     2001-03-14
+registrar:   Example Registrar AB
+nserver:     ns1.example.se.
+nserver:     ns2.example.se.
+"""
+
+
+class TestParseResponse:
+    """Test suite for parse_response()."""
+
+    def test_registry_fields(self):
+        """Creation date, registrar, name servers and status are extracted."""
+        record = parse_response(VERISIGN_RESPONSE)
+        assert record.creation_date == datetime(1997, 9, 15, 4, 0, 0)
+        assert record.registrar == "MarkMonitor Inc."
+        assert record.name_servers == ["ns1.google.com", "ns2.google.com"]
+        assert record.status[0].startswith("clientDeleteProhibited")
+        assert len(record.status) == 2
+
+    def test_short_key_format(self):
+        """ccTLD-style keys and trailing-dot name servers are understood."""
+        record = parse_response(RIPE_STYLE_RESPONSE)
+        assert record.creation_date == datetime(2001, 3, 14)
+        assert record.registrar == "Example Registrar AB"
+        assert record.name_servers == ["ns1.example.se", "ns2.example.se"]
+        assert record.status == ["active"]
+
+    def test_no_match(self):
+        """An unknown-domain response yields an empty record."""
+        record = parse_response('No match for "NOPE-EXAMPLE.COM".\n')
+        assert record.creation_date is None
+        assert record.registrar is None
+        assert record.name_servers == []
+        assert record.status == []
+
+
+class TestParseDate:
+    """Test suite for parse_date()."""
+
+    def test_formats(self):
+        """Common registry date formats parse to naive datetimes."""
+        assert parse_date("2001-03-14T10:00:00+02:00") == datetime(2001, 3, 14, 10, 0)
+        assert parse_date("14-Mar-2001") == datetime(2001, 3, 14)
+        assert parse_date("2001.03.14") == datetime(2001, 3, 14)
+
+    def test_unrecognized(self):
+        assert parse_date("before the web") is None
+
+
+class TestLookup:
+    """Test suite for lookup() against a stubbed socket query."""
+
+    @pytest.fixture
+    def queries(self, monkeypatch):
+        sent = []
+        responses = {
+            whois_client.IANA_WHOIS_SERVER: "refer:        whois.verisign-grs.com\n",
+            "whois.verisign-grs.com": VERISIGN_RESPONSE,
+        }
+
+        def fake_query(server, text, timeout=whois_client.WHOIS_TIMEOUT):
+            sent.append((server, text))
+            return responses[server]
+
+        whois_client.whois_server.cache_clear()
+        monkeypatch.setattr(whois_client, "query", fake_query)
+        yield sent
+        whois_client.whois_server.cache_clear()
+
+    def test_queries_registered_domain(self, queries):
+        """Subdomains are looked up by their registered domain."""
+        record = whois_client.lookup("mail.Google.com")
+        assert record.registrar == "MarkMonitor Inc."
+        assert queries == [
+            (whois_client.IANA_WHOIS_SERVER, "com"),
+            ("whois.verisign-grs.com", "google.com"),
+        ]
+
+    def test_server_cached_per_tld(self, queries):
+        """IANA is asked for a TLD's server only once."""
+        whois_client.lookup("google.com")
+        whois_client.lookup("example.com")
+        assert [server for server, _ in queries].count(whois_client.IANA_WHOIS_SERVER) == 1
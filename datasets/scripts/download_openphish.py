@@ -20,39 +20,34 @@ def download_openphish():
     print("⏳ Downloading...\n")
     
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        urls = response.text.strip().split('\n')
-        urls = [u.strip() for u in urls if u.strip()]
-        
-        print(f" Downloaded {len(urls)} phishing URLs")
-        
-        # Save as text file
         txt_path = '../raw/openphish.txt'
-        with open(txt_path, 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        
-        print(f" Saved to: {txt_path}")
-        
-        # Also save as CSV for consistency
         csv_path = '../raw/openphish.csv'
-        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['url', 'label', 'source', 'download_date'])
-            
-            for url in urls:
-                writer.writerow([
-                    url,
-                    'malicious',
-                    'openphish',
-                    datetime.now().strftime('%Y-%m-%d')
-                ])
+        today = datetime.now().strftime('%Y-%m-%d')
+        count = 0
         
+        # Stream the feed line by line into the text and CSV files in one pass
+        with requests.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            
+            with open(txt_path, 'w', encoding='utf-8') as txt, \
+                    open(csv_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['url', 'label', 'source', 'download_date'])
+                
+                for line in response.iter_lines():
+                    phish_url = line.decode('utf-8', errors='replace').strip()
+                    if not phish_url:
+                        continue
+                    txt.write(phish_url + '\n')
+                    writer.writerow([phish_url, 'malicious', 'openphish', today])
+                    count += 1
+        
+        print(f" Downloaded {count} phishing URLs")
+        print(f" Saved to: {txt_path}")
         print(f" CSV saved to: {csv_path}")
-        print(f" Total phishing URLs: {len(urls)}")
+        print(f" Total phishing URLs: {count}")
         
-        return len(urls)
+        return count
         
     except requests.exceptions.RequestException as e:
         print(f" Error downloading OpenPhish data: {e}")
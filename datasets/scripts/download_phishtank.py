@@ -3,10 +3,16 @@
 Download PhishTank verified phishing URLs
 """
 import requests
-import json
 import csv
-from datetime import datetime
+import json
 import os
+import shutil
+
+try:
+    import ijson
+except ImportError:
+    # Optional: without it the feed is parsed with json.load, in memory
+    ijson = None
 
 def download_phishtank():
     print("=" * 60)
@@ -23,20 +29,28 @@ def download_phishtank():
     print("⏳ This may take a minute...\n")
     
     try:
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
+        json_path = '../raw/phishtank.json'
+        csv_path = '../raw/phishtank.csv'
         
-        data = response.json()
+        # Stream the (multi-megabyte) feed straight to disk instead of
+        # buffering it in memory; this file is also the raw JSON reference copy
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with open(json_path, 'wb') as f:
+                shutil.copyfileobj(response.raw, f, 1 << 16)
         
-        print(f" Downloaded {len(data)} phishing URLs")
+        print(f" Raw JSON saved to: {json_path}")
         
-        # Save to CSV
-        csv_path = '../raw/phishtank.csv'
-        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        # Parse the array one entry at a time into the CSV
+        count = 0
+        with open(json_path, 'rb') as src, \
+                open(csv_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerow(['url', 'label', 'source', 'verified', 'submission_time', 'phish_id'])
             
-            for entry in data:
+            entries = ijson.items(src, 'item') if ijson else json.load(src)
+            for entry in entries:
                 writer.writerow([
                     entry.get('url', ''),
                     'malicious',
@@ -45,18 +59,13 @@ def download_phishtank():
                     entry.get('submission_time', ''),
                     entry.get('phish_id', '')
                 ])
+                count += 1
         
+        print(f" Downloaded {count} phishing URLs")
         print(f" Saved to: {csv_path}")
-        print(f" Total phishing URLs: {len(data)}")
-        
-        # Also save raw JSON for reference
-        json_path = '../raw/phishtank.json'
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
-        
-        print(f" Raw JSON saved to: {json_path}")
+        print(f" Total phishing URLs: {count}")
         
-        return len(data)
+        return count
         
     except requests.exceptions.RequestException as e:
         print(f" Error downloading PhishTank data: {e}")
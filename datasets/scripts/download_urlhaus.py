@@ -5,6 +5,7 @@ Download URLhaus malware distribution URLs
 import requests
 import csv
 import os
+import shutil
 from datetime import datetime
 
 def download_urlhaus():
@@ -20,28 +21,34 @@ def download_urlhaus():
     print("⏳ Downloading...\n")
     
     try:
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
-        
-        # Save raw CSV
+        # Stream the dump straight to disk as the raw CSV
         csv_path = '../raw/urlhaus.csv'
-        with open(csv_path, 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        
-        # Count URLs (skip comment lines)
-        lines = response.text.strip().split('\n')
-        urls = [line for line in lines if not line.startswith('#') and line.strip()]
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with open(csv_path, 'wb') as f:
+                shutil.copyfileobj(response.raw, f, 1 << 16)
         
-        print(f" Downloaded {len(urls)} malware URLs")
         print(f" Saved to: {csv_path}")
         
-        # Create cleaned version
+        # Create cleaned version, reading the dump one line at a time
         cleaned_path = '../raw/urlhaus_cleaned.csv'
-        with open(cleaned_path, 'w', newline='', encoding='utf-8') as f:
+        today = datetime.now().strftime('%Y-%m-%d')
+        count = 0  # non-comment lines, header included
+        with open(csv_path, 'r', newline='', encoding='utf-8', errors='replace') as src, \
+                open(cleaned_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerow(['url', 'label', 'source', 'download_date'])
             
-            for line in urls[1:]:  # Skip header
+            for line in src:
+                line = line.rstrip('\n')
+                # Skip comment and blank lines
+                if line.startswith('#') or not line.strip():
+                    continue
+                count += 1
+                if count == 1:  # Skip header
+                    continue
+                
                 parts = line.split(',', 1)
                 if len(parts) > 0 and parts[0].strip():
                     # URLhaus format: id,dateadded,url,...
@@ -49,17 +56,13 @@ def download_urlhaus():
                     cols = line.split('","')
                     if len(cols) > 2:
                         url_field = cols[2].strip('"')
-                        writer.writerow([
-                            url_field,
-                            'malicious',
-                            'urlhaus',
-                            datetime.now().strftime('%Y-%m-%d')
-                        ])
+                        writer.writerow([url_field, 'malicious', 'urlhaus', today])
         
+        print(f" Downloaded {count} malware URLs")
         print(f" Cleaned CSV saved to: {cleaned_path}")
-        print(f" Total malware URLs: {len(urls) - 1}")
+        print(f" Total malware URLs: {count - 1}")
         
-        return len(urls) - 1
+        return count - 1
         
     except requests.exceptions.RequestException as e:
         print(f" Error downloading URLhaus data: {e}")
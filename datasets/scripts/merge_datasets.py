@@ -4,9 +4,61 @@ Merge all datasets into train/validation/test splits
 """
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
+from pandas.api.types import union_categoricals
 import os
 
+# Only these columns are merged; parsing just them (label/source as
+# categories) skips the unused rank/date columns entirely
+MERGE_COLUMNS = ['url', 'label', 'source']
+MERGE_DTYPES = {'url': str, 'label': 'category', 'source': 'category'}
+
+
+def read_urls(path):
+    """Read the merged columns of one downloaded URL list"""
+    # memory_map parses straight from the mapped file instead of copying it
+    # through read buffers first
+    return pd.read_csv(path, usecols=MERGE_COLUMNS, dtype=MERGE_DTYPES, memory_map=True)[MERGE_COLUMNS]
+
+
+def concat_urls(frames):
+    """
+    Concatenate URL lists, keeping label and source categorical
+
+    pd.concat turns categoricals with differing categories (every feed has
+    its own source) into object columns of one pointer per row; giving all
+    frames the union of the categories first keeps them one byte per row.
+    """
+    for column in ('label', 'source'):
+        categories = union_categoricals([frame[column] for frame in frames]).categories
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def sample_positions(n_rows, n):
+    """Row positions DataFrame.sample(n=n, random_state=42) picks from n_rows rows"""
+    return np.random.RandomState(42).choice(n_rows, size=n, replace=False)
+
+
+def split_positions(class_positions, seed=42):
+    """
+    Stratified 70/15/15 train/validation/test split of row positions
+
+    Each class's positions are shuffled once and sliced, so every split
+    keeps the class proportions; each split is then shuffled so the
+    classes are interleaved.
+    """
+    rng = np.random.default_rng(seed)
+    splits = ([], [], [])
+    for positions in class_positions:
+        positions = rng.permutation(positions)
+        n_train = int(0.70 * len(positions))
+        n_val = int(0.15 * len(positions))
+        bounds = (0, n_train, n_train + n_val, len(positions))
+        for split, start, end in zip(splits, bounds, bounds[1:]):
+            split.append(positions[start:end])
+    return [rng.permutation(np.concatenate(parts)) for parts in splits]
+
 def merge_datasets():
     print("=" * 60)
     print(" MERGING DATASETS")
@@ -19,59 +71,53 @@ def merge_datasets():
     
     # PhishTank
     if os.path.exists('../raw/phishtank.csv'):
-        df_phish = pd.read_csv('../raw/phishtank.csv')
-        df_phish = df_phish[['url', 'label', 'source']]
+        df_phish = read_urls('../raw/phishtank.csv')
         malicious_dfs.append(df_phish)
         print(f"   PhishTank: {len(df_phish)} URLs")
     
     # OpenPhish
     if os.path.exists('../raw/openphish.csv'):
-        df_open = pd.read_csv('../raw/openphish.csv')
-        df_open = df_open[['url', 'label', 'source']]
+        df_open = read_urls('../raw/openphish.csv')
         malicious_dfs.append(df_open)
         print(f"   OpenPhish: {len(df_open)} URLs")
     
     # URLhaus
     if os.path.exists('../raw/urlhaus_cleaned.csv'):
-        df_haus = pd.read_csv('../raw/urlhaus_cleaned.csv')
-        df_haus = df_haus[['url', 'label', 'source']]
+        df_haus = read_urls('../raw/urlhaus_cleaned.csv')
         malicious_dfs.append(df_haus)
         print(f"   URLhaus: {len(df_haus)} URLs")
     
     # Combine malicious
-    df_malicious = pd.concat(malicious_dfs, ignore_index=True)
-    print(f"\n Total malicious URLs: {len(df_malicious)}")
+    n_malicious = sum(len(df) for df in malicious_dfs)
+    print(f"\n Total malicious URLs: {n_malicious}")
     
     # Read legitimate URLs
     print("\n Reading legitimate URLs...")
-    df_legitimate = pd.read_csv('../raw/legitimate_urls.csv')
-    df_legitimate = df_legitimate[['url', 'label', 'source']]
+    df_legitimate = read_urls('../raw/legitimate_urls.csv')
     print(f"   Legitimate: {len(df_legitimate)} URLs")
     
-    # Balance the dataset
+    # All rows in one frame: malicious first, legitimate after
+    df_all = concat_urls(malicious_dfs + [df_legitimate])
+    
+    # Balance and split on row positions and gather each split's rows once
+    # at the end, instead of materializing the sampled and combined frames
     print("\n  Balancing dataset...")
-    min_count = min(len(df_malicious), len(df_legitimate))
+    min_count = min(n_malicious, len(df_legitimate))
     print(f"  Sampling {min_count} URLs from each class")
     
-    df_malicious_balanced = df_malicious.sample(n=min_count, random_state=42)
-    df_legitimate_balanced = df_legitimate.sample(n=min_count, random_state=42)
-    
-    # Combine
-    df_combined = pd.concat([df_malicious_balanced, df_legitimate_balanced], ignore_index=True)
-    
-    # Shuffle
-    df_combined = df_combined.sample(frac=1, random_state=42).reset_index(drop=True)
+    malicious_pos = sample_positions(n_malicious, min_count)
+    legitimate_pos = n_malicious + sample_positions(len(df_legitimate), min_count)
     
-    print(f"\n Final dataset size: {len(df_combined)} URLs")
-    print(f"  - Malicious: {len(df_malicious_balanced)}")
-    print(f"  - Legitimate: {len(df_legitimate_balanced)}")
+    print(f"\n Final dataset size: {len(malicious_pos) + len(legitimate_pos)} URLs")
+    print(f"  - Malicious: {len(malicious_pos)}")
+    print(f"  - Legitimate: {len(legitimate_pos)}")
     
     # Split into train/val/test
     print("\n  Splitting into train/validation/test...")
     
     # 70% train, 15% validation, 15% test
-    train_val, test = train_test_split(df_combined, test_size=0.15, random_state=42, stratify=df_combined['label'])
-    train, val = train_test_split(train_val, test_size=0.176, random_state=42, stratify=train_val['label'])  # 0.176 * 0.85 ≈ 0.15
+    train_pos, val_pos, test_pos = split_positions([malicious_pos, legitimate_pos])
+    train, val, test = (df_all.iloc[pos] for pos in (train_pos, val_pos, test_pos))
     
     print(f"   Train: {len(train)} URLs")
     print(f"   Validation: {len(val)} URLs")
@@ -97,8 +143,9 @@ def merge_datasets():
     
     for name, df in [('Train', train), ('Validation', val), ('Test', test)]:
         total = len(df)
-        malicious = len(df[df['label'] == 'malicious'])
-        legitimate = len(df[df['label'] == 'legitimate'])
+        counts = df['label'].value_counts()
+        malicious = counts.get('malicious', 0)
+        legitimate = counts.get('legitimate', 0)
         print(f"{name:<15} {total:<10} {malicious:<12} {legitimate:<12}")
     
     print("=" * 60)
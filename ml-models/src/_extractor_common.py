@@ -0,0 +1,116 @@
+"""
+Helpers shared by the URL feature extractors (feature_extractor and
+feature_extractor_v2)
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+# Batches at least this large are split across worker processes
+PARALLEL_BATCH_MIN = 1000
+
+_IP_RE = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
+
+# Scheme, netloc, path, query and fragment of a plain http(s) URL
+_URL_RE = re.compile(r'(https?)://([^/?#]*)([^?#]*)(?:\?([^#]*))?(?:#(.*))?')
+# Characters urlparse strips or removes anywhere in a URL
+_URL_CONTROL_RE = re.compile(r'[\x00-\x20\x7f]')
+# Netloc characters urlparse validates or splits on (IPv6 brackets, %zone, port)
+_NETLOC_SLOW_PATH_RE = re.compile(r'[\[\]%:]')
+
+def _split_url(url):
+    """
+    (scheme, hostname, port, path, query, fragment) of url, exactly as
+    urlparse reports them (hostname lowercased, '' if missing); plain ASCII
+    URLs are split with one regex, anything unusual goes through urlparse
+    """
+    if url.isascii() and not _URL_CONTROL_RE.search(url):
+        match = _URL_RE.match(url)
+        # urlparse splits ;params off the path
+        if match and not _NETLOC_SLOW_PATH_RE.search(match.group(2)) and ';' not in match.group(3):
+            scheme, netloc, path, query, fragment = match.groups('')
+            return scheme, netloc.rpartition('@')[2].lower(), None, path, query, fragment
+    
+    parsed = urlparse(url)
+    return (parsed.scheme, parsed.hostname or '', parsed.port,
+            parsed.path, parsed.query, parsed.fragment)
+
+def _count_digits(text):
+    """Number of str.isdigit() characters in text"""
+    # Ten C-level str.count passes beat a per-character isdigit call; only
+    # ASCII text is guaranteed to have no other Unicode digits
+    if text.isascii():
+        return sum(map(text.count, '0123456789'))
+    return sum(map(str.isdigit, text))
+
+def _is_ip_address(hostname):
+    """Check if hostname is an IP address"""
+    # Most hostnames end in a letter TLD; skip the regex for those
+    return hostname[-1:].isdigit() and _IP_RE.match(hostname) is not None
+
+def _compact_frame(frame):
+    """
+    Downcast a feature frame in place: integer columns to the smallest
+    integer type holding their values, float columns to float32
+
+    XGBoost stores training data as float32 anyway, so the model sees the
+    same values while the batch takes a fraction of the memory.
+    """
+    for name, dtype in frame.dtypes.items():
+        if dtype.kind == 'i':
+            frame[name] = pd.to_numeric(frame[name], downcast='integer')
+        elif dtype.kind == 'f':
+            frame[name] = frame[name].astype(np.float32)
+    return frame
+
+def _features_frame(features_list):
+    """
+    DataFrame of feature dicts (one row per dict, columns in key order)
+
+    Built column by column: each column is gathered with one itemgetter
+    pass and becomes a single NumPy array, instead of pandas walking every
+    dict key by key. Dicts that do not all share the first one's keys fall
+    back to pd.DataFrame's own handling.
+    """
+    if features_list:
+        keys = list(features_list[0])
+        if len(keys) > 1 and all(len(features) == len(keys) for features in features_list):
+            try:
+                columns = zip(*map(itemgetter(*keys), features_list))
+                return pd.DataFrame(dict(zip(keys, map(np.array, columns))))
+            except KeyError:
+                pass
+    return pd.DataFrame(features_list)
+
+class BatchFeatureExtractor:
+    """Batch extraction for extractors defining extract_features(url)"""
+    
+    def extract_features_batch(self, urls, n_jobs=None):
+        """
+        Extract features from a list of URLs
+        
+        Extraction is per-URL Python work, so large batches are split into
+        chunks and run on n_jobs worker processes (default: one per CPU);
+        rows come back in input order. Columns come back downcast (small
+        integer types, float32).
+        """
+        urls = list(urls)
+        n_jobs = n_jobs or os.cpu_count() or 1
+        if n_jobs <= 1 or len(urls) < PARALLEL_BATCH_MIN:
+            return _compact_frame(self._extract_chunk(urls))
+        
+        # A few chunks per worker keeps them evenly loaded
+        chunk_size = -(-len(urls) // (n_jobs * 4))
+        chunks = [urls[i:i + chunk_size] for i in range(0, len(urls), chunk_size)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            frames = list(pool.map(self._extract_chunk, chunks))
+        return _compact_frame(pd.concat(frames, ignore_index=True))
+    
+    def _extract_chunk(self, urls):
+        """Extract one chunk of URLs into a DataFrame"""
+        return _features_frame([self.extract_features(url) for url in urls])
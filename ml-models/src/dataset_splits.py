@@ -0,0 +1,13 @@
+"""
+Reading the processed train/validation/test splits
+"""
+import pandas as pd
+
+# The processed splits are only read for their URL and label; parsing just
+# those columns (label as a category) skips the source column entirely
+SPLIT_COLUMNS = ['url', 'label']
+SPLIT_DTYPES = {'url': str, 'label': 'category'}
+
+def read_split(path):
+    """URL and label columns of a processed split CSV"""
+    return pd.read_csv(path, usecols=SPLIT_COLUMNS, dtype=SPLIT_DTYPES)
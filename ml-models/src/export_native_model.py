@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Export a pickled XGBoost model to XGBoost's native format
+
+Converts backend/app/ml_models/xgboost_model.pkl + feature_names.pkl
+(written by older training scripts) into xgboost_model.ubj +
+feature_names.json, which the backend loads faster and which survive
+XGBoost upgrades.
+
+Usage:
+  python export_native_model.py [model_dir]
+"""
+import sys
+import os
+import json
+
+import joblib
+
+
+def main():
+    default_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'backend', 'app', 'ml_models')
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else default_dir
+
+    model = joblib.load(os.path.join(model_dir, 'xgboost_model.pkl'))
+    feature_names = joblib.load(os.path.join(model_dir, 'feature_names.pkl'))
+
+    model_path = os.path.join(model_dir, 'xgboost_model.ubj')
+    names_path = os.path.join(model_dir, 'feature_names.json')
+
+    model.save_model(model_path)
+    with open(names_path, 'w') as f:
+        json.dump(list(feature_names), f, indent=2)
+
+    print(f"  Saved: {model_path}")
+    print(f"  Saved: {names_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+On-disk cache of extracted training features
+
+Feature extraction is the slowest stage of every training script, and
+reruns (tuning parameters, comparing v1 against v2) usually extract the
+same URLs with the same extractor again. Frames are stored per extractor
+under ml-models/cache, keyed by the URL list and the source of the
+extractor module and the local helper modules it uses, so changing either
+the data or the extractor code means a fresh extraction.
+"""
+import hashlib
+import os
+import sys
+
+import pandas as pd
+
+FEATURE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache')
+
+def _source_files(module):
+    """module's file plus those of sibling modules its functions and classes come from"""
+    directory = os.path.dirname(os.path.abspath(module.__file__))
+    files = {os.path.abspath(module.__file__)}
+    for value in vars(module).values():
+        source = sys.modules.get(getattr(value, '__module__', None) or '')
+        path = getattr(source, '__file__', None)
+        if path and os.path.dirname(os.path.abspath(path)) == directory:
+            files.add(os.path.abspath(path))
+    return sorted(files)
+
+def feature_cache_path(extractor, urls, cache_dir=FEATURE_CACHE_DIR):
+    """Cache file for the features extractor produces for urls"""
+    module = sys.modules[type(extractor).__module__]
+    digest = hashlib.sha1()
+    for path in _source_files(module):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    digest.update(type(extractor).__qualname__.encode())
+    for url in urls:
+        digest.update(b'\n')
+        digest.update(url.encode('utf-8', errors='surrogatepass'))
+    name = module.__name__.rsplit('.', 1)[-1]
+    return os.path.join(cache_dir, f"{name}_{digest.hexdigest()[:16]}.pkl")
+
+def cached_features_batch(extractor, urls, cache_dir=FEATURE_CACHE_DIR):
+    """extractor.extract_features_batch(urls), loaded from the cache when present"""
+    cache_path = feature_cache_path(extractor, urls, cache_dir)
+    if os.path.exists(cache_path):
+        print(f" Loading cached features from {cache_path}")
+        return pd.read_pickle(cache_path)
+
+    features_df = extractor.extract_features_batch(urls)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Pickle round-trips the compacted column dtypes exactly
+    features_df.to_pickle(cache_path)
+    print(f" Cached features to {cache_path}")
+    return features_df
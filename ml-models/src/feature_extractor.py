@@ -4,24 +4,28 @@ Feature extraction from URLs for ML model training
 import re
 import math
 from urllib.parse import urlparse
-import pandas as pd
-import numpy as np
 
-class URLFeatureExtractor:
+from _extractor_common import BatchFeatureExtractor, _count_digits, _is_ip_address, _split_url
+
+_TOKEN_SPLIT_RE = re.compile(r'[.\-_]')
+
+class URLFeatureExtractor(BatchFeatureExtractor):
     """Extract features from URLs for machine learning"""
     
     def __init__(self):
-        self.suspicious_tlds = ['tk', 'ml', 'ga', 'cf', 'gq', 'work', 'click', 'link']
+        self.suspicious_tlds = frozenset(['tk', 'ml', 'ga', 'cf', 'gq', 'work', 'click', 'link'])
         self.brand_keywords = ['paypal', 'google', 'facebook', 'amazon', 'microsoft', 
                                'apple', 'netflix', 'instagram', 'twitter', 'linkedin']
+        # contains_brand only needs to know whether any keyword occurs, which
+        # one regex search answers in a single C-level scan
+        self._brand_re = re.compile('|'.join(map(re.escape, self.brand_keywords)))
     
     def extract_features(self, url):
         """Extract all features from a single URL"""
         try:
-            parsed = urlparse(url)
-            hostname = parsed.hostname or parsed.netloc
-            path = parsed.path
-            query = parsed.query
+            scheme, hostname, port, path, query, fragment = _split_url(url)
+            # urlparse's netloc stands in when there is no hostname
+            hostname = hostname or urlparse(url).netloc
             
             features = {}
             
@@ -46,17 +50,19 @@ class URLFeatureExtractor:
             features['num_percent'] = url.count('%')
             
             # Digit features
-            features['num_digits'] = sum(c.isdigit() for c in url)
+            features['num_digits'] = _count_digits(url)
             features['digit_ratio'] = features['num_digits'] / len(url) if len(url) > 0 else 0
             
             # === HOSTNAME FEATURES ===
             if hostname:
+                hostname_lower = hostname.lower()
+                
                 # Subdomain count
                 parts = hostname.split('.')
                 features['subdomain_count'] = len(parts) - 2 if len(parts) >= 2 else 0
                 
                 # IP address check
-                features['is_ip_address'] = 1 if self._is_ip_address(hostname) else 0
+                features['is_ip_address'] = 1 if _is_ip_address(hostname) else 0
                 
                 # TLD features
                 tld = parts[-1] if len(parts) > 0 else ''
@@ -67,17 +73,18 @@ class URLFeatureExtractor:
                 features['hostname_entropy'] = self._calculate_entropy(hostname)
                 
                 # Contains suspicious words
-                features['has_https_in_hostname'] = 1 if 'https' in hostname.lower() else 0
-                features['has_http_in_hostname'] = 1 if 'http' in hostname.lower() else 0
-                features['has_www_count'] = hostname.lower().count('www')
+                features['has_https_in_hostname'] = 1 if 'https' in hostname_lower else 0
+                features['has_http_in_hostname'] = 1 if 'http' in hostname_lower else 0
+                features['has_www_count'] = hostname_lower.count('www')
                 
                 # Brand keywords
-                features['contains_brand'] = 1 if any(brand in hostname.lower() for brand in self.brand_keywords) else 0
+                features['contains_brand'] = 1 if self._brand_re.search(hostname_lower) else 0
                 
                 # Longest token in hostname
-                tokens = re.split(r'[.\-_]', hostname)
-                features['longest_token_length'] = max([len(t) for t in tokens]) if tokens else 0
-                features['avg_token_length'] = np.mean([len(t) for t in tokens]) if tokens else 0
+                tokens = _TOKEN_SPLIT_RE.split(hostname)
+                token_lengths = [len(t) for t in tokens]
+                features['longest_token_length'] = max(token_lengths) if tokens else 0
+                features['avg_token_length'] = sum(token_lengths) / len(token_lengths) if tokens else 0
             else:
                 # Default values if no hostname
                 features['subdomain_count'] = 0
@@ -93,13 +100,13 @@ class URLFeatureExtractor:
                 features['avg_token_length'] = 0
             
             # === PROTOCOL FEATURES ===
-            features['is_https'] = 1 if parsed.scheme == 'https' else 0
-            features['has_port'] = 1 if parsed.port else 0
-            features['port_number'] = parsed.port if parsed.port else 0
+            features['is_https'] = 1 if scheme == 'https' else 0
+            features['has_port'] = 1 if port else 0
+            features['port_number'] = port if port else 0
             
             # === PATH FEATURES ===
             features['path_token_count'] = len([t for t in path.split('/') if t])
-            features['has_fragment'] = 1 if parsed.fragment else 0
+            features['has_fragment'] = 1 if fragment else 0
             
             # === QUERY FEATURES ===
             features['query_param_count'] = len(query.split('&')) if query else 0
@@ -118,11 +125,6 @@ class URLFeatureExtractor:
             # Return default features on error
             return self._get_default_features()
     
-    def _is_ip_address(self, hostname):
-        """Check if hostname is an IP address"""
-        ip_pattern = r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$'
-        return bool(re.match(ip_pattern, hostname))
-    
     def _calculate_entropy(self, text):
         """Calculate Shannon entropy"""
         if not text:
@@ -157,13 +159,6 @@ class URLFeatureExtractor:
             'has_fragment': 0, 'query_param_count': 0, 'has_double_slash': 0,
             'prefix_suffix_count': 0, 'has_punycode': 0
         }
-    
-    def extract_features_batch(self, urls):
-        """Extract features from a list of URLs"""
-        features_list = []
-        for url in urls:
-            features_list.append(self.extract_features(url))
-        return pd.DataFrame(features_list)
 
 # Test the feature extractor
 if __name__ == '__main__':
@@ -4,17 +4,33 @@ Fixes false positives and adds better features
 """
 import re
 import math
-from urllib.parse import urlparse
-import pandas as pd
-import numpy as np
 from collections import Counter
 
-class URLFeatureExtractorV2:
+from _extractor_common import BatchFeatureExtractor, _count_digits, _is_ip_address, _split_url
+
+_TOKEN_SPLIT_RE = re.compile(r'[.\-_]')
+
+# Brands whose appearance outside their official domain suggests typosquatting
+_BRAND_OFFICIAL_DOMAINS = {
+    'paypal': 'paypal.com',
+    'google': 'google.com',
+    'facebook': 'facebook.com',
+    'amazon': 'amazon.com',
+    'microsoft': 'microsoft.com'
+}
+
+_URL_SHORTENERS = ['bit.ly', 'tinyurl.com', 'goo.gl', 'ow.ly', 't.co',
+                   'buff.ly', 'is.gd', 'cli.gs', 'tiny.cc']
+# One C-level scan instead of a Python-level `in` test per shortener
+_URL_SHORTENER_RE = re.compile('|'.join(map(re.escape, _URL_SHORTENERS)))
+
+
+class URLFeatureExtractorV2(BatchFeatureExtractor):
     """Enhanced feature extraction with better discriminative features"""
     
     def __init__(self):
-        self.suspicious_tlds = ['tk', 'ml', 'ga', 'cf', 'gq', 'work', 'click', 
-                                'link', 'download', 'top', 'stream', 'bid', 'date']
+        self.suspicious_tlds = frozenset(['tk', 'ml', 'ga', 'cf', 'gq', 'work', 'click', 
+                                          'link', 'download', 'top', 'stream', 'bid', 'date'])
         
         self.brand_keywords = ['paypal', 'google', 'facebook', 'amazon', 'microsoft', 
                                'apple', 'netflix', 'instagram', 'twitter', 'linkedin',
@@ -24,7 +40,11 @@ class URLFeatureExtractorV2:
                                     'confirm', 'suspended', 'locked', 'unusual', 'activity']
         
         # Common legitimate TLDs
-        self.common_tlds = ['com', 'org', 'net', 'edu', 'gov', 'co', 'io', 'ai']
+        self.common_tlds = frozenset(['com', 'org', 'net', 'edu', 'gov', 'co', 'io', 'ai'])
+        
+        # contains_brand only needs to know whether any keyword occurs, which
+        # one regex search answers in a single C-level scan
+        self._brand_re = re.compile('|'.join(map(re.escape, self.brand_keywords)))
     
     def extract_features(self, url):
         """Extract improved features from URL"""
@@ -33,10 +53,8 @@ class URLFeatureExtractorV2:
             if not url.startswith(('http://', 'https://')):
                 url = 'http://' + url
             
-            parsed = urlparse(url)
-            hostname = parsed.hostname if parsed.hostname else ''
-            path = parsed.path if parsed.path else '/'
-            query = parsed.query if parsed.query else ''
+            scheme, hostname, port, path, query, fragment = _split_url(url)
+            path = path if path else '/'
             
             features = {}
             
@@ -68,11 +86,12 @@ class URLFeatureExtractorV2:
             features['num_percent'] = url.count('%')
             
             # DIGIT FEATURES 
-            features['num_digits'] = sum(c.isdigit() for c in url)
+            features['num_digits'] = _count_digits(url)
             features['digit_ratio'] = features['num_digits'] / len(url) if len(url) > 0 else 0
-            features['digits_in_hostname'] = sum(c.isdigit() for c in hostname)
+            features['digits_in_hostname'] = sum(map(str.isdigit, hostname))
             
             # HOSTNAME ANALYSIS 
+            hostname_lower = hostname.lower()
             if hostname:
                 parts = hostname.split('.')
                 
@@ -81,7 +100,7 @@ class URLFeatureExtractorV2:
                 features['has_subdomain'] = 1 if len(parts) > 2 else 0
                 
                 # IP address
-                features['is_ip_address'] = 1 if self._is_ip_address(hostname) else 0
+                features['is_ip_address'] = 1 if _is_ip_address(hostname) else 0
                 
                 # TLD analysis
                 tld = parts[-1].lower() if len(parts) > 0 else ''
@@ -94,20 +113,21 @@ class URLFeatureExtractorV2:
                 features['high_entropy'] = 1 if features['hostname_entropy'] > 4.0 else 0
                 
                 # Deceptive patterns
-                features['has_https_in_hostname'] = 1 if 'https' in hostname.lower() else 0
-                features['has_http_in_hostname'] = 1 if 'http' in hostname.lower() else 0
-                features['has_www_count'] = hostname.lower().count('www')
+                features['has_https_in_hostname'] = 1 if 'https' in hostname_lower else 0
+                features['has_http_in_hostname'] = 1 if 'http' in hostname_lower else 0
+                features['has_www_count'] = hostname_lower.count('www')
                 
                 # Brand impersonation
-                features['contains_brand'] = 1 if any(brand in hostname.lower() for brand in self.brand_keywords) else 0
+                features['contains_brand'] = 1 if self._brand_re.search(hostname_lower) else 0
                 
                 # NEW: Brand typosquatting detection
-                features['brand_without_official_tld'] = self._check_brand_typosquat(hostname)
+                features['brand_without_official_tld'] = self._check_brand_typosquat(hostname_lower)
                 
                 # Token analysis
-                tokens = re.split(r'[.\-_]', hostname)
-                features['longest_token_length'] = max([len(t) for t in tokens]) if tokens else 0
-                features['avg_token_length'] = np.mean([len(t) for t in tokens]) if tokens else 0
+                tokens = _TOKEN_SPLIT_RE.split(hostname)
+                token_lengths = [len(t) for t in tokens]
+                features['longest_token_length'] = max(token_lengths) if tokens else 0
+                features['avg_token_length'] = sum(token_lengths) / len(token_lengths) if tokens else 0
                 features['num_tokens'] = len(tokens)
                 
                 # NEW: Consonant-vowel ratio (random domains have unusual ratios)
@@ -118,18 +138,19 @@ class URLFeatureExtractorV2:
                 self._set_hostname_defaults(features)
             
             # === PROTOCOL FEATURES ===
-            features['is_https'] = 1 if parsed.scheme == 'https' else 0
-            features['has_port'] = 1 if parsed.port else 0
-            features['unusual_port'] = 1 if parsed.port and parsed.port not in [80, 443, 8080] else 0
+            features['is_https'] = 1 if scheme == 'https' else 0
+            features['has_port'] = 1 if port else 0
+            features['unusual_port'] = 1 if port and port not in [80, 443, 8080] else 0
             
             # === PATH ANALYSIS ===
             path_tokens = [t for t in path.split('/') if t]
             features['path_token_count'] = len(path_tokens)
-            features['has_fragment'] = 1 if parsed.fragment else 0
+            features['has_fragment'] = 1 if fragment else 0
             
             # NEW: Suspicious path keywords
+            path_lower = path.lower()
             features['suspicious_path_keywords'] = sum(1 for kw in self.suspicious_keywords 
-                                                       if kw in path.lower())
+                                                       if kw in path_lower)
             
             # === QUERY ANALYSIS ===
             features['query_param_count'] = len(query.split('&')) if query else 0
@@ -141,7 +162,7 @@ class URLFeatureExtractorV2:
             features['has_punycode'] = 1 if 'xn--' in url else 0
             
             # NEW: URL shortener detection
-            features['is_url_shortener'] = self._is_url_shortener(hostname)
+            features['is_url_shortener'] = self._is_url_shortener(hostname_lower)
             
             # NEW: Homograph attack detection (unicode lookalikes)
             features['has_unicode'] = 1 if any(ord(c) > 127 for c in url) else 0
@@ -152,11 +173,6 @@ class URLFeatureExtractorV2:
             print(f"Error extracting features from {url}: {e}")
             return self._get_default_features()
     
-    def _is_ip_address(self, hostname):
-        """Check if hostname is an IP address"""
-        ip_pattern = r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$'
-        return bool(re.match(ip_pattern, hostname))
-    
     def _calculate_entropy(self, text):
         """Calculate Shannon entropy"""
         if not text:
@@ -179,26 +195,16 @@ class URLFeatureExtractorV2:
             return c_count
         return c_count / v_count
     
-    def _check_brand_typosquat(self, hostname):
-        """Check if hostname contains brand name but wrong TLD"""
-        brands_with_tlds = {
-            'paypal': 'paypal.com',
-            'google': 'google.com',
-            'facebook': 'facebook.com',
-            'amazon': 'amazon.com',
-            'microsoft': 'microsoft.com'
-        }
-        
-        for brand, official in brands_with_tlds.items():
-            if brand in hostname.lower() and not hostname.lower().endswith(official):
+    def _check_brand_typosquat(self, hostname_lower):
+        """Check if a (lowercased) hostname contains brand name but wrong TLD"""
+        for brand, official in _BRAND_OFFICIAL_DOMAINS.items():
+            if brand in hostname_lower and not hostname_lower.endswith(official):
                 return 1
         return 0
     
-    def _is_url_shortener(self, hostname):
-        """Check if URL is from a shortener service"""
-        shorteners = ['bit.ly', 'tinyurl.com', 'goo.gl', 'ow.ly', 't.co', 
-                      'buff.ly', 'is.gd', 'cli.gs', 'tiny.cc']
-        return 1 if any(shortener in hostname.lower() for shortener in shorteners) else 0
+    def _is_url_shortener(self, hostname_lower):
+        """Check if URL is from a shortener service (hostname lowercased)"""
+        return 1 if _URL_SHORTENER_RE.search(hostname_lower) else 0
     
     def _set_hostname_defaults(self, features):
         """Set default values for hostname features"""
@@ -234,13 +240,6 @@ class URLFeatureExtractorV2:
             'is_url_shortener', 'has_unicode'
         ]
         return {name: 0 for name in feature_names}
-    
-    def extract_features_batch(self, urls):
-        """Extract features from list of URLs"""
-        features_list = []
-        for url in urls:
-            features_list.append(self.extract_features(url))
-        return pd.DataFrame(features_list)
 
 
 # Test the improved extractor
@@ -20,6 +20,7 @@ import numpy as np
 import joblib
 
 from app.services.privacy_feature_extractor import PrivacyFeatureExtractor
+from dataset_splits import read_split
 
 
 def main():
@@ -34,7 +35,7 @@ def main():
     for split in ['train.csv', 'validation.csv']:
         path = os.path.join(data_dir, split)
         if os.path.exists(path):
-            df = pd.read_csv(path)
+            df = read_split(path)
             legit = df[df['label'] == 'legitimate']
             dfs.append(legit)
             print(f"   {split}: {len(legit)} legitimate URLs")
@@ -25,6 +25,7 @@ from sklearn.metrics import classification_report
 import joblib
 
 from app.services.privacy_feature_extractor import PrivacyFeatureExtractor
+from dataset_splits import read_split
 
 
 # Realistic path/query augmentation templates
@@ -236,7 +237,7 @@ def load_legitimate_urls():
     for split in ['train.csv', 'validation.csv', 'test.csv']:
         path = os.path.join(data_dir, split)
         if os.path.exists(path):
-            df = pd.read_csv(path)
+            df = read_split(path)
             dfs.append(df)
             print(f"  Loaded {split}: {len(df)} URLs")
         else:
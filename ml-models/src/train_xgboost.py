@@ -4,31 +4,33 @@ Train XGBoost model for malicious URL detection
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
+from sklearn.metrics import confusion_matrix, classification_report
 import xgboost as xgb
 import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
 from feature_extractor import URLFeatureExtractor
+from dataset_splits import read_split
+from training_common import (
+    TRAIN_EVAL_SAMPLE, labeled_features, training_device, sample_rows, predict_splits,
+    binary_metrics, top_indices, save_native_model
+)
+import argparse
 import os
 
 def load_data(filepath):
     """Load dataset"""
     print(f" Loading data from {filepath}...")
-    df = pd.read_csv(filepath)
+    df = read_split(filepath)
     print(f" Loaded {len(df)} URLs")
-    print(f"   - Malicious: {len(df[df['label'] == 'malicious'])}")
-    print(f"   - Legitimate: {len(df[df['label'] == 'legitimate'])}")
+    counts = df['label'].value_counts()
+    print(f"   - Malicious: {counts.get('malicious', 0)}")
+    print(f"   - Legitimate: {counts.get('legitimate', 0)}")
     return df
 
 def extract_features_from_dataset(df, extractor):
-    """Extract features from all URLs in dataset"""
+    """Extract features from all URLs in dataset (cached across runs)"""
     print("\n Extracting features from URLs...")
     
-    features_df = extractor.extract_features_batch(df['url'].tolist())
-    
-    # Add label (convert to binary: 1 = malicious, 0 = legitimate)
-    features_df['label'] = (df['label'] == 'malicious').astype(int)
+    features_df = labeled_features(df, extractor)
     
     print(f" Extracted {len(features_df.columns) - 1} features")
     
@@ -46,6 +48,8 @@ def train_model(X_train, y_train, X_val, y_val):
         'objective': 'binary:logistic',
         'eval_metric': 'logloss',
         'random_state': 42,
+        'tree_method': 'hist',
+        'device': training_device(),
         'n_jobs': -1
     }
     
@@ -63,19 +67,20 @@ def train_model(X_train, y_train, X_val, y_val):
     
     return model
 
-def evaluate_model(model, X, y, dataset_name="Test"):
+def evaluate_model(model, X, y, dataset_name="Test", y_pred_proba=None, report=False):
     """Evaluate model performance"""
     print(f"\n Evaluating on {dataset_name} set...")
     
     # Predictions
-    y_pred = model.predict(X)
-    y_pred_proba = model.predict_proba(X)[:, 1]
+    # One pass over the trees: predict() would rerun predict_proba() and
+    # threshold it the same way (malicious when P > 0.5)
+    if y_pred_proba is None:
+        y_pred_proba = model.predict_proba(X)[:, 1]
+    y_pred = (y_pred_proba > 0.5).astype(int)
     
-    # Metrics
-    accuracy = accuracy_score(y, y_pred)
-    precision = precision_score(y, y_pred)
-    recall = recall_score(y, y_pred)
-    f1 = f1_score(y, y_pred)
+    # Metrics (labels pinned so the matrix is 2x2 even if a class is absent)
+    cm = confusion_matrix(y, y_pred, labels=[0, 1])
+    accuracy, precision, recall, f1 = binary_metrics(cm)
     
     print(f"\n{'='*60}")
     print(f"{dataset_name.upper()} SET RESULTS")
@@ -87,7 +92,6 @@ def evaluate_model(model, X, y, dataset_name="Test"):
     print(f"{'='*60}")
     
     # Confusion Matrix
-    cm = confusion_matrix(y, y_pred)
     print(f"\nConfusion Matrix:")
     print(f"                 Predicted")
     print(f"                 Legit  Malicious")
@@ -95,8 +99,9 @@ def evaluate_model(model, X, y, dataset_name="Test"):
     print(f"       Malicious {cm[1][0]:<6} {cm[1][1]:<6}")
     
     # Classification Report
-    print(f"\nDetailed Classification Report:")
-    print(classification_report(y, y_pred, target_names=['Legitimate', 'Malicious']))
+    if report:
+        print(f"\nDetailed Classification Report:")
+        print(classification_report(y, y_pred, target_names=['Legitimate', 'Malicious']))
     
     return {
         'accuracy': accuracy,
@@ -108,36 +113,42 @@ def evaluate_model(model, X, y, dataset_name="Test"):
 
 def save_model(model, feature_names, output_dir='../trained_models'):
     """Save trained model"""
-    os.makedirs(output_dir, exist_ok=True)
-    
-    model_path = os.path.join(output_dir, 'xgboost_model.pkl')
-    features_path = os.path.join(output_dir, 'feature_names.pkl')
-    
-    joblib.dump(model, model_path)
-    joblib.dump(feature_names, features_path)
+    model_path = os.path.join(output_dir, 'xgboost_model.ubj')
+    features_path = os.path.join(output_dir, 'feature_names.json')
+    save_native_model(model, feature_names, model_path, features_path)
     
     print(f"\n Model saved to: {model_path}")
     print(f" Feature names saved to: {features_path}")
 
-def plot_feature_importance(model, feature_names, top_n=20):
-    """Plot feature importance"""
-    print(f"\n Plotting top {top_n} important features...")
+def plot_feature_importance(model, feature_names, top_n=20, save_plot=True):
+    """
+    Print the top features by importance, and plot them when save_plot
+
+    matplotlib is only imported when a plot is drawn: loading it (and its
+    font cache) is a noticeable part of a training run's startup.
+    """
+    print(f"\n Ranking top {top_n} important features...")
     
     # Get feature importance
     importance = model.feature_importances_
-    indices = np.argsort(importance)[::-1][:top_n]
-    
-    plt.figure(figsize=(10, 8))
-    plt.title(f'Top {top_n} Most Important Features')
-    plt.barh(range(top_n), importance[indices])
-    plt.yticks(range(top_n), [feature_names[i] for i in indices])
-    plt.xlabel('Importance')
-    plt.gca().invert_yaxis()
-    plt.tight_layout()
-    
-    os.makedirs('../evaluation', exist_ok=True)
-    plt.savefig('../evaluation/feature_importance.png', dpi=300, bbox_inches='tight')
-    print(" Saved to: ../evaluation/feature_importance.png")
+    indices = top_indices(importance, top_n)
+    
+    if save_plot:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        
+        plt.figure(figsize=(10, 8))
+        plt.title(f'Top {top_n} Most Important Features')
+        plt.barh(range(top_n), importance[indices])
+        plt.yticks(range(top_n), [feature_names[i] for i in indices])
+        plt.xlabel('Importance')
+        plt.gca().invert_yaxis()
+        plt.tight_layout()
+        
+        os.makedirs('../evaluation', exist_ok=True)
+        plt.savefig('../evaluation/feature_importance.png', dpi=300, bbox_inches='tight')
+        print(" Saved to: ../evaluation/feature_importance.png")
     
     # Print top features
     print(f"\nTop {min(10, top_n)} Features:")
@@ -145,7 +156,7 @@ def plot_feature_importance(model, feature_names, top_n=20):
         idx = indices[i]
         print(f"  {i+1}. {feature_names[idx]:<30} {importance[idx]:.4f}")
 
-def main():
+def main(plot=False, verbose=False):
     print("=" * 60)
     print(" MALICIOUS URL DETECTION - MODEL TRAINING")
     print("=" * 60)
@@ -163,9 +174,15 @@ def main():
     print("FEATURE EXTRACTION")
     print("=" * 60)
     
-    train_features = extract_features_from_dataset(train_df, extractor)
-    val_features = extract_features_from_dataset(val_df, extractor)
-    test_features = extract_features_from_dataset(test_df, extractor)
+    # One extraction over all three splits: the worker pool starts once and
+    # every split gets the same compacted column dtypes
+    all_features = extract_features_from_dataset(
+        pd.concat([train_df, val_df, test_df], ignore_index=True), extractor
+    )
+    n_train, n_val = len(train_df), len(val_df)
+    train_features = all_features.iloc[:n_train]
+    val_features = all_features.iloc[n_train:n_train + n_val]
+    test_features = all_features.iloc[n_train + n_val:]
     
     # Prepare data
     feature_columns = [col for col in train_features.columns if col != 'label']
@@ -196,12 +213,14 @@ def main():
     print("MODEL EVALUATION")
     print("=" * 60)
     
-    train_metrics = evaluate_model(model, X_train, y_train, "Training")
-    val_metrics = evaluate_model(model, X_val, y_val, "Validation")
-    test_metrics = evaluate_model(model, X_test, y_test, "Test")
+    X_train_eval, y_train_eval = sample_rows(X_train, y_train, TRAIN_EVAL_SAMPLE)
+    train_proba, val_proba, test_proba = predict_splits(model, [X_train_eval, X_val, X_test])
+    train_metrics = evaluate_model(model, X_train_eval, y_train_eval, "Training (sample)", train_proba, report=verbose)
+    val_metrics = evaluate_model(model, X_val, y_val, "Validation", val_proba, report=verbose)
+    test_metrics = evaluate_model(model, X_test, y_test, "Test", test_proba, report=verbose)
     
     # Feature importance
-    plot_feature_importance(model, feature_columns)
+    plot_feature_importance(model, feature_columns, save_plot=plot)
     
     # Save model
     save_model(model, feature_columns)
@@ -220,10 +239,17 @@ def main():
     print(" TRAINING COMPLETE!")
     print("=" * 60)
     print("\nFiles created:")
-    print("   ../trained_models/xgboost_model.pkl")
-    print("   ../trained_models/feature_names.pkl")
-    print("   ../evaluation/feature_importance.png")
+    print("   ../trained_models/xgboost_model.ubj")
+    print("   ../trained_models/feature_names.json")
+    if plot:
+        print("   ../evaluation/feature_importance.png")
     print("   ../evaluation/model_metrics.pkl")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--plot', action='store_true',
+                        help='save a feature importance chart to ../evaluation')
+    parser.add_argument('--verbose', action='store_true',
+                        help='print the per-class classification report for each split')
+    args = parser.parse_args()
+    main(plot=args.plot, verbose=args.verbose)
\ No newline at end of file
@@ -3,12 +3,18 @@ Improved XGBoost Training with Better Features
 """
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import confusion_matrix, classification_report
 import xgboost as xgb
 import joblib
-import matplotlib.pyplot as plt
 from feature_extractor_v2 import URLFeatureExtractorV2
+from dataset_splits import read_split
+from training_common import (
+    TRAIN_EVAL_SAMPLE, labeled_features, training_device, sample_rows, predict_splits,
+    binary_metrics, top_indices, save_native_model
+)
+import argparse
+import gc
 import os
 
 def load_and_balance_data():
@@ -18,37 +24,60 @@ def load_and_balance_data():
     print("=" * 70)
     
     # Load all splits
-    train_df = pd.read_csv('../../datasets/processed/train.csv')
-    val_df = pd.read_csv('../../datasets/processed/validation.csv')
-    test_df = pd.read_csv('../../datasets/processed/test.csv')
+    train_df = read_split('../../datasets/processed/train.csv')
+    val_df = read_split('../../datasets/processed/validation.csv')
+    test_df = read_split('../../datasets/processed/test.csv')
     
     # Combine for reprocessing
     all_df = pd.concat([train_df, val_df, test_df], ignore_index=True)
     
+    counts = all_df['label'].value_counts()
     print(f" Total URLs loaded: {len(all_df)}")
-    print(f"   Malicious: {len(all_df[all_df['label'] == 'malicious'])}")
-    print(f"   Legitimate: {len(all_df[all_df['label'] == 'legitimate'])}")
+    print(f"   Malicious: {counts.get('malicious', 0)}")
+    print(f"   Legitimate: {counts.get('legitimate', 0)}")
     
     return all_df
 
 def extract_improved_features(df, extractor):
-    """Extract features using improved extractor"""
+    """Extract features using improved extractor (cached across runs)"""
     print("\n Extracting improved features...")
     
-    features_df = extractor.extract_features_batch(df['url'].tolist())
-    features_df['label'] = (df['label'] == 'malicious').astype(int)
+    features_df = labeled_features(df, extractor)
     
     print(f" Extracted {len(features_df.columns) - 1} features")
     print(f"   Feature count increased from 38 to {len(features_df.columns) - 1}")
     
     return features_df
 
+def as_float32(X):
+    """
+    X with columns that XGBoost reads as one float32 array
+
+    XGBoost takes a feature frame's .values, whose dtype is the common type
+    of its columns: int8/int16 with float32 stays float32, but a single
+    int32 column makes the whole copy float64. Such frames are cast to
+    float32 first; with 'hist' the fit then bins that straight into a
+    QuantileDMatrix (the eval set reusing its cuts).
+
+    main casts the feature matrix once before splitting, so cross-validation
+    and the final fit both read the same float32 block without converting.
+    """
+    if np.result_type(*X.dtypes) == np.float32:
+        return X
+    return X.astype(np.float32)
+
 def train_improved_model(X_train, y_train, X_val, y_val):
     """Train XGBoost with improved parameters"""
     print("\n Training improved XGBoost model...")
     
     # Improved parameters (FIXED: removed early_stopping_rounds from params)
+    # Trees grow leaf-wise up to 64 leaves: most of the signal sits in a
+    # few strong URL features, so best-first splits reach it with smaller
+    # trees than filling every level to depth 7. Depth stays capped, since
+    # prediction cost follows the deepest paths, not the leaf count
     params = {
+        'grow_policy': 'lossguide',
+        'max_leaves': 64,
         'max_depth': 7,
         'learning_rate': 0.05,
         'n_estimators': 300,
@@ -58,6 +87,8 @@ def train_improved_model(X_train, y_train, X_val, y_val):
         'objective': 'binary:logistic',
         'eval_metric': 'logloss',
         'random_state': 42,
+        'tree_method': 'hist',
+        'device': training_device(),
         'n_jobs': -1,
         'scale_pos_weight': 1,
         'early_stopping_rounds': 20  # MOVED HERE
@@ -77,42 +108,57 @@ def train_improved_model(X_train, y_train, X_val, y_val):
     return model
 
 def cross_validate_model(X, y, feature_names):
-    """Perform cross-validation to check generalization"""
+    """
+    Perform cross-validation to check generalization
+
+    Runs XGBoost's native cv over one DMatrix: the folds are sliced from it
+    and trained in turn in this process, instead of sklearn pickling five
+    classifiers to worker processes that each rebuild their own DMatrix.
+    Returns the final-round mean and std of the per-fold accuracy.
+    """
     print("\n Performing 5-fold cross-validation...")
     
+    # Same tree shape as train_improved_model
     params = {
+        'grow_policy': 'lossguide',
+        'max_leaves': 64,
         'max_depth': 7,
-        'learning_rate': 0.05,
-        'n_estimators': 300,
+        'eta': 0.05,
         'min_child_weight': 3,
-        'random_state': 42
+        'objective': 'binary:logistic',
+        'seed': 42,
+        'tree_method': 'hist',
+        'device': training_device()
     }
     
-    model = xgb.XGBClassifier(**params)
-    
-    # Stratified K-Fold
-    skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    dtrain = xgb.DMatrix(X, label=y, feature_names=feature_names)
     
-    # Cross-validation scores
-    cv_scores = cross_val_score(model, X, y, cv=skf, scoring='accuracy', n_jobs=-1)
+    # Stratified, shuffled 5-fold split (same as StratifiedKFold(shuffle=True, random_state=42))
+    cv_results = xgb.cv(
+        params, dtrain, num_boost_round=300, nfold=5,
+        stratified=True, seed=42, metrics='error'
+    )
+    cv_accuracy = 1 - cv_results['test-error-mean'].iloc[-1]
+    cv_std = cv_results['test-error-std'].iloc[-1]
     
     print(f"\n Cross-Validation Results:")
-    print(f"   Accuracy scores: {[f'{s:.4f}' for s in cv_scores]}")
-    print(f"   Mean accuracy: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
+    print(f"   Mean accuracy: {cv_accuracy:.4f} (+/- {cv_std * 2:.4f})")
     
-    return cv_scores
+    return cv_accuracy, cv_std
 
-def evaluate_model(model, X, y, dataset_name="Test"):
+def evaluate_model(model, X, y, dataset_name="Test", y_pred_proba=None, report=False):
     """Evaluate model with detailed metrics"""
     print(f"\n Evaluating on {dataset_name} set...")
     
-    y_pred = model.predict(X)
-    y_pred_proba = model.predict_proba(X)[:, 1]
+    # One pass over the trees: predict() would rerun predict_proba() and
+    # threshold it the same way (malicious when P > 0.5)
+    if y_pred_proba is None:
+        y_pred_proba = model.predict_proba(X)[:, 1]
+    y_pred = (y_pred_proba > 0.5).astype(int)
     
-    accuracy = accuracy_score(y, y_pred)
-    precision = precision_score(y, y_pred)
-    recall = recall_score(y, y_pred)
-    f1 = f1_score(y, y_pred)
+    # Labels pinned so the matrix is 2x2 even if a class is absent
+    cm = confusion_matrix(y, y_pred, labels=[0, 1])
+    accuracy, precision, recall, f1 = binary_metrics(cm)
     
     print(f"\n{'='*70}")
     print(f"{dataset_name.upper()} SET RESULTS")
@@ -123,7 +169,6 @@ def evaluate_model(model, X, y, dataset_name="Test"):
     print(f"F1 Score:  {f1:.4f}")
     print(f"{'='*70}")
     
-    cm = confusion_matrix(y, y_pred)
     print(f"\nConfusion Matrix:")
     print(f"                 Predicted")
     print(f"                 Legit  Malicious")
@@ -138,8 +183,9 @@ def evaluate_model(model, X, y, dataset_name="Test"):
     print(f"  False Positive Rate: {fpr:.4f} ({fpr*100:.2f}%)")
     print(f"  False Negative Rate: {fnr:.4f} ({fnr*100:.2f}%)")
     
-    print(f"\nDetailed Classification Report:")
-    print(classification_report(y, y_pred, target_names=['Legitimate', 'Malicious']))
+    if report:
+        print(f"\nDetailed Classification Report:")
+        print(classification_report(y, y_pred, target_names=['Legitimate', 'Malicious']))
     
     return {
         'accuracy': accuracy,
@@ -153,43 +199,49 @@ def evaluate_model(model, X, y, dataset_name="Test"):
 
 def save_improved_model(model, feature_names, output_dir='../trained_models'):
     """Save the improved model"""
-    os.makedirs(output_dir, exist_ok=True)
-    
-    model_path = os.path.join(output_dir, 'xgboost_model_v2.pkl')
-    features_path = os.path.join(output_dir, 'feature_names_v2.pkl')
-    
-    joblib.dump(model, model_path)
-    joblib.dump(feature_names, features_path)
+    model_path = os.path.join(output_dir, 'xgboost_model_v2.ubj')
+    features_path = os.path.join(output_dir, 'feature_names_v2.json')
+    save_native_model(model, feature_names, model_path, features_path)
     
     print(f"\n Improved model saved:")
     print(f"   {model_path}")
     print(f"   {features_path}")
 
-def plot_feature_importance(model, feature_names, top_n=20):
-    """Plot feature importance"""
-    print(f"\n Plotting top {top_n} important features...")
+def plot_feature_importance(model, feature_names, top_n=20, save_plot=True):
+    """
+    Print the top features by importance, and plot them when save_plot
+
+    matplotlib is only imported when a plot is drawn: loading it (and its
+    font cache) is a noticeable part of a training run's startup.
+    """
+    print(f"\n Ranking top {top_n} important features...")
     
     importance = model.feature_importances_
-    indices = np.argsort(importance)[::-1][:top_n]
-    
-    plt.figure(figsize=(10, 8))
-    plt.title(f'Top {top_n} Most Important Features (V2)')
-    plt.barh(range(top_n), importance[indices])
-    plt.yticks(range(top_n), [feature_names[i] for i in indices])
-    plt.xlabel('Importance')
-    plt.gca().invert_yaxis()
-    plt.tight_layout()
-    
-    os.makedirs('../evaluation', exist_ok=True)
-    plt.savefig('../evaluation/feature_importance_v2.png', dpi=300, bbox_inches='tight')
-    print(" Saved to: ../evaluation/feature_importance_v2.png")
+    indices = top_indices(importance, top_n)
+    
+    if save_plot:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        
+        plt.figure(figsize=(10, 8))
+        plt.title(f'Top {top_n} Most Important Features (V2)')
+        plt.barh(range(top_n), importance[indices])
+        plt.yticks(range(top_n), [feature_names[i] for i in indices])
+        plt.xlabel('Importance')
+        plt.gca().invert_yaxis()
+        plt.tight_layout()
+        
+        os.makedirs('../evaluation', exist_ok=True)
+        plt.savefig('../evaluation/feature_importance_v2.png', dpi=300, bbox_inches='tight')
+        print(" Saved to: ../evaluation/feature_importance_v2.png")
     
     print(f"\nTop 10 Features:")
     for i in range(min(10, top_n)):
         idx = indices[i]
         print(f"  {i+1}. {feature_names[idx]:<35} {importance[idx]:.4f}")
 
-def main():
+def main(plot=False, verbose=False):
     print("=" * 70)
     print(" IMPROVED MALICIOUS URL DETECTION - MODEL TRAINING V2")
     print("=" * 70)
@@ -209,7 +261,7 @@ def main():
     
     # Split data
     feature_columns = [col for col in features_df.columns if col != 'label']
-    X = features_df[feature_columns]
+    X = as_float32(features_df[feature_columns])
     y = features_df['label']
     
     # Train/Val/Test split (70/15/15)
@@ -220,13 +272,19 @@ def main():
         X_temp, y_temp, test_size=0.176, random_state=42, stratify=y_temp
     )
     
+    # The splits are copies: drop the full frames they came from so they are
+    # not held through cross-validation and training alongside XGBoost's
+    # own copies of the data
+    del all_df, features_df, X, y, X_temp, y_temp
+    gc.collect()
+    
     print(f"\nDataset shapes:")
     print(f"  Train: {X_train.shape}")
     print(f"  Val:   {X_val.shape}")
     print(f"  Test:  {X_test.shape}")
     
     # Cross-validation
-    cv_scores = cross_validate_model(X_train, y_train, feature_columns)
+    cv_accuracy, cv_std = cross_validate_model(X_train, y_train, feature_columns)
     
     # Train model
     print("\n" + "=" * 70)
@@ -240,12 +298,14 @@ def main():
     print("MODEL EVALUATION")
     print("=" * 70)
     
-    train_metrics = evaluate_model(model, X_train, y_train, "Training")
-    val_metrics = evaluate_model(model, X_val, y_val, "Validation")
-    test_metrics = evaluate_model(model, X_test, y_test, "Test")
+    X_train_eval, y_train_eval = sample_rows(X_train, y_train, TRAIN_EVAL_SAMPLE)
+    train_proba, val_proba, test_proba = predict_splits(model, [X_train_eval, X_val, X_test])
+    train_metrics = evaluate_model(model, X_train_eval, y_train_eval, "Training (sample)", train_proba, report=verbose)
+    val_metrics = evaluate_model(model, X_val, y_val, "Validation", val_proba, report=verbose)
+    test_metrics = evaluate_model(model, X_test, y_test, "Test", test_proba, report=verbose)
     
     # Feature importance
-    plot_feature_importance(model, feature_columns)
+    plot_feature_importance(model, feature_columns, save_plot=plot)
     
     # Save model
     save_improved_model(model, feature_columns)
@@ -255,7 +315,8 @@ def main():
         'train': train_metrics,
         'validation': val_metrics,
         'test': test_metrics,
-        'cross_validation_scores': cv_scores.tolist(),
+        'cross_validation_accuracy': cv_accuracy,
+        'cross_validation_std': cv_std,
         'feature_count': len(feature_columns)
     }
     
@@ -266,10 +327,17 @@ def main():
     print(" IMPROVED TRAINING COMPLETE!")
     print("=" * 70)
     print("\nFiles created:")
-    print("   ../trained_models/xgboost_model_v2.pkl")
-    print("   ../trained_models/feature_names_v2.pkl")
-    print("   ../evaluation/feature_importance_v2.png")
+    print("   ../trained_models/xgboost_model_v2.ubj")
+    print("   ../trained_models/feature_names_v2.json")
+    if plot:
+        print("   ../evaluation/feature_importance_v2.png")
     print("   ../evaluation/model_metrics_v2.pkl")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--plot', action='store_true',
+                        help='save a feature importance chart to ../evaluation')
+    parser.add_argument('--verbose', action='store_true',
+                        help='print the per-class classification report for each split')
+    args = parser.parse_args()
+    main(plot=args.plot, verbose=args.verbose)
@@ -8,8 +8,8 @@ Model learned has_path → malicious. This script fixes that by augmenting
 legitimate URLs with realistic paths before training.
 
 Output:
-  - xgboost_model.pkl  (replaces the current model)
-  - feature_names.pkl
+  - xgboost_model.ubj  (native XGBoost format, replaces the current model)
+  - feature_names.json
 """
 import sys
 import os
@@ -25,9 +25,11 @@ from sklearn.metrics import (
     f1_score, confusion_matrix, classification_report
 )
 import xgboost as xgb
-import joblib
 
 from feature_extractor_v2 import URLFeatureExtractorV2
+from dataset_splits import read_split
+from training_common import save_native_model, top_indices
+
 
 # ===== PATH AUGMENTATION (same templates as anomaly model) =====
 REALISTIC_PATHS = [
@@ -144,7 +146,7 @@ def load_data():
     for split in ['train.csv', 'validation.csv', 'test.csv']:
         path = os.path.join(data_dir, split)
         if os.path.exists(path):
-            df = pd.read_csv(path)
+            df = read_split(path)
             dfs.append(df)
             print(f"  Loaded {split}: {len(df)} URLs")
 
@@ -300,10 +302,9 @@ def save_model(model, feature_names):
 
     for d in [output_dir, backend_dir]:
         os.makedirs(d, exist_ok=True)
-        model_path = os.path.join(d, 'xgboost_model.pkl')
-        names_path = os.path.join(d, 'feature_names.pkl')
-        joblib.dump(model, model_path)
-        joblib.dump(feature_names, names_path)
+        model_path = os.path.join(d, 'xgboost_model.ubj')
+        names_path = os.path.join(d, 'feature_names.json')
+        save_native_model(model, feature_names, model_path, names_path)
         print(f"  Saved: {model_path}")
         print(f"  Saved: {names_path}")
 
@@ -401,7 +402,7 @@ def main():
     # 10. Feature importance
     print("\n  Top 10 Features:")
     importance = model.feature_importances_
-    indices = np.argsort(importance)[::-1][:10]
+    indices = top_indices(importance, 10)
     for i, idx in enumerate(indices):
         print(f"    {i+1}. {feature_cols[idx]:<35} {importance[idx]:.4f}")
 
@@ -0,0 +1,99 @@
+"""
+Helpers shared by the XGBoost training scripts
+
+train_xgboost.py and train_xgboost_v2.py differ in their extractor, data
+split and parameters; the stages in between (cached feature extraction,
+device choice, evaluation and model export) are defined once here.
+"""
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from feature_cache import cached_features_batch
+
+# Training-set metrics are only a fit sanity check next to the held-out
+# splits, so they are computed on a fixed random sample of this many rows
+TRAIN_EVAL_SAMPLE = 10000
+
+def labeled_features(df, extractor):
+    """
+    Features for df's URLs (cached across runs) plus a 0/1 'label' column
+    (1 = malicious)
+    """
+    features_df = cached_features_batch(extractor, df['url'].tolist())
+    features_df['label'] = (df['label'] == 'malicious').astype(np.uint8)
+    return features_df
+
+def training_device():
+    """'cuda' when this XGBoost build can train on a visible GPU, else 'cpu'"""
+    if not xgb.build_info().get('USE_CUDA'):
+        return 'cpu'
+    # Without a visible GPU, XGBoost warns and silently trains on the CPU
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        try:
+            xgb.train({'device': 'cuda', 'tree_method': 'hist'},
+                      xgb.DMatrix(np.zeros((2, 1)), label=[0, 1]), num_boost_round=1)
+        except xgb.core.XGBoostError:
+            return 'cpu'
+    return 'cpu' if any('GPU' in str(w.message) for w in caught) else 'cuda'
+
+def sample_rows(X, y, n, seed=42):
+    """Up to n rows of X and y, picked at random without replacement"""
+    if len(X) <= n:
+        return X, y
+    idx = np.sort(np.random.RandomState(seed).choice(len(X), size=n, replace=False))
+    return X.iloc[idx], y.iloc[idx]
+
+def top_indices(values, k):
+    """Indices of the k largest values, largest first"""
+    k = min(k, len(values))
+    if k < len(values):
+        # Partition out the top k in O(N), then sort only those
+        part = np.argpartition(values, -k)[-k:]
+    else:
+        part = np.arange(len(values))
+    return part[np.argsort(values[part])[::-1]]
+
+def predict_splits(model, splits):
+    """
+    Malicious probabilities for several feature frames in one prediction
+
+    The frames are stacked and scored in a single pass, so the model's
+    per-call setup (and on a GPU the device transfer and kernel launches)
+    is paid once rather than once per split.
+    """
+    y_pred_proba = model.predict_proba(pd.concat(splits))[:, 1]
+    return np.split(y_pred_proba, np.cumsum([len(X) for X in splits[:-1]]))
+
+def binary_metrics(cm):
+    """
+    Accuracy, precision, recall and F1 from a 2x2 confusion matrix
+
+    Same values as sklearn's scorers (0 where a ratio is undefined), read off
+    the matrix instead of re-scanning the predictions once per metric.
+    """
+    (tn, fp), (fn, tp) = cm
+    total = tn + fp + fn + tp
+    accuracy = (tn + tp) / total if total else 0.0
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+    return float(accuracy), float(precision), float(recall), float(f1)
+
+def save_native_model(model, feature_names, model_path, features_path):
+    """
+    Save model in XGBoost's native UBJSON format and its feature names as
+    JSON: a fraction of a pickle's size and loadable by any XGBoost version
+    (the backend reads both directly)
+    """
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    # Saved models are scored on CPU-only servers
+    model.set_params(device='cpu')
+    model.save_model(model_path)
+    with open(features_path, 'w') as f:
+        json.dump(list(feature_names), f, indent=2)